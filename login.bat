@@ -98,9 +98,16 @@ set "CMD_PYTHON=python"
 echo [STATUS] Ambiente Python detectado.
 echo [1/2] Verificando dependencias...
 
-:: Instala usando o caminho que achamos
-"%CMD_PYTHON%" -m pip install --upgrade pip --quiet
-"%CMD_PYTHON%" -m pip install pandas openpyxl xlsxwriter pyperclip pymupdf selenium webdriver-manager undetected-chromedriver --quiet
+:: So instala se faltar alguma biblioteca (evita o pip a cada abertura)
+"%CMD_PYTHON%" -c "import selenium, webdriver_manager, undetected_chromedriver, pyperclip, pandas, openpyxl, xlsxwriter, fitz" >nul 2>&1
+if %errorlevel% neq 0 (
+    echo [INFO] Instalando bibliotecas necessarias...
+    "%CMD_PYTHON%" -m pip install --upgrade pip --quiet
+    "%CMD_PYTHON%" -m pip install pandas openpyxl xlsxwriter pyperclip pymupdf selenium webdriver-manager undetected-chromedriver --quiet
+    echo [INFO] Bibliotecas instaladas.
+) else (
+    echo [INFO] Dependencias ja instaladas.
+)
 
 :: ----------------------------------------------------------
 :: 5. EXECUCAO DO SCRIPT
@@ -1,34 +1,264 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import pandas as pd
 import os
 import time
 import glob
-import shutil
 import pyperclip
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+from selenium.common.exceptions import NoSuchWindowException, UnexpectedAlertPresentException
 from selenium.webdriver.common.action_chains import ActionChains
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.service import Service
 import threading
+import sys
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from inicio_rapido import obter_chromedriver, preparar_perfil, liberar_perfil, PERFIL_EXECUCAO
+from captura_cdp import CapturaPDF, CAPABILITY_LOG, gravar_atomico, executar_cdp
+from navegacao_leve import ativar_navegacao_leve
+from diario_downloads import DiarioDownloads, ciclo_padrao, STATUS_PULADO
+from fila_retentativas import FilaRetentativas, registrar_resultado
+from telemetria import Telemetria
+from deduplicacao import DeduplicadorFaturas
+from armazem_faturas import ArmazemFaturas
+from base_clientes import carregar_base
+
+# =============================================================================
+# CONSULTAS AO DOM EM LOTE (1 execute_script = 1 ida ao chromedriver)
+# =============================================================================
+# Ler elemento por elemento via WebDriver custa uma requisição HTTP por
+# atributo. Estes scripts devolvem tudo que o robô precisa de uma vez só.
+
+JS_OPCOES_UC = """
+var select = document.getElementById('conta_contrato');
+if (!select) return null;
+return Array.prototype.map.call(select.options, function (opcao, i) {
+    return {indice: i, texto: (opcao.text || '').trim(), valor: opcao.value || '', selecionada: opcao.selected};
+});
+"""
+
+JS_TABELA_FATURAS = """
+return Array.prototype.map.call(document.querySelectorAll('.bill-reference'), function (ref, i) {
+    var linha = ref.closest('tr');
+    var mes = ref.querySelector('.referencia_legada');
+    var valor = linha ? linha.querySelector('.bill-value') : null;
+    var href = null;
+    if (linha) {
+        var links = linha.querySelectorAll('a[href]');
+        for (var j = 0; j < links.length; j++) {
+            if (/\\.pdf|download/i.test(links[j].href || '')) { href = links[j].href; break; }
+        }
+    }
+    return {
+        indice: i,
+        referencia: mes ? mes.innerText.trim() : '',
+        valor: valor ? valor.innerText.trim() : '',
+        href: href,
+        linha: linha
+    };
+});
+"""
+
+JS_LINK_ALTERNATIVO = """
+var links = document.getElementsByTagName('a');
+for (var i = 0; i < links.length; i++) {
+    var a = links[i];
+    var href = (a.href || '').toLowerCase();
+    var onclick = (a.getAttribute('onclick') || '').toLowerCase();
+    var texto = a.innerText || '';
+    if (texto.toLowerCase().indexOf('ver fatura') >= 0 || href.indexOf('.pdf') >= 0 || onclick.indexOf('download') >= 0) {
+        return {elemento: a, texto: texto.trim()};
+    }
+}
+return null;
+"""
+
+# Estado da tela de login: campos do formulário, desafio (captcha) e sessão ativa.
+# arguments[0] = 'email' ou 'data' (tipo do "Acesso equatorial" do cliente)
+JS_ESTADO_LOGIN = """
+function visivel(el) { return !!(el && el.offsetParent !== null); }
+function texto(el) {
+    return ((el.name || '') + ' ' + (el.id || '') + ' ' + (el.placeholder || '') + ' ' +
+            (el.getAttribute('aria-label') || '')).toLowerCase();
+}
+var logado = !!document.getElementById('conta_contrato') || location.href.indexOf('sua-conta') >= 0;
+var desafio = false;
+var quadros = document.querySelectorAll('iframe[src*="recaptcha"], iframe[src*="hcaptcha"], iframe[src*="challenges.cloudflare"]');
+for (var i = 0; i < quadros.length; i++) { if (visivel(quadros[i])) { desafio = true; break; } }
+
+var campos = Array.prototype.filter.call(document.querySelectorAll('input'), function (el) {
+    return visivel(el) && ['hidden', 'checkbox', 'radio', 'submit', 'button'].indexOf(el.type) < 0;
+});
+var login = null, acesso = null;
+for (var j = 0; j < campos.length; j++) {
+    var t = texto(campos[j]);
+    if (!login && /cpf|cnpj|documento/.test(t)) { login = campos[j]; continue; }
+    if (!acesso && arguments[0] === 'email' && (campos[j].type === 'email' || /mail/.test(t))) { acesso = campos[j]; continue; }
+    if (!acesso && arguments[0] === 'data' && /nasc|data/.test(t)) { acesso = campos[j]; }
+}
+
+var botao = null;
+var botoes = document.querySelectorAll('button, input[type="submit"]');
+for (var k = 0; k < botoes.length; k++) {
+    var rotulo = (botoes[k].innerText || botoes[k].value || '').toLowerCase();
+    if (visivel(botoes[k]) && /entrar|acessar|login/.test(rotulo)) { botao = botoes[k]; break; }
+}
+
+var erro = document.querySelector('.alert-danger, .error-message, .invalid-feedback, .toast-error');
+return {
+    logado: logado,
+    desafio: desafio,
+    login: login,
+    acesso: acesso,
+    botao: botao,
+    erro: visivel(erro) ? erro.innerText.trim() : null
+};
+"""
+
+# Corrida entre o elemento esperado (arguments[0]) e os estados terminais do portal.
+# Retorna 'OK', um código terminal ('CODIGO' ou 'CODIGO:detalhe') ou null (carregando)
+JS_ESTADO_PAGINA = """
+function visivel(el) { return !!(el && el.offsetParent !== null); }
+if (document.querySelector(arguments[0])) return 'OK';
+
+var texto = (document.body ? document.body.innerText : '').toLowerCase();
+
+// "Sem faturas" só vale no quadro de faturas vazio (tabela/lista sem nenhuma linha),
+// nunca em banner, rodapé ou aviso geral enquanto a tabela ainda carrega
+var semFaturas = /n[aã]o (h[aá]|possui|existem?) (faturas|d[eé]bitos)|nenhuma fatura (encontrada|dispon[ií]vel)/;
+var quadros = document.querySelectorAll('table, [class*="fatura"], [id*="fatura"], [class*="bill"], [class*="debito"]');
+for (var q = 0; q < quadros.length; q++) {
+    var quadro = quadros[q];
+    if (!visivel(quadro) || quadro.querySelector('.bill-reference')) continue;
+    if (quadro.closest('header, footer, nav, [role="alert"], [class*="banner"], [class*="footer"], .lista-debitos-modal')) continue;
+    var conteudo = (quadro.innerText || '').toLowerCase();
+    if (conteudo.length < 300 && semFaturas.test(conteudo)) return 'SEM_FATURAS';
+}
+if (/sess[aã]o (expirou|expirada|encerrada)/.test(texto)) return 'SESSAO_EXPIRADA';
+
+var campos = document.querySelectorAll('input');
+for (var i = 0; i < campos.length; i++) {
+    var nome = ((campos[i].name || '') + ' ' + (campos[i].id || '') + ' ' + (campos[i].placeholder || '')).toLowerCase();
+    if (visivel(campos[i]) && /cpf|cnpj/.test(nome) && !document.getElementById('conta_contrato')) {
+        return 'SESSAO_EXPIRADA';
+    }
+}
+
+// Banner vermelho só é fatal se for erro do fluxo (login, troca de UC, faturas);
+// avisos informativos no mesmo estilo (débitos vencidos, atraso) aparecem em páginas normais
+var falha = /erro|inv[aá]lid|n[aã]o foi poss[ií]vel|n[aã]o encontrad|indispon[ií]vel|falha|tente novamente/;
+var informativo = /d[eé]bitos?|vencid|atraso|pend[eê]ncia|aviso/;
+var erros = document.querySelectorAll('.alert-danger, .error-message, .toast-error');
+for (var e = 0; e < erros.length; e++) {
+    if (!visivel(erros[e]) || erros[e].closest('header, footer, nav, [class*="banner"]')) continue;
+    var mensagem = (erros[e].innerText || '').trim();
+    var minuscula = mensagem.toLowerCase();
+    if (falha.test(minuscula) && !informativo.test(minuscula)) return 'BANNER_ERRO:' + mensagem.substring(0, 120);
+}
+
+if (document.querySelector('a[href*="emitir-segunda-via"]') && texto.indexOf('clara') >= 0) return 'CLARA';
+return null;
+"""
+
+# Injetado em todo documento novo (Page.addScriptToEvaluateOnNewDocument): sai da
+# página da Clara pelo link "Emitir segunda via" e esconde o widget da assistente
+JS_SUPRIMIR_CLARA = """
+(function () {
+    var agendado = false;
+    var widget = /(^|[-_\\s])clara([-_\\s]|$)/i;
+
+    function neutralizar() {
+        agendado = false;
+        if (!document.body) return;
+        var link = document.querySelector('a[href*="emitir-segunda-via"]');
+        var texto = document.body.innerText || '';
+        if (link && /Clara|Olá, tudo bem\\?/.test(texto) && !document.querySelector('.bill-reference, #conta_contrato')) {
+            // Já está no destino do link: redirecionar de novo só recarregaria a mesma página
+            if (location.href.split('#')[0] === link.href.split('#')[0]) return;
+            // Trava em sessionStorage (window.* zera a cada documento, e este script roda em todos):
+            // no máximo um redirecionamento a cada 30s por aba, mesmo que a tabela demore a renderizar
+            var ultimo = 0;
+            try { ultimo = Number(sessionStorage.getItem('__claraRedirecionada')) || 0; } catch (e) {}
+            if (Date.now() - ultimo > 30000) {
+                try { sessionStorage.setItem('__claraRedirecionada', String(Date.now())); } catch (e) {}
+                location.href = link.href;
+            }
+            return;
+        }
+        var elementos = document.querySelectorAll('[id], [class]');
+        for (var i = 0; i < elementos.length; i++) {
+            var el = elementos[i];
+            if ((widget.test(el.id || '') || widget.test(typeof el.className === 'string' ? el.className : ''))
+                    && el.style.display !== 'none') {
+                el.style.setProperty('display', 'none', 'important');
+                window.__claraOcultos = (window.__claraOcultos || 0) + 1;
+            }
+        }
+    }
+
+    var observador = new MutationObserver(function () {
+        if (!agendado) { agendado = true; setTimeout(neutralizar, 100); }
+    });
+    document.addEventListener('DOMContentLoaded', function () {
+        neutralizar();
+        observador.observe(document.documentElement, {childList: true, subtree: true});
+    });
+})();
+"""
+
+# Checagem instantânea (sem espera): link de saída se a página atual for a da Clara
+JS_LINK_SAIDA_CLARA = """
+var link = document.querySelector('a[href*="emitir-segunda-via"]');
+var texto = document.body ? (document.body.innerText || '') : '';
+if (link && /Clara|Olá, tudo bem\\?/.test(texto) && !document.querySelector('.bill-reference, #conta_contrato')) return link;
+return null;
+"""
+
+# Descrição dos códigos devolvidos como "Erro [CODIGO]: ..."
+ESTADOS_TERMINAIS = {
+    "SEM_FATURAS": "UC sem faturas no portal",
+    "SESSAO_EXPIRADA": "sessão expirada (portal voltou para o login)",
+    "BANNER_ERRO": "portal exibiu mensagem de erro",
+    "CLARA": "portal preso na assistente Clara",
+}
 
 # =============================================================================
 # 1. O CÉREBRO DO ROBÔ (SELENIUM) - VERSÃO FINAL OTIMIZADA
 # =============================================================================
 class EquatorialBot:
-    def __init__(self, download_folder):
+    def __init__(self, download_folder, perfil_modelo=None, captura_cdp=False, ao_capturar_pdf=None,
+                 navegacao_leve=False, pasta_perfil=PERFIL_EXECUCAO, suprimir_clara=False,
+                 url_remota=None, governador=None, telemetria=None):
         self.driver = None
         self.wait = None
         self.download_folder = os.path.abspath(download_folder)
+        self.perfil_modelo = perfil_modelo  # Perfil "golden" copiado a cada início (opcional)
+        self.ultimo_arquivo = None  # Caminho do último PDF salvo (usado pelo diário)
+        self.armazem = ArmazemFaturas(self.download_folder)  # Partições <AAAA-MM>/<UC>/ + inventário
+        self.soltos_arrumados = False  # PDFs antigos soltos na raiz vão para as partições na 1ª consulta
+        self.deduplicador = DeduplicadorFaturas(self.download_folder)  # PDF idêntico a um já salvo vira só apelido
+        self.url_remota = url_remota  # Nó do Selenium Grid / chromedriver remoto (None = Chrome local)
+        self.governador = governador  # limitador.Governador compartilhado entre robôs paralelos (opcional)
+        self.telemetria = telemetria  # telemetria.Telemetria: duração de cada etapa por cliente (opcional)
+        self.uc_atual = None  # UC em processamento (rótulo da telemetria)
+        # No nó remoto a pasta de download não é acessível: o PDF só volta pela captura CDP
+        self.captura_cdp = captura_cdp or bool(url_remota)  # Captura o PDF pela rede em vez de vigiar a pasta
+        self.ao_capturar_pdf = ao_capturar_pdf  # Callback opcional (bytes, caminho) p/ extração em memória
+        self.navegacao_leve = navegacao_leve  # Bloqueia imagens, fontes e rastreadores (config/navegacao_leve.json)
+        self.pasta_perfil = pasta_perfil  # Cada navegador precisa da sua cópia do perfil (cookies isolados)
+        self.suprimir_clara = suprimir_clara  # Script injetado neutraliza a Clara (sem a sonda de 5s)
+        self.pronto = threading.Event()  # Livre para uso (o modo pipeline limpa enquanto prepara)
+        self.pronto.set()
+        self.cliente_preparado = None  # CNPJ/CPF já logado pelo preparo do pipeline
         
         if not os.path.exists(self.download_folder):
             os.makedirs(self.download_folder)
 
-    def abrir_navegador(self):
+    def abrir_navegador(self, reaproveitar_perfil=False):
         if self.driver is not None: 
             return 
 
@@ -41,6 +271,10 @@ class EquatorialBot:
             "profile.default_content_setting_values.automatic_downloads": 1,
             "safebrowsing.enabled": True
         }
+        if self.captura_cdp:
+            # O PDF precisa abrir no visualizador para virar resposta de rede legível
+            prefs["plugins.always_open_pdf_externally"] = False
+            options.set_capability(*CAPABILITY_LOG)
         options.add_experimental_option("prefs", prefs)
         options.add_argument("--start-maximized")
         options.add_argument("--disable-gpu")
@@ -55,22 +289,208 @@ class EquatorialBot:
         # Adicionar headers para parecer mais humano
         options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
         
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=options)
-        self.wait = WebDriverWait(self.driver, 30)
+        # Perfil limpo copiado do modelo (sem caches acumulados); no nó remoto o perfil é do nó
+        if self.perfil_modelo and not self.url_remota:
+            if reaproveitar_perfil and os.path.isdir(self.pasta_perfil):
+                pasta = liberar_perfil(self.pasta_perfil)  # Após queda: mantém cookies da sessão
+            else:
+                pasta = preparar_perfil(self.perfil_modelo, self.pasta_perfil)
+            options.add_argument(f"--user-data-dir={pasta}")
+        
+        if self.url_remota:
+            self.driver = webdriver.Remote(command_executor=self.url_remota, options=options)
+        else:
+            # Chromedriver em cache local: sem consulta de versão a cada início
+            try:
+                self.driver = webdriver.Chrome(service=Service(obter_chromedriver()), options=options)
+            except WebDriverException as e:
+                # Chrome atualizou e o driver em cache ficou incompatível: renova uma vez
+                print(f"⚠️ Chromedriver em cache falhou ({e.msg}), renovando...")
+                self.driver = webdriver.Chrome(service=Service(obter_chromedriver(forcar=True)), options=options)
+        self.wait = WebDriverWait(self.driver, self.timeout("tabela", 30))
+        
+        # Clara neutralizada por script em todo documento novo
+        if self.suprimir_clara:
+            try:
+                executar_cdp(self.driver, "Page.addScriptToEvaluateOnNewDocument", {"source": JS_SUPRIMIR_CLARA})
+                print("🛡️  Supressão da Clara ativa")
+            except Exception as e:
+                print(f"⚠️ Não foi possível injetar a supressão da Clara: {e}")
+                self.suprimir_clara = False
+        
+        # Bloqueio precisa estar ativo antes da primeira navegação
+        if self.navegacao_leve:
+            try:
+                ativar_navegacao_leve(self.driver)
+            except Exception as e:
+                print(f"⚠️ Não foi possível ativar a navegação leve: {e}")
+        
+        self.aguardar_vez("navegacao")
         self.driver.get("https://ma.equatorialenergia.com.br/") 
         
-        print(f"Navegador aberto. Pasta de download: {self.download_folder}")
+        print(f"Navegador aberto{f' no nó {self.url_remota}' if self.url_remota else ''}. "
+              f"Pasta de download: {self.download_folder}")
+
+    def aguardar_vez(self, tipo):
+        """Respeita o ritmo compartilhado de navegações/downloads (se houver governador)"""
+        if self.governador:
+            self.governador.aguardar(tipo)
+
+    def medir_etapa(self, etapa, inicio, sucesso=True, cliente=None):
+        """Grava na telemetria quanto a etapa levou desde 'inicio' (cliente padrão: a UC atual)"""
+        if self.telemetria:
+            self.telemetria.registrar(cliente or self.uc_atual, etapa, time.time() - inicio, sucesso)
+
+    def timeout(self, etapa, padrao):
+        """Timeout da etapa aprendido pela telemetria (p99 do histórico) ou o valor fixo"""
+        return self.telemetria.timeout(etapa, padrao) if self.telemetria else padrao
+
+    def sessao_viva(self):
+        """Health-check: o navegador e o chromedriver ainda respondem?"""
+        if self.driver is None:
+            return False
+        try:
+            self.driver.execute_script("return 1;")
+            return True
+        except UnexpectedAlertPresentException:
+            return True
+        except NoSuchWindowException:
+            # Só a aba atual sumiu: volta para a que restou
+            try:
+                self.driver.switch_to.window(self.driver.window_handles[0])
+                return True
+            except Exception:
+                return False
+        except Exception:
+            # InvalidSessionIdException, conexão recusada, chromedriver morto...
+            return False
+
+    def reiniciar_navegador(self):
+        """Reabre o navegador morto com o mesmo perfil e a mesma pasta de downloads"""
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        self.driver = None
+        self.cliente_preparado = None
+        self.abrir_navegador(reaproveitar_perfil=True)
+
+    def ler_opcoes_uc(self):
+        """Lê todas as opções do seletor 'conta_contrato' em uma única chamada"""
+        return self.driver.execute_script(JS_OPCOES_UC) or []
+
+    def ler_tabela_faturas(self):
+        """Lê a tabela de faturas inteira (referência, valor, link e linha) em uma única chamada"""
+        return self.driver.execute_script(JS_TABELA_FATURAS) or []
+
+    def ler_estado_login(self, acesso):
+        """Lê formulário, desafio e sessão ativa da tela de login em uma única chamada"""
+        tipo_acesso = "email" if "@" in acesso else "data"
+        return self.driver.execute_script(JS_ESTADO_LOGIN, tipo_acesso)
+
+    def fazer_login(self, login, acesso, timeout=30):
+        """Preenche o login do portal com os dados da base.
+        Retorna True quando logado; "Manual: ..." quando o operador precisa assumir."""
+        inicio = time.time()
+        resultado = self.preencher_login(login, acesso, timeout)
+        self.medir_etapa("login", inicio, resultado is True, cliente=login)
+        return resultado
+
+    def preencher_login(self, login, acesso, timeout):
+        if not self.driver:
+            return "Erro: Navegador não inicializado"
+        if not login or not acesso:
+            return "Manual: cliente sem CNPJ/CPF ou acesso na base"
+        
+        print(f"🔐 Login automático: {login}")
+        
+        try:
+            # Aguarda o formulário aparecer (ou a sessão já estar ativa)
+            inicio = time.time()
+            estado = self.ler_estado_login(acesso)
+            while not estado["logado"] and not estado["desafio"] and not (estado["login"] and estado["acesso"]):
+                if time.time() - inicio > 10:
+                    return "Manual: formulário de login não encontrado"
+                time.sleep(0.5)
+                estado = self.ler_estado_login(acesso)
+            
+            if estado["logado"]:
+                print("✅ Sessão já ativa")
+                return True
+            if estado["desafio"]:
+                return "Manual: desafio (captcha) na tela de login"
+            
+            for campo, valor in ((estado["login"], login), (estado["acesso"], acesso)):
+                campo.clear()
+                campo.send_keys(valor)
+            
+            self.aguardar_vez("navegacao")
+            if estado["botao"]:
+                self.driver.execute_script("arguments[0].click();", estado["botao"])
+            else:
+                estado["acesso"].submit()
+            
+            # Aguarda a página autenticada, um desafio ou a recusa do portal
+            inicio = time.time()
+            while time.time() - inicio < timeout:
+                time.sleep(1)
+                estado = self.ler_estado_login(acesso)
+                if estado["logado"]:
+                    print("✅ Login automático concluído")
+                    return True
+                if estado["desafio"]:
+                    return "Manual: desafio (captcha) após enviar o login"
+                if estado["erro"]:
+                    return f"Manual: portal recusou o login - {estado['erro']}"
+            
+            return f"Manual: página autenticada não apareceu em {timeout}s"
+        
+        except Exception as e:
+            print(f"⚠️ Erro no login automático: {e}")
+            return f"Manual: erro no login automático - {e}"
+
+    def aguardar_pagina(self, seletor, mensagem_timeout, timeout=30):
+        """Espera 'seletor' aparecer, mas desiste na hora em um estado terminal do portal.
+        Retorna True ou "Erro [CODIGO]: ..." (o código confirma em duas leituras seguidas)."""
+        inicio = time.time()
+        anterior = None
+        clara_tratada = False
+        
+        while time.time() - inicio < timeout:
+            estado = self.driver.execute_script(JS_ESTADO_PAGINA, seletor)
+            if estado == "OK":
+                return True
+            
+            codigo, _, detalhe = (estado or "").partition(":")
+            
+            # Clara tem saída conhecida: tenta uma vez antes de desistir
+            if codigo == "CLARA" and not clara_tratada:
+                clara_tratada = True
+                self.sair_da_clara()
+                anterior = None
+                continue
+            
+            if codigo and codigo == anterior:
+                print(f"⛔ Estado terminal em {time.time() - inicio:.1f}s: {codigo}")
+                return f"Erro [{codigo}]: {detalhe or ESTADOS_TERMINAIS[codigo]}"
+            
+            anterior = codigo or None
+            time.sleep(0.5)
+        
+        return f"Erro [TIMEOUT]: {mensagem_timeout}"
 
     def verificar_e_trocar_uc(self, uc_alvo):
         """Verifica e troca a UC se necessário"""
         try:
-            select_element = self.wait.until(
-                EC.presence_of_element_located((By.ID, "conta_contrato"))
-            )
+            estado = self.aguardar_pagina("#conta_contrato", "Seletor de UC não encontrado",
+                                          timeout=self.timeout("troca_uc", 30))
+            if estado is not True:
+                return estado
+            select_element = self.driver.find_element(By.ID, "conta_contrato")
             
-            select = Select(select_element)
-            uc_atual = select.first_selected_option.text.strip()
+            opcoes = self.ler_opcoes_uc()
+            selecionada = next((o for o in opcoes if o["selecionada"]), None)
+            uc_atual = selecionada["texto"] if selecionada else ""
             uc_alvo_limpa = str(uc_alvo).strip()
             
             print(f"UC Atual: {uc_atual}")
@@ -85,29 +505,27 @@ class EquatorialBot:
             
             print(f"Trocando UC: {uc_atual} -> {uc_alvo_limpa}")
             
+            opcao_alvo = next((o for o in opcoes
+                               if uc_alvo_clean in o["texto"].replace('.', '')
+                               or uc_alvo_clean in o["valor"].replace('.', '')), None)
+            
+            if opcao_alvo is None:
+                return f"Erro: UC {uc_alvo} não encontrada nas opções"
+            
             try:
-                select.select_by_visible_text(uc_alvo_limpa)
-            except:
-                try:
-                    for option in select.options:
-                        option_text = option.text.strip().replace('.', '')
-                        option_value = option.get_attribute('value')
-                        
-                        if uc_alvo_clean in option_text or uc_alvo_clean in option_value:
-                            option.click()
-                            print(f"UC selecionada via opção: {option.text}")
-                            break
-                except Exception as e:
-                    print(f"Erro ao selecionar opção: {e}")
-                    return f"Erro: UC {uc_alvo} não encontrada nas opções"
+                self.aguardar_vez("navegacao")
+                Select(select_element).select_by_index(opcao_alvo["indice"])
+                print(f"UC selecionada via opção: {opcao_alvo['texto']}")
+            except Exception as e:
+                print(f"Erro ao selecionar opção: {e}")
+                return f"Erro: UC {uc_alvo} não encontrada nas opções"
             
             # Aguarda mais tempo para a página atualizar
             time.sleep(8)
             
             try:
-                select_element = self.driver.find_element(By.ID, "conta_contrato")
-                select = Select(select_element)
-                nova_uc = select.first_selected_option.text.strip().replace('.', '')
+                selecionada = next((o for o in self.ler_opcoes_uc() if o["selecionada"]), None)
+                nova_uc = selecionada["texto"].replace('.', '') if selecionada else ""
                 
                 if uc_alvo_clean in nova_uc:
                     print(f"UC trocada com sucesso para: {nova_uc}")
@@ -234,10 +652,39 @@ class EquatorialBot:
             print(f"⚠️  Erro ao tentar sair da página da Clara: {e}")
             return False
 
-    def baixar_ultima_fatura(self, uc_cliente):
+    def verificar_clara_rapido(self):
+        """Checagem sem espera: se a página atual for a da Clara, sai por 'Emitir segunda via'"""
+        try:
+            link = self.driver.execute_script(JS_LINK_SAIDA_CLARA)
+            if not link:
+                return False
+            self.driver.execute_script("arguments[0].click();", link)
+            print("⚠️  Página da Clara detectada, saindo por 'Emitir segunda via'")
+            return True
+        except Exception as e:
+            print(f"⚠️  Erro na checagem rápida da Clara: {e}")
+            return False
+
+    def sair_da_clara(self):
+        """Com a supressão ativa a checagem é instantânea; senão usa a sonda antiga (5s)"""
+        if self.suprimir_clara:
+            return self.verificar_clara_rapido()
+        print("Verificando se foi redirecionado para a página da Clara...")
+        return self.verificar_e_evitar_clara()
+
+    def baixar_ultima_fatura(self, uc_cliente, verificar_clara=True):
         """Baixa a última fatura disponível (a mais recente)"""
+        self.uc_atual = uc_cliente
+        inicio = time.time()
+        resultado = self.processar_ultima_fatura(uc_cliente, verificar_clara)
+        self.medir_etapa("total", inicio, "Sucesso" in str(resultado))
+        return resultado
+
+    def processar_ultima_fatura(self, uc_cliente, verificar_clara):
         if not self.driver:
             return "Erro: Navegador não inicializado"
+        
+        self.ultimo_arquivo = None
             
         try:
             print(f"\n{'='*50}")
@@ -245,13 +692,17 @@ class EquatorialBot:
             print(f"{'='*50}")
 
             # --- NOVA ETAPA ADICIONADA AQUI ---
-            print("Verificando se foi redirecionado para a página da Clara...")
-            self.verificar_e_evitar_clara()
+            if verificar_clara:
+                inicio = time.time()
+                self.sair_da_clara()
+                self.medir_etapa("clara", inicio)
             # ----------------------------------
             
             # 1. Verifica e troca UC se necessário
             print("Verificando UC atual...")
+            inicio = time.time()
             resultado_uc = self.verificar_e_trocar_uc(uc_cliente)
+            self.medir_etapa("troca_uc", inicio, resultado_uc == True)
             
             if resultado_uc != True:
                 return resultado_uc
@@ -266,120 +717,92 @@ class EquatorialBot:
             # 4. Localiza a PRIMEIRA fatura (a mais recente)
             print("Procurando a última fatura (mais recente)...")
             
-            # Aguarda a tabela de faturas carregar
-            try:
-                self.wait.until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "bill-reference"))
-                )
-                print("Tabela de faturas carregada")
-            except TimeoutException:
-                return "Erro: Tabela de faturas não encontrada"
+            # Aguarda a tabela de faturas carregar (ou falha rápido em estado terminal)
+            inicio = time.time()
+            estado = self.aguardar_pagina(".bill-reference", "Tabela de faturas não encontrada",
+                                          timeout=self.timeout("tabela", 30))
+            self.medir_etapa("tabela", inicio, estado is True)
+            if estado is not True:
+                return estado
+            print("Tabela de faturas carregada")
             
             # Procura a PRIMEIRA fatura da lista (a mais recente)
             try:
-                todas_faturas = self.driver.find_elements(By.CLASS_NAME, "bill-reference")
+                todas_faturas = self.ler_tabela_faturas()
                 
                 if not todas_faturas:
                     return "Erro: Nenhuma fatura encontrada"
                 
                 primeira_fatura = todas_faturas[0]
                 
-                # Encontra o mês de referência
-                try:
-                    elemento_mes = primeira_fatura.find_element(By.CLASS_NAME, "referencia_legada")
-                    mes_referencia = elemento_mes.text.strip()
+                # Mês de referência
+                mes_referencia = primeira_fatura["referencia"]
+                if mes_referencia:
                     print(f"Última fatura encontrada: {mes_referencia}")
-                except:
+                else:
                     mes_referencia = "Ultima_Fatura"
                     print("Mês não encontrado, usando nome padrão")
                 
-                # Encontra a linha da tabela
-                linha_fatura = primeira_fatura.find_element(By.XPATH, "./ancestor::tr")
+                # A fatura mais recente do portal já está na pasta? Nada a baixar
+                existente = self.fatura_local(uc_cliente, mes_referencia)
+                if existente:
+                    self.ultimo_arquivo = existente
+                    print(f"⏭️  Fatura {mes_referencia} já está na pasta: {os.path.basename(existente)}")
+                    return f"Sucesso: {mes_referencia} (já existia)"
                 
-                # 5. Clica no valor da fatura para abrir o modal
-                try:
-                    celula_valor = linha_fatura.find_element(By.CLASS_NAME, "bill-value")
-                    print("Clicando no valor da fatura para abrir modal...")
-                    
-                    # Clique suave com JavaScript
-                    self.driver.execute_script("arguments[0].click();", celula_valor)
-                    print("✅ Clique no valor realizado")
-                    
-                    # Aguarda o modal carregar completamente
-                    time.sleep(5)
-                    
-                except NoSuchElementException:
-                    print("Célula de valor não encontrada, tentando clicar na linha...")
-                    linha_fatura.click()
-                    time.sleep(5)
+                # Linha da tabela (já veio no mesmo script)
+                linha_fatura = primeira_fatura["linha"]
                 
-                # 6. Tenta clicar no botão "Ver Fatura" de várias formas
-                print("Tentando clicar em 'Ver Fatura'...")
+                # Captura pela rede: escuta ligada ANTES do clique
+                captura = self.iniciar_captura()
                 
-                # Método 1: Clique direto no botão
-                clique_sucesso = self.clicar_ver_fatura_direto()
-                
-                if not clique_sucesso:
-                    # Método 2: Procura alternativas
-                    print("Tentando método alternativo...")
-                    try:
-                        # Procura por qualquer link de download
-                        links = self.driver.find_elements(By.TAG_NAME, "a")
-                        for link in links:
-                            href = link.get_attribute("href") or ""
-                            onclick = link.get_attribute("onclick") or ""
-                            texto = link.text or ""
-                            
-                            if "ver fatura" in texto.lower() or ".pdf" in href.lower() or "download" in onclick.lower():
-                                print(f"Encontrado link alternativo: {texto}")
-                                self.driver.execute_script("arguments[0].scrollIntoView(true);", link)
-                                time.sleep(1)
-                                link.click()
-                                clique_sucesso = True
-                                break
-                    except Exception as e:
-                        print(f"Erro no método alternativo: {e}")
+                # 5-6. Abre o modal da linha e clica em "Ver Fatura"
+                self.aguardar_vez("download")
+                inicio = time.time()
+                clique_sucesso = self.acionar_download_da_linha(linha_fatura)
+                self.medir_etapa("ver_fatura", inicio, clique_sucesso)
                 
                 if not clique_sucesso:
                     return "Erro: Não foi possível acionar o download"
                 
+                inicio = time.time()
+                if self.captura_cdp:
+                    # Visualizador de PDF ativo: o Chrome não grava na pasta, então não há pasta a vigiar
+                    resultado_captura = self.concluir_captura(captura, uc_cliente, mes_referencia,
+                                                              timeout=self.timeout("download", 90))
+                    self.medir_etapa("download", inicio, bool(resultado_captura))
+                    if resultado_captura:
+                        return resultado_captura
+                    return "Erro: PDF não capturado pela rede nem obtido do visualizador"
+                
                 print("Download iniciado. Aguardando...")
                 
                 # 7. Aguarda o download completar com timeout maior
-                novo_arquivo = self.esperar_download_completar(arquivos_antes, timeout=90)
+                novo_arquivo = self.esperar_download_completar(arquivos_antes,
+                                                               timeout=self.timeout("download", 90))
+                self.medir_etapa("download", inicio, bool(novo_arquivo))
                 
                 if novo_arquivo:
-                    # Define o nome do arquivo final
-                    nome_final = os.path.join(
-                        self.download_folder, 
-                        f"Fatura_{uc_cliente}_{mes_referencia.replace('/', '-')}.pdf"
-                    )
-                    
-                    # Evita sobrescrever arquivos existentes
-                    contador = 1
-                    nome_base, extensao = os.path.splitext(nome_final)
-                    while os.path.exists(nome_final):
-                        nome_final = f"{nome_base}_{contador}{extensao}"
-                        contador += 1
-                    
-                    # Move/Renomeia o arquivo
+                    # Move para a partição <AAAA-MM>/<UC>/ com o nome final (sem cópias _1, _2)
+                    inicio = time.time()
                     try:
-                        shutil.move(novo_arquivo, nome_final)
+                        nome_final = self.indexar_fatura(uc_cliente, mes_referencia, novo_arquivo)
+                        self.medir_etapa("renomear", inicio)
+                        self.ultimo_arquivo = nome_final
                         print(f"✅ Download realizado: {os.path.basename(nome_final)}")
                         print(f"📍 Salvo em: {nome_final}")
                         return f"Sucesso: {mes_referencia}"
                     except Exception as e:
+                        self.medir_etapa("renomear", inicio, False)
                         print(f"Erro ao renomear arquivo: {e}")
                         # Se não conseguir mover, verifica se o arquivo já está com nome correto
                         return f"Download realizado mas não renomeado: {novo_arquivo}"
                 else:
                     # Verifica se o arquivo já foi baixado anteriormente
-                    nome_potencial = os.path.join(
-                        self.download_folder, 
-                        f"Fatura_{uc_cliente}_{mes_referencia.replace('/', '-')}.pdf"
-                    )
+                    nome_potencial = self.fatura_local(uc_cliente, mes_referencia)
                     
-                    if os.path.exists(nome_potencial):
+                    if nome_potencial:
+                        self.ultimo_arquivo = nome_potencial
                         print(f"Arquivo já existe: {os.path.basename(nome_potencial)}")
                         return f"Sucesso: {mes_referencia} (já existia)"
                     else:
@@ -393,6 +816,322 @@ class EquatorialBot:
             print(f"Erro crítico durante o download: {e}")
             return f"Falha: {str(e)}"
 
+    def acionar_download_da_linha(self, linha_fatura):
+        """Abre o modal de uma linha da tabela de faturas e aciona o 'Ver Fatura'"""
+        # 5. Clica no valor da fatura para abrir o modal
+        try:
+            celula_valor = linha_fatura.find_element(By.CLASS_NAME, "bill-value")
+            print("Clicando no valor da fatura para abrir modal...")
+            
+            # Clique suave com JavaScript
+            self.driver.execute_script("arguments[0].click();", celula_valor)
+            print("✅ Clique no valor realizado")
+            
+            # Aguarda o modal carregar completamente
+            time.sleep(5)
+            
+        except NoSuchElementException:
+            print("Célula de valor não encontrada, tentando clicar na linha...")
+            linha_fatura.click()
+            time.sleep(5)
+        
+        # 6. Tenta clicar no botão "Ver Fatura" de várias formas
+        print("Tentando clicar em 'Ver Fatura'...")
+        
+        # Método 1: Clique direto no botão
+        clique_sucesso = self.clicar_ver_fatura_direto()
+        
+        if not clique_sucesso:
+            # Método 2: Procura alternativas
+            print("Tentando método alternativo...")
+            try:
+                # Procura por qualquer link de download (varredura feita no navegador)
+                achado = self.driver.execute_script(JS_LINK_ALTERNATIVO)
+                if achado:
+                    link = achado["elemento"]
+                    print(f"Encontrado link alternativo: {achado['texto']}")
+                    self.driver.execute_script("arguments[0].scrollIntoView(true);", link)
+                    time.sleep(1)
+                    link.click()
+                    clique_sucesso = True
+            except Exception as e:
+                print(f"Erro no método alternativo: {e}")
+        
+        return clique_sucesso
+
+    def listar_ucs_do_login(self):
+        """Lê as UCs disponíveis no seletor 'conta_contrato' da sessão atual"""
+        estado = self.aguardar_pagina("#conta_contrato", "Seletor de UC não encontrado",
+                                      timeout=self.timeout("troca_uc", 30))
+        if estado is not True:
+            raise RuntimeError(estado)
+        return [(o["texto"].replace('.', ''), o["valor"].replace('.', ''))
+                for o in self.ler_opcoes_uc()]
+
+    def baixar_faturas_da_sessao(self, ucs_cliente):
+        """Baixa a última fatura de cada UC do mesmo login, sem logout entre elas.
+
+        Retorna {uc: {"resultado": str, "arquivo": str|None}} na ordem do seletor.
+        """
+        if not self.driver:
+            return {uc: {"resultado": "Erro: Navegador não inicializado", "arquivo": None}
+                    for uc in ucs_cliente}
+
+        self.sair_da_clara()
+
+        ucs_alvo = [str(uc).strip().replace('.', '') for uc in ucs_cliente]
+
+        try:
+            opcoes = self.listar_ucs_do_login()
+        except Exception as e:
+            erro = f"Erro ao acessar seletor de UC: {str(e)}"
+            return {uc: {"resultado": erro, "arquivo": None} for uc in ucs_alvo}
+
+        # Mantém a ordem do seletor do portal (evita idas e voltas na troca de UC)
+        ordem = []
+        for texto, valor in opcoes:
+            for uc in ucs_alvo:
+                if uc not in ordem and (uc in texto or uc in valor):
+                    ordem.append(uc)
+
+        print(f"Sessão com {len(opcoes)} UC(s) no portal, {len(ordem)} da base: {', '.join(ordem)}")
+
+        resultados = {}
+        for uc in ordem:
+            resultado = self.baixar_ultima_fatura(uc, verificar_clara=False)
+            resultados[uc] = {"resultado": resultado, "arquivo": self.ultimo_arquivo}
+
+        for uc in ucs_alvo:
+            if uc not in resultados:
+                resultados[uc] = {"resultado": f"Erro: UC {uc} não encontrada nas opções", "arquivo": None}
+
+        return resultados
+
+    def iniciar_captura(self):
+        """Liga a escuta de rede do CDP (só no modo captura)"""
+        if not self.captura_cdp:
+            return None
+        try:
+            captura = CapturaPDF(self.driver)
+            captura.iniciar()
+            return captura
+        except Exception as e:
+            print(f"⚠️ Não foi possível ligar a captura CDP: {e}")
+            return None
+
+    def pdf_do_visualizador(self, captura):
+        """Plano B da captura: com o visualizador ativo o PDF não cai na pasta de downloads,
+        então busca de novo por HTTP (cookies da sessão) a URL vista na rede ou aberta nas abas"""
+        urls = list(captura.urls_pdf) if captura else []
+        try:
+            abas = self.driver.window_handles
+            for indice, aba in enumerate(abas):
+                self.driver.switch_to.window(aba)
+                url = self.driver.current_url
+                # Aba extra (aberta pelo clique) ou a própria aba já no PDF
+                if url.startswith("http") and url not in urls and (
+                        indice > 0 or url.lower().split("?")[0].endswith(".pdf")):
+                    urls.append(url)
+            self.driver.switch_to.window(abas[0])
+            cabecalhos = self.cabecalhos_sessao()
+        except Exception as e:
+            print(f"⚠️ Não foi possível ler as abas do visualizador: {e}")
+            return None
+
+        for url in urls:
+            try:
+                conteudo = self.ler_por_http(url, cabecalhos)
+                print(f"  ✅ PDF obtido de novo por HTTP: {url[:80]}")
+                return conteudo
+            except Exception as e:
+                print(f"  ⚠️ {url[:80]}: {e}")
+        return None
+
+    def concluir_captura(self, captura, uc_cliente, mes_referencia, timeout=90):
+        """Espera o PDF passar pela rede e grava direto no nome final (ou None).
+        Se a rede não entregar os bytes, tenta o plano B por HTTP antes de desistir."""
+        conteudo = captura.aguardar_pdf(timeout=timeout) if captura else None
+        if not conteudo:
+            print("⚠️ Captura pela rede falhou, buscando o PDF do visualizador por HTTP...")
+            conteudo = self.pdf_do_visualizador(captura)
+        self.fechar_abas_extras()
+        
+        if not conteudo:
+            return None
+        
+        destino = gravar_atomico(conteudo, self.caminho_fatura(uc_cliente, mes_referencia))
+        destino = self.indexar_fatura(uc_cliente, mes_referencia, destino)
+        self.ultimo_arquivo = destino
+        print(f"✅ Download realizado: {os.path.basename(destino)}")
+        print(f"📍 Salvo em: {destino}")
+        
+        if self.ao_capturar_pdf:
+            try:
+                self.ao_capturar_pdf(conteudo, destino)
+            except Exception as e:
+                print(f"⚠️ Erro no processamento em memória do PDF: {e}")
+        
+        return f"Sucesso: {mes_referencia}"
+
+    def fechar_abas_extras(self):
+        """Fecha abas abertas pelo visualizador de PDF e volta para a aba do portal"""
+        try:
+            abas = self.driver.window_handles
+            for aba in abas[1:]:
+                self.driver.switch_to.window(aba)
+                self.driver.close()
+            self.driver.switch_to.window(abas[0])
+        except Exception as e:
+            print(f"⚠️ Erro ao fechar abas extras: {e}")
+
+    def fatura_local(self, uc_cliente, mes_referencia):
+        """Caminho do PDF da UC/mês se já estiver guardado (inventário ou pacote do arquivo frio)"""
+        if not self.soltos_arrumados:
+            self.armazem.arrumar_soltos(remover_copias=True)
+            self.soltos_arrumados = True
+        return self.armazem.localizar(uc_cliente, mes_referencia)
+
+    def indexar_fatura(self, uc_cliente, mes_referencia, caminho):
+        """Guarda o PDF recém-salvo na partição (inventário + deduplicação) e devolve o caminho final"""
+        caminho = self.armazem.guardar(caminho, uc_cliente, mes_referencia)
+        return self.deduplicador.registrar(caminho, remover=True)
+
+    def caminho_fatura(self, uc_cliente, mes_referencia):
+        """Caminho final do PDF de uma UC/mês na partição do armazém (sem sufixos _1, _2)"""
+        return self.armazem.caminho_fatura(uc_cliente, mes_referencia, criar=True)
+
+    def cabecalhos_sessao(self):
+        """Cookies, user agent e referer da sessão do navegador para downloads HTTP.
+        Lidos na thread que controla o WebDriver (a sessão não aceita comandos concorrentes)."""
+        return {
+            "Cookie": "; ".join(f"{c['name']}={c['value']}" for c in self.driver.get_cookies()),
+            "User-Agent": self.driver.execute_script("return navigator.userAgent;"),
+            "Referer": self.driver.current_url,
+        }
+
+    def baixar_por_http(self, url, destino, cabecalhos):
+        """Baixa o PDF com os cabeçalhos da sessão (escrita atômica); não toca no WebDriver,
+        pode rodar em várias threads"""
+        return gravar_atomico(self.ler_por_http(url, cabecalhos), destino)
+
+    def ler_por_http(self, url, cabecalhos):
+        """Bytes do PDF buscado com os cabeçalhos da sessão (sem tocar no WebDriver)"""
+        requisicao = urllib.request.Request(url, headers=cabecalhos)
+
+        self.aguardar_vez("download")
+        try:
+            with urllib.request.urlopen(requisicao, timeout=60) as resposta:
+                conteudo = resposta.read()
+        except urllib.error.HTTPError as e:
+            # 429/5xx: o governador reduz o ritmo de todos os robôs. Outros 4xx (404, 403...)
+            # são problema do link, não sinal de carga: não entram no controle de concorrência
+            if self.governador and (e.code == 429 or e.code >= 500):
+                self.governador.registrar(str(e), 0)
+            raise
+
+        if not conteudo.startswith(b"%PDF"):
+            raise ValueError("resposta não é um PDF")
+
+        return conteudo
+
+    def fechar_modal(self):
+        """Fecha o modal de débitos (se aberto) para liberar a próxima linha"""
+        try:
+            self.driver.execute_script("""
+                var modal = document.querySelector('.lista-debitos-modal');
+                if (!modal) return;
+                var fechar = modal.querySelector('.close, [data-dismiss="modal"], .btn-close');
+                if (fechar) { fechar.click(); } else { modal.style.display = 'none'; }
+            """)
+            time.sleep(1)
+        except Exception as e:
+            print(f"⚠️ Não foi possível fechar o modal: {e}")
+
+    def baixar_fatura_da_linha(self, indice, uc_cliente, mes_referencia):
+        """Baixa a fatura de uma linha específica da tabela pelo clique no modal"""
+        arquivos_antes = set(glob.glob(os.path.join(self.download_folder, "*.pdf")))
+
+        linha_fatura = self.ler_tabela_faturas()[indice]["linha"]
+
+        self.aguardar_vez("download")
+        if not self.acionar_download_da_linha(linha_fatura):
+            self.fechar_modal()
+            return "Erro: Não foi possível acionar o download"
+
+        novo_arquivo = self.esperar_download_completar(arquivos_antes, timeout=self.timeout("download", 90))
+        self.fechar_modal()
+
+        if not novo_arquivo:
+            return "Erro: Download não finalizado ou arquivo não encontrado"
+
+        self.indexar_fatura(uc_cliente, mes_referencia, novo_arquivo)
+        return f"Sucesso: {mes_referencia}"
+
+    def baixar_historico(self, uc_cliente, max_paralelo=4):
+        """Backfill: baixa todas as faturas listadas para a UC que ainda não estão na pasta.
+
+        Links diretos são baixados em paralelo pela sessão HTTP do navegador;
+        o restante segue pelo clique no modal, uma linha por vez.
+        Retorna {mes_referencia: resultado}.
+        """
+        if not self.driver:
+            return {"-": "Erro: Navegador não inicializado"}
+
+        print(f"\n{'='*50}")
+        print(f"HISTÓRICO: UC {uc_cliente}")
+        print(f"{'='*50}")
+
+        self.sair_da_clara()
+
+        resultado_uc = self.verificar_e_trocar_uc(uc_cliente)
+        if resultado_uc != True:
+            return {"-": resultado_uc}
+
+        self.limpar_downloads_temporarios()
+
+        estado = self.aguardar_pagina(".bill-reference", "Tabela de faturas não encontrada",
+                                      timeout=self.timeout("tabela", 30))
+        if estado is not True:
+            return {"-": estado}
+
+        faturas = [f for f in self.ler_tabela_faturas() if f["referencia"]]
+        faltando = [f for f in faturas if not self.fatura_local(uc_cliente, f["referencia"])]
+
+        print(f"📚 {len(faturas)} fatura(s) listada(s), {len(faltando)} faltando na pasta")
+
+        resultados = {}
+        diretas = [f for f in faltando if f["href"]]
+
+        if diretas:
+            print(f"⚡ Baixando {len(diretas)} fatura(s) em paralelo via HTTP...")
+            cabecalhos = self.cabecalhos_sessao()
+            with ThreadPoolExecutor(max_workers=max_paralelo) as executor:
+                futuros = {
+                    executor.submit(self.baixar_por_http, f["href"],
+                                    self.caminho_fatura(uc_cliente, f["referencia"]), cabecalhos): f
+                    for f in diretas
+                }
+                for futuro in as_completed(futuros):
+                    f = futuros[futuro]
+                    try:
+                        self.indexar_fatura(uc_cliente, f["referencia"], futuro.result())
+                        resultados[f["referencia"]] = f"Sucesso: {f['referencia']}"
+                        print(f"  ✅ {f['referencia']}")
+                    except Exception as e:
+                        print(f"  ⚠️ {f['referencia']}: HTTP falhou ({e}), tentando pelo modal")
+
+        # Sem link direto (ou HTTP falhou): segue pelo modal, uma linha por vez
+        for f in faltando:
+            if f["referencia"] in resultados:
+                continue
+            try:
+                resultados[f["referencia"]] = self.baixar_fatura_da_linha(f["indice"], uc_cliente, f["referencia"])
+            except Exception as e:
+                resultados[f["referencia"]] = f"Erro: {str(e)}"
+            print(f"  {f['referencia']}: {resultados[f['referencia']]}")
+
+        return resultados
+
     def limpar_downloads_temporarios(self):
         """Limpa arquivos temporários de downloads anteriores"""
         try:
@@ -484,6 +1223,8 @@ class EquatorialBot:
     def fazer_logout(self):
         """Realiza logout do sistema - versão corrigida sem duplicação"""
         print("Realizando logout...")
+        self.aguardar_vez("navegacao")
+        inicio = time.time()
         
         try:
             # Tenta encontrar e clicar no botão de sair
@@ -511,12 +1252,15 @@ class EquatorialBot:
                 time.sleep(3)
             except Exception as e2:
                 print(f"⚠️ Erro no logout forçado: {e2}")
+        
+        self.medir_etapa("logout", inicio)
 
 # =============================================================================
 # 2. INTERFACE TKINTER - VERSÃO FINAL
 # =============================================================================
 class PainelControle:
-    def __init__(self, root, excel_path):
+    def __init__(self, root, excel_path, ciclo=None, captura_rede=False, navegacao_leve=False,
+                 pipeline=False, suprimir_clara=False):
         self.root = root
         self.root.title("🤖 Equatorial Cyborg Controller v1.0")
         self.root.geometry("500x650")
@@ -526,33 +1270,101 @@ class PainelControle:
         base_dir = os.getcwd()
         self.download_path = os.path.join(base_dir, "output", "faturas")
         self.excel_path = excel_path
+        self.ciclo = ciclo or ciclo_padrao()
+        
+        # Diário do ciclo: permite retomar de onde parou após uma queda
+        self.diario = DiarioDownloads(self.ciclo, self.download_path)
+        
+        # Falhas não travam o lote: vão para a fila e são retentadas no fim
+        self.fila = FilaRetentativas(self.ciclo, self.diario.caminho)
+        self.em_drenagem = False  # True depois da passada principal (reprocessando a fila)
+        self.quedas = {}  # Quedas do navegador por UC (evita loop de recuperação)
+        
+        # Tempo de cada etapa do robô (relatório no fim do lote e em src/telemetria.py)
+        self.telemetria = Telemetria()
         
         # Inicializa Dados e Robô
         self.dados = []
         self.index_atual = 0
-        self.bot = EquatorialBot(self.download_path)
+        perfil_modelo = os.path.join(base_dir, "perfil_bot")
+        perfil_modelo = perfil_modelo if os.path.isdir(perfil_modelo) else None
+        self.bot = EquatorialBot(self.download_path, perfil_modelo,
+                                 captura_cdp=captura_rede,
+                                 navegacao_leve=navegacao_leve,
+                                 suprimir_clara=suprimir_clara,
+                                 telemetria=self.telemetria)
+        
+        # Pipeline: um segundo navegador (perfil e cookies próprios) faz o logout do
+        # cliente anterior e prepara o login do próximo enquanto o atual baixa
+        self.bot_reserva = None
+        if pipeline:
+            self.bot_reserva = EquatorialBot(self.download_path, perfil_modelo,
+                                             captura_cdp=captura_rede,
+                                             navegacao_leve=navegacao_leve,
+                                             pasta_perfil=PERFIL_EXECUCAO + "_reserva",
+                                             suprimir_clara=suprimir_clara,
+                                             telemetria=self.telemetria)
         self.processo_em_andamento = False  # Flag para evitar múltiplos cliques
         
         # Variável para status
         self.status_var = tk.StringVar()
         self.status_var.set("Aguardando início...")
         
-        self.carregar_excel()
-        self.montar_layout()
+        # Modo sessão única: baixa todas as UCs do mesmo CNPJ/CPF com um só login
+        self.modo_sessao = tk.BooleanVar(value=False)
+        
+        # Login automático: preenche o portal com a base e segue sozinho para o próximo
+        self.login_automatico = tk.BooleanVar(value=False)
         
-        # Inicia navegador automaticamente
+        # Inicia o navegador já no começo: o Chrome sobe enquanto o Excel é lido
         self.iniciar_navegador()
         
+        self.carregar_excel()
+        self.retomar_do_diario()
+        self.montar_layout()
+        
         self.atualizar_tela()
 
     def carregar_excel(self):
         try:
-            df = pd.read_excel(self.excel_path, dtype=str)
-            self.dados = df.to_dict('records')
+            self.dados = carregar_base(self.excel_path).registros()
             print(f"✅ Excel carregado: {len(self.dados)} clientes encontrados")
         except Exception as e:
             messagebox.showerror("Erro", f"Não foi possível ler o Excel:\n{e}")
 
+    def uc_do_cliente(self, item):
+        return str(item.get('Conta Contrato', '')).replace('.0', '')
+
+    def login_do_cliente(self, item):
+        login = str(item.get('CNPJ/CPF', '')).replace('.0', '')
+        return login.replace('.', '').replace('-', '').replace('/', '').strip()
+
+    def ucs_do_mesmo_login(self):
+        """UCs pendentes no ciclo que compartilham o CNPJ/CPF do cliente atual"""
+        login = self.login_do_cliente(self.dados[self.index_atual])
+        ucs = []
+        for item in self.dados:
+            uc = self.uc_do_cliente(item)
+            if login and self.login_do_cliente(item) == login and uc not in ucs:
+                if uc == self.entry_uc.get().strip() or not self.diario.concluido(uc):
+                    ucs.append(uc)
+        return ucs
+
+    def retomar_do_diario(self):
+        """Posiciona no primeiro cliente ainda pendente no ciclo"""
+        if not self.dados:
+            return
+        
+        ucs = [self.uc_do_cliente(item) for item in self.dados]
+        pendente = self.diario.primeiro_pendente(ucs)
+        
+        if pendente is None:
+            print(f"✅ Diário: todos os {len(ucs)} clientes já concluídos no ciclo {self.ciclo}")
+            self.index_atual = len(ucs) - 1
+        elif pendente > 0:
+            print(f"🔁 Diário: retomando no cliente {pendente + 1} de {len(ucs)} (ciclo {self.ciclo})")
+            self.index_atual = pendente
+
     def montar_layout(self):
         style = ttk.Style()
         style.theme_use('clam')
@@ -563,7 +1375,7 @@ class PainelControle:
         
         tk.Label(frame_header, text="EQUATORIAL CYBORG CONTROLLER", 
                 font=("Segoe UI", 14, "bold"), fg="white", bg="#34495E").pack()
-        tk.Label(frame_header, text="Sistema Automático de Download de Faturas", 
+        tk.Label(frame_header, text=f"Sistema Automático de Download de Faturas • Ciclo {self.ciclo}", 
                 font=("Segoe UI", 9), fg="#BDC3C7", bg="#34495E").pack()
         
         # CONTADOR
@@ -650,6 +1462,28 @@ class PainelControle:
                                    command=self.pular_cliente)
         self.btn_pular.pack(fill="x", pady=(0, 5))
         
+        self.btn_historico = tk.Button(frame_botoes, 
+                                   text="📚 BAIXAR HISTÓRICO (todas as faturas da UC)", 
+                                   font=("Segoe UI", 9), 
+                                   bg="#8E44AD", fg="white",
+                                   command=self.executar_historico,
+                                   state="disabled")
+        self.btn_historico.pack(fill="x", pady=(0, 5))
+        
+        tk.Checkbutton(frame_botoes,
+                       text="Baixar todas as UCs do mesmo login (sessão única)",
+                       variable=self.modo_sessao,
+                       font=("Arial", 9), fg="#BDC3C7", bg="#2C3E50",
+                       selectcolor="#34495E", activebackground="#2C3E50",
+                       activeforeground="white").pack(anchor="w")
+        
+        tk.Checkbutton(frame_botoes,
+                       text="Login automático (lote sem operador)",
+                       variable=self.login_automatico,
+                       font=("Arial", 9), fg="#BDC3C7", bg="#2C3E50",
+                       selectcolor="#34495E", activebackground="#2C3E50",
+                       activeforeground="white").pack(anchor="w")
+        
         # NAVEGAÇÃO
         frame_nav = tk.Frame(frame_botoes, bg="#2C3E50")
         frame_nav.pack(fill="x", pady=5)
@@ -677,18 +1511,85 @@ class PainelControle:
         self.root.bind('<Escape>', lambda e: self.pular_cliente())
 
     def iniciar_navegador(self):
+        # Roda antes do layout existir: a tela só é atualizada via root.after,
+        # que executa dentro do mainloop, quando os botões já foram criados
+        def navegador_pronto():
+            self.status_var.set("✅ Navegador iniciado!\n1. Faça login manualmente\n2. Clique no botão verde quando estiver logado")
+            self.btn_baixar.config(state="normal", bg="#27AE60")
+            self.btn_pular.config(state="normal")
+            self.btn_historico.config(state="normal")
+        
         def iniciar():
+            inicio = time.time()
             try:
                 self.bot.abrir_navegador()
-                self.status_var.set("✅ Navegador iniciado!\n1. Faça login manualmente\n2. Clique no botão verde quando estiver logado")
-                self.btn_baixar.config(state="normal", bg="#27AE60")
-                self.btn_pular.config(state="normal")
+                print(f"⏱️  Navegador pronto em {time.time() - inicio:.1f}s")
+                self.root.after(0, navegador_pronto)
             except Exception as e:
-                self.status_var.set(f"❌ Erro ao iniciar navegador: {str(e)}")
+                erro = str(e)
+                self.root.after(0, lambda: self.status_var.set(f"❌ Erro ao iniciar navegador: {erro}"))
         
         thread = threading.Thread(target=iniciar)
         thread.daemon = True
         thread.start()
+        
+        if self.bot_reserva:
+            def iniciar_reserva():
+                try:
+                    self.bot_reserva.abrir_navegador()
+                    self.root.after(0, self.preparar_reserva)
+                except Exception as e:
+                    print(f"⚠️ Navegador reserva não abriu, seguindo sem pipeline: {e}")
+                    self.bot_reserva = None
+            
+            threading.Thread(target=iniciar_reserva, daemon=True).start()
+
+    def proximo_cliente_pendente(self):
+        ucs = [self.uc_do_cliente(item) for item in self.dados]
+        proximo = self.diario.primeiro_pendente(ucs, self.index_atual + 1)
+        return self.dados[proximo] if proximo is not None else None
+
+    def preparar_reserva(self):
+        """Pipeline: o navegador reserva sai do cliente anterior e já prepara o próximo"""
+        bot = self.bot_reserva
+        item = self.proximo_cliente_pendente()
+        login_automatico = self.login_automatico.get()
+        bot.pronto.clear()
+        
+        def preparar():
+            inicio = time.time()
+            try:
+                bot.fazer_logout()
+                bot.cliente_preparado = None
+                if login_automatico and item is not None:
+                    login = self.login_do_cliente(item)
+                    if bot.fazer_login(login, str(item.get('Acesso equatorial', '')).strip()) is True:
+                        bot.cliente_preparado = login
+                print(f"🔀 Navegador reserva pronto em {time.time() - inicio:.1f}s")
+            except Exception as e:
+                print(f"⚠️ Erro ao preparar o navegador reserva: {e}")
+            finally:
+                bot.pronto.set()
+        
+        threading.Thread(target=preparar, daemon=True).start()
+
+    def finalizar_cliente(self):
+        """Logout e avanço. No pipeline, o navegador reserva assume na hora e o
+        anterior faz o logout em segundo plano, já preparando o cliente seguinte."""
+        if self.bot_reserva and self.bot_reserva.pronto.is_set() and self.bot_reserva.sessao_viva():
+            self.bot, self.bot_reserva = self.bot_reserva, self.bot
+            print("🔀 Trocando para o navegador reserva")
+            self.avancar()
+            self.preparar_reserva()
+            return
+        
+        def fazer_logout_e_avancar():
+            time.sleep(2)
+            self.bot.fazer_logout()
+            time.sleep(2)
+            self.root.after(0, self.avancar)
+        
+        threading.Thread(target=fazer_logout_e_avancar, daemon=True).start()
 
     def atualizar_tela(self):
         if not self.dados or self.index_atual >= len(self.dados):
@@ -744,44 +1645,182 @@ class PainelControle:
             self.processo_em_andamento = False
             return
         
-        self.status_var.set(f"⏳ Baixando a última fatura para UC {uc}...")
+        ucs_sessao = self.ucs_do_mesmo_login() if self.modo_sessao.get() else [uc]
+        item = self.dados[self.index_atual]
+        login_automatico = self.login_automatico.get()
+        bot = self.bot
+        
+        if len(ucs_sessao) > 1:
+            self.status_var.set(f"⏳ Baixando {len(ucs_sessao)} UCs do mesmo login: {', '.join(ucs_sessao)}...")
+        else:
+            self.status_var.set(f"⏳ Baixando a última fatura para UC {uc}...")
         self.root.update()
         
+        def processar_cliente():
+            """Roda o cliente e devolve (sucesso, atualização da tela)"""
+            if login_automatico:
+                login = self.login_do_cliente(item)
+                if bot.cliente_preparado not in (None, login):
+                    # O pipeline logou outro cliente (operador navegou na lista)
+                    bot.fazer_logout()
+                bot.cliente_preparado = None
+                resultado_login = bot.fazer_login(login, str(item.get('Acesso equatorial', '')).strip())
+                if resultado_login is not True:
+                    return False, lambda: self.aguardar_login_manual(resultado_login)
+            
+            if len(ucs_sessao) > 1:
+                resultados = bot.baixar_faturas_da_sessao(ucs_sessao)
+                sucesso = all("Sucesso" in r["resultado"] for r in resultados.values())
+                return sucesso, lambda: self.processar_resultado_sessao(resultados)
+            
+            resultado = bot.baixar_ultima_fatura(uc)
+            return "Sucesso" in resultado, lambda: self.processar_resultado(resultado)
+        
         # Executa em thread separada para não travar a interface
         def executar_download():
-            resultado = self.bot.baixar_ultima_fatura(uc)
+            inicio = time.time()
+            erro = None
+            try:
+                sucesso, mostrar = processar_cliente()
+            except Exception as e:
+                erro = f"Erro: {str(e)}"
+                sucesso, mostrar = False, lambda: self.processar_resultado(erro)
+            
+            # Health-check: navegador morto não é erro do cliente, é queda a recuperar
+            if not bot.sessao_viva():
+                recuperado = self.recuperar_navegador(bot, uc, inicio, erro or "sessão do navegador perdida")
+                if not sucesso:
+                    self.root.after(0, lambda: self.retomar_apos_queda(uc, recuperado))
+                    return
             
             # Atualiza a interface na thread principal
-            self.root.after(0, lambda: self.processar_resultado(resultado))
+            self.root.after(0, mostrar)
         
         thread = threading.Thread(target=executar_download)
         thread.daemon = True
         thread.start()
 
+    def executar_historico(self):
+        """Backfill da UC atual: baixa todas as faturas que faltam na pasta"""
+        if self.processo_em_andamento or not self.bot.driver:
+            return
+        
+        uc = self.entry_uc.get().strip()
+        if not uc:
+            self.status_var.set("❌ UC não encontrada")
+            return
+        
+        self.processo_em_andamento = True
+        self.btn_baixar.config(state="disabled")
+        self.btn_pular.config(state="disabled")
+        self.btn_historico.config(state="disabled")
+        self.status_var.set(f"⏳ Baixando histórico da UC {uc}...")
+        self.root.update()
+        
+        def executar():
+            resultados = self.bot.baixar_historico(uc)
+            self.root.after(0, lambda: self.processar_historico(uc, resultados))
+        
+        threading.Thread(target=executar, daemon=True).start()
+
+    def processar_historico(self, uc, resultados):
+        sucessos = [ref for ref, r in resultados.items() if "Sucesso" in r]
+        falhas = [f"{ref}: {r}" for ref, r in resultados.items() if "Sucesso" not in r]
+        
+        if not resultados:
+            resumo = f"UC {uc}: histórico completo, nada faltando na pasta."
+        else:
+            resumo = f"UC {uc}: {len(sucessos)} fatura(s) baixada(s)."
+            if falhas:
+                resumo += f"\n\n{len(falhas)} com problema:\n" + "\n".join(falhas)
+        
+        self.status_var.set(f"📚 {resumo.splitlines()[0]}")
+        messagebox.showinfo("Histórico", resumo)
+        
+        self.btn_baixar.config(state="normal")
+        self.btn_pular.config(state="normal")
+        self.btn_historico.config(state="normal")
+        self.processo_em_andamento = False
+
+    def registrar_resultado(self, uc, resultado, arquivo=None):
+        registrar_resultado(self.diario, self.fila, uc, resultado, arquivo)
+
     def processar_resultado(self, resultado):
+        self.registrar_resultado(self.entry_uc.get().strip(), resultado, self.bot.ultimo_arquivo)
+        self.concluir_execucao(resultado)
+
+    def processar_resultado_sessao(self, resultados):
+        for uc, item in resultados.items():
+            self.registrar_resultado(uc, item["resultado"], item["arquivo"])
+        
+        falhas = [f"UC {uc}: {item['resultado']}" for uc, item in resultados.items()
+                  if "Sucesso" not in item["resultado"]]
+        
+        if not falhas:
+            self.concluir_execucao(f"Sucesso: {len(resultados)} faturas do mesmo login")
+        else:
+            self.concluir_execucao(f"{len(falhas)} de {len(resultados)} UC(s) com problema:\n" + "\n".join(falhas))
+
+    def recuperar_navegador(self, bot, uc, inicio, erro):
+        """Roda na thread do robô: reabre o navegador que caiu e registra a queda"""
+        print(f"💥 Navegador caiu durante a UC {uc}: reiniciando com o mesmo perfil...")
+        recuperado = True
+        try:
+            bot.reiniciar_navegador()
+        except Exception as e:
+            recuperado = False
+            erro = f"{erro} / reinício falhou: {e}"
+        
+        perdido = time.time() - inicio
+        self.diario.registrar_recuperacao(uc, erro, perdido, recuperado)
+        print(f"{'🔄' if recuperado else '❌'} Recuperação {'concluída' if recuperado else 'falhou'} "
+              f"({perdido:.0f}s perdidos)")
+        return recuperado
+
+    def retomar_apos_queda(self, uc, recuperado):
+        """Volta ao mesmo cliente depois de reabrir o navegador"""
+        self.processo_em_andamento = False
+        self.btn_pular.config(state="normal")
+        
+        if not recuperado:
+            self.status_var.set("❌ O navegador caiu e não foi possível reabri-lo.\nFeche o painel e rode o login.bat")
+            return
+        
+        self.quedas[uc] = self.quedas.get(uc, 0) + 1
+        if self.quedas[uc] > 2:
+            # Cliente derruba o navegador sempre: vai para a fila e o lote segue
+            self.processar_resultado(f"Erro [NAVEGADOR_CAIU]: navegador caiu {self.quedas[uc]}x nesta UC")
+            return
+        
+        self.btn_baixar.config(state="normal", bg="#E67E22", 
+                              text="🤖 TENTAR NOVAMENTE")
+        if self.login_automatico.get():
+            self.status_var.set(f"🔄 Navegador reiniciado após queda. Retomando UC {uc}...")
+            self.root.after(500, self.executar_robo)
+        else:
+            self.status_var.set(f"🔄 Navegador reiniciado após queda.\nFaça login de novo e clique no botão para retomar a UC {uc}")
+
+    def aguardar_login_manual(self, motivo):
+        """Login automático não passou: devolve o controle ao operador sem travar a tela"""
+        print(f"🙋 {motivo}")
+        self.status_var.set(f"🙋 {motivo}\nFaça o login manualmente e clique no botão verde")
+        self.btn_baixar.config(state="normal", bg="#27AE60", 
+                              text="🤖 BAIXAR ÚLTIMA FATURA")
+        self.btn_pular.config(state="normal")
+        self.processo_em_andamento = False
+
+    def concluir_execucao(self, resultado):
         if "Sucesso" in resultado:
             self.status_var.set(f"✅ {resultado} baixada com sucesso!\nRealizando logout...")
             self.root.update()
             
             # Faz logout e avança para próximo cliente
-            def finalizar():
-                time.sleep(2)
-                self.bot.fazer_logout()
-                time.sleep(2)
-                self.root.after(0, self.avancar)
-            
-            threading.Thread(target=finalizar, daemon=True).start()
+            self.finalizar_cliente()
         else:
-            self.status_var.set(f"❌ Falha no download: {resultado}")
-            messagebox.showwarning("Atenção", 
-                                 f"O robô encontrou um problema:\n\n{resultado}\n\n"
-                                 "1. Verifique se está logado\n"
-                                 "2. Verifique se existem faturas disponíveis\n"
-                                 "3. Tente fazer manualmente e clique em 'PULAR'")
-            self.btn_baixar.config(state="normal", bg="#E67E22", 
-                                  text="🤖 TENTAR NOVAMENTE")
-            self.btn_pular.config(state="normal")
-            self.processo_em_andamento = False
+            # Sem janela bloqueante: a falha já está na fila e o lote segue
+            self.status_var.set(f"❌ Falha no download: {resultado}\n🔁 Enviado para a fila de retentativas")
+            self.root.update()
+            self.finalizar_cliente()
 
     def pular_cliente(self):
         if self.processo_em_andamento:
@@ -790,28 +1829,104 @@ class PainelControle:
         self.status_var.set("⏭️ Pulando cliente atual...")
         self.root.update()
         
-        def fazer_logout_e_avancar():
-            self.bot.fazer_logout()
-            time.sleep(2)
-            self.root.after(0, self.avancar)
+        self.diario.registrar(self.entry_uc.get().strip(), STATUS_PULADO, mensagem="Pulado pelo operador")
+        self.fila.remover(self.entry_uc.get().strip())
         
-        threading.Thread(target=fazer_logout_e_avancar, daemon=True).start()
+        self.finalizar_cliente()
 
     def avancar(self):
-        if self.index_atual < len(self.dados) - 1:
-            self.index_atual += 1
+        if self.em_drenagem:
+            self.drenar_fila()
+            return
+        
+        # Pula direto os clientes que já têm a fatura do ciclo (diário ou disco)
+        ucs = [self.uc_do_cliente(item) for item in self.dados]
+        proximo = self.diario.primeiro_pendente(ucs, self.index_atual + 1)
+        
+        if proximo is not None:
+            pulados = proximo - self.index_atual - 1
+            if pulados:
+                print(f"⏩ {pulados} cliente(s) já concluído(s) no ciclo {self.ciclo} foram pulados")
+            self.index_atual = proximo
             self.atualizar_tela()
             self.btn_baixar.config(state="normal", bg="#27AE60", 
                                   text="🤖 BAIXAR ÚLTIMA FATURA")
             self.btn_pular.config(state="normal")
             self.processo_em_andamento = False
+            
+            # Lote sem operador: o próximo cliente já começa sozinho
+            if self.login_automatico.get():
+                self.root.after(500, self.executar_robo)
         else:
+            # Fim da passada principal: agora reprocessa o que falhou
+            self.drenar_fila()
+
+    def drenar_fila(self):
+        """Reprocessa a fila de retentativas respeitando o backoff de cada UC"""
+        self.em_drenagem = True
+        uc = self.fila.proxima()
+        
+        if uc is None:
+            espera = self.fila.tempo_ate_proxima()
+            if espera is None:
+                self.encerrar_lote()
+                return
+            self.status_var.set(f"⏳ Fila de retentativas: próxima tentativa em {espera:.0f}s")
+            self.btn_baixar.config(state="disabled", bg="#7F8C8D")
+            self.root.after(int(espera * 1000) + 500, self.drenar_fila)
+            return
+        
+        indice = next((i for i, item in enumerate(self.dados) if self.uc_do_cliente(item) == uc), None)
+        if indice is None:
+            # UC saiu da planilha desde a falha
+            self.fila.remover(uc)
+            self.drenar_fila()
+            return
+        
+        self.index_atual = indice
+        self.atualizar_tela()
+        self.status_var.set(f"🔁 Retentativa da UC {uc} (falhas até agora: {self.fila.tentativas(uc)})\n"
+                            "Faça o login e clique no botão verde")
+        self.btn_baixar.config(state="normal", bg="#E67E22", 
+                              text="🤖 TENTAR NOVAMENTE")
+        self.btn_pular.config(state="normal")
+        self.processo_em_andamento = False
+        
+        if self.login_automatico.get():
+            self.root.after(500, self.executar_robo)
+
+    def encerrar_lote(self):
+        """Resumo final: só os clientes que ainda precisam de um humano"""
+        self.em_drenagem = False
+        pendentes = self.fila.precisam_de_humano()
+        
+        quedas, perdidos = self.diario.resumo_recuperacoes()
+        if quedas:
+            print(f"💥 {quedas} queda(s) do navegador recuperada(s) no ciclo ({perdidos:.0f}s perdidos)")
+        
+        self.telemetria.imprimir_relatorio()
+        
+        self.status_var.set("✅ Processo finalizado!")
+        self.btn_baixar.config(state="disabled", bg="#7F8C8D")
+        self.btn_pular.config(state="disabled")
+        
+        if not pendentes:
             messagebox.showinfo("Fim da Lista", 
                               "✅ Todos os clientes foram processados!\n\n"
                               f"Faturas salvas em: {self.download_path}")
-            self.status_var.set("✅ Processo finalizado!")
-            self.btn_baixar.config(state="disabled", bg="#7F8C8D")
-            self.btn_pular.config(state="disabled")
+            return
+        
+        linhas = [f"UC {uc} ({categoria}, {tentativas}x): {mensagem}"
+                  for uc, categoria, mensagem, tentativas in pendentes]
+        print("\n🙋 CLIENTES QUE PRECISAM DE ATENÇÃO MANUAL:")
+        for linha in linhas:
+            print(f"   - {linha}")
+        
+        messagebox.showwarning("Fim da Lista", 
+                             f"Lote concluído. {len(pendentes)} cliente(s) precisam de atenção manual:\n\n"
+                             + "\n".join(linhas[:15])
+                             + ("\n..." if len(linhas) > 15 else "")
+                             + f"\n\nFaturas salvas em: {self.download_path}")
 
     def voltar(self):
         if self.processo_em_andamento:
@@ -826,6 +1941,17 @@ class PainelControle:
 # =============================================================================
 if __name__ == "__main__":
     base_dir = os.getcwd()
+    # Ciclo opcional na linha de comando (ex: python src/app_hibrido.py 02/2026)
+    argumentos = [a for a in sys.argv[1:] if not a.startswith("--")]
+    ciclo = argumentos[0] if argumentos else None
+    # --captura-rede: grava o PDF direto do tráfego do navegador (CDP)
+    captura_rede = "--captura-rede" in sys.argv
+    # --leve: bloqueia imagens, fontes e rastreadores (config/navegacao_leve.json)
+    navegacao_leve = "--leve" in sys.argv
+    # --pipeline: segundo navegador prepara o próximo cliente durante o download
+    pipeline = "--pipeline" in sys.argv
+    # --suprimir-clara: script injetado neutraliza a Clara (sem a sonda de 5s por cliente)
+    suprimir_clara = "--suprimir-clara" in sys.argv
     caminho_excel = os.path.join(base_dir, "output", "Cad_RateioConsumo_Final.xlsx") 
     
     if not os.path.exists(caminho_excel):
@@ -836,7 +1962,8 @@ if __name__ == "__main__":
         print(f"✅ Excel encontrado: {caminho_excel}")
         
         root = tk.Tk()
-        app = PainelControle(root, caminho_excel)
+        app = PainelControle(root, caminho_excel, ciclo, captura_rede, navegacao_leve, pipeline,
+                             suprimir_clara)
         
         # Centraliza a janela
         root.update_idletasks()
@@ -0,0 +1,296 @@
+import os
+import sys
+import sqlite3
+import threading
+from datetime import datetime
+
+from diario_downloads import ARQUIVO_DIARIO, PADRAO_ARQUIVO_FATURA, PASTA_FATURAS, caminho_particao, normalizar_uc
+from deduplicacao import DeduplicadorFaturas, hash_arquivo
+
+# =============================================================================
+# ARMAZÉM DE FATURAS PARTICIONADO (COMPETÊNCIA/UC) + INVENTÁRIO
+# =============================================================================
+# Com anos de faturas numa pasta só, toda listagem virava uma varredura de
+# dezenas de milhares de arquivos. Agora cada PDF fica em
+#
+#     output/faturas/<AAAA-MM>/<UC>/Fatura_<UC>_<MM-AAAA>.pdf
+#
+# e um inventário no banco de controle (caminho, tamanho, hash, UC, mês) é
+# atualizado a cada gravação. Relatórios, organizador e estatísticas consultam
+# o inventário em vez de percorrer as pastas. A raiz fica só com o que está
+# chegando (downloads do Chrome em andamento e arquivos antigos ainda soltos,
+# que são movidos para a partição na próxima listagem).
+#
+#   python src/armazem_faturas.py              -> arruma os soltos e mostra o resumo
+#   python src/armazem_faturas.py reindexar    -> refaz o inventário lendo as partições
+
+
+class ArmazemFaturas:
+    def __init__(self, raiz=PASTA_FATURAS, caminho=ARQUIVO_DIARIO):
+        self.raiz = os.path.abspath(raiz)
+        self.caminho = caminho
+        self.lock = threading.Lock()
+
+        os.makedirs(self.raiz, exist_ok=True)
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS inventario_faturas (
+                    raiz TEXT NOT NULL,
+                    uc TEXT NOT NULL,
+                    mes_referencia TEXT NOT NULL,
+                    arquivo TEXT NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    hash TEXT NOT NULL,
+                    registrado_em TEXT NOT NULL,
+                    PRIMARY KEY (raiz, mes_referencia, uc)
+                )
+            """)
+
+    def caminho_fatura(self, uc, mes_referencia, criar=False):
+        """Caminho final do PDF na partição (cria a pasta se 'criar')"""
+        destino = caminho_particao(self.raiz, normalizar_uc(uc), mes_referencia)
+        if criar:
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+        return destino
+
+    def indexar(self, destino, uc, mes_referencia, digest=None):
+        """Grava (ou atualiza) a fatura no inventário"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO inventario_faturas
+                    (raiz, uc, mes_referencia, arquivo, tamanho, hash, registrado_em)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (self.raiz, normalizar_uc(uc), mes_referencia, os.path.relpath(destino, self.raiz),
+                 os.path.getsize(destino), digest or hash_arquivo(destino),
+                 datetime.now().isoformat(timespec="seconds")),
+            )
+
+    def guardar(self, origem, uc, mes_referencia):
+        """Move o PDF para a partição da UC/mês (a versão nova substitui a antiga) e indexa.
+        Retorna o caminho final."""
+        destino = self.caminho_fatura(uc, mes_referencia, criar=True)
+        if os.path.abspath(origem) != destino:
+            os.replace(origem, destino)
+        self.indexar(destino, uc, mes_referencia)
+        return destino
+
+    def localizar(self, uc, mes_referencia, arquivadas=True):
+        """Caminho da fatura da UC/mês pelo inventário (None se não há ou sumiu do disco).
+        Com 'arquivadas', fatura de mês já compactado devolve o caminho do pacote zip."""
+        with self.lock:
+            linha = self.conn.execute(
+                "SELECT arquivo FROM inventario_faturas WHERE raiz = ? AND mes_referencia = ? AND uc = ?",
+                (self.raiz, mes_referencia, normalizar_uc(uc)),
+            ).fetchone()
+
+        if linha:
+            caminho = os.path.join(self.raiz, linha[0])
+            if os.path.exists(caminho):
+                return caminho
+            # Arquivo apagado por fora: o inventário se corrige sozinho
+            self.remover(uc, mes_referencia)
+
+        # Mês arquivado: os soltos e o inventário saíram, a fatura está no pacote
+        if arquivadas and self.raiz == os.path.abspath(PASTA_FATURAS):
+            from arquivo_frio import localizar_arquivada
+            return localizar_arquivada(uc, mes_referencia)
+        return None
+
+    def remover(self, uc, mes_referencia):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM inventario_faturas WHERE raiz = ? AND mes_referencia = ? AND uc = ?",
+                (self.raiz, mes_referencia, normalizar_uc(uc)),
+            )
+
+    def listar(self, mes_referencia=None, uc=None):
+        """Caminhos das faturas do inventário, filtrando por mês (um ou uma lista) e/ou UC"""
+        filtros, parametros = ["raiz = ?"], [self.raiz]
+        if mes_referencia:
+            meses = [mes_referencia] if isinstance(mes_referencia, str) else list(mes_referencia)
+            filtros.append(f"mes_referencia IN ({', '.join('?' * len(meses))})")
+            parametros.extend(meses)
+        if uc:
+            filtros.append("uc = ?")
+            parametros.append(normalizar_uc(uc))
+
+        with self.lock:
+            linhas = self.conn.execute(
+                f"SELECT arquivo FROM inventario_faturas WHERE {' AND '.join(filtros)} "
+                # 'MM/AAAA' não ordena como texto: ano e mês em separado dão a ordem cronológica
+                "ORDER BY substr(mes_referencia, 4, 4), substr(mes_referencia, 1, 2), uc",
+                parametros,
+            ).fetchall()
+
+        caminhos = []
+        for (arquivo,) in linhas:
+            caminho = os.path.join(self.raiz, arquivo)
+            if os.path.exists(caminho):
+                caminhos.append(caminho)
+            else:
+                # Arquivo apagado por fora: o inventário se corrige sozinho
+                achado = PADRAO_ARQUIVO_FATURA.match(os.path.basename(arquivo))
+                if achado:
+                    uc_arquivo, mes, ano = achado.groups()
+                    self.remover(uc_arquivo, f"{mes}/{ano}")
+        return caminhos
+
+    def inventario(self, mes_referencia):
+        """[(uc, caminho, tamanho, hash)] das faturas do mês"""
+        with self.lock:
+            linhas = self.conn.execute(
+                "SELECT uc, arquivo, tamanho, hash FROM inventario_faturas "
+                "WHERE raiz = ? AND mes_referencia = ? ORDER BY uc",
+                (self.raiz, mes_referencia),
+            ).fetchall()
+        return [(uc, os.path.join(self.raiz, arquivo), tamanho, digest) for uc, arquivo, tamanho, digest in linhas]
+
+    def ucs(self, mes_referencia=None):
+        """UCs com fatura no inventário (sem abrir nenhum PDF)"""
+        filtro, parametros = "raiz = ?", [self.raiz]
+        if mes_referencia:
+            filtro += " AND mes_referencia = ?"
+            parametros.append(mes_referencia)
+        with self.lock:
+            return {linha[0] for linha in self.conn.execute(
+                f"SELECT DISTINCT uc FROM inventario_faturas WHERE {filtro}", parametros)}
+
+    def estatisticas(self):
+        """{mes_referencia: (quantidade, bytes)} direto do inventário"""
+        with self.lock:
+            linhas = self.conn.execute(
+                """
+                SELECT mes_referencia, COUNT(*), SUM(tamanho) FROM inventario_faturas
+                WHERE raiz = ? GROUP BY mes_referencia
+                """,
+                (self.raiz,),
+            ).fetchall()
+        return {mes: (quantidade, tamanho) for mes, quantidade, tamanho in linhas}
+
+    def arrumar_soltos(self, identificar=None, remover_copias=False):
+        """Move os PDFs soltos na raiz para as partições.
+        UC/mês vêm do nome Fatura_<UC>_<MM-AAAA>.pdf ou de identificar(caminho) -> (uc, 'MM/AAAA').
+        Cópias idênticas a uma fatura já guardada viram apelido; só são apagadas com
+        'remover_copias' (robô e linha de comando), nunca numa simples listagem."""
+        soltos = sorted(entrada.path for entrada in os.scandir(self.raiz)
+                        if entrada.is_file() and entrada.name.lower().endswith(".pdf"))
+        if not soltos:
+            return 0
+
+        deduplicador = DeduplicadorFaturas(self.raiz, self.caminho)
+        movidos = 0
+        try:
+            for origem in soltos:
+                achado = PADRAO_ARQUIVO_FATURA.match(os.path.basename(origem))
+                if achado:
+                    uc, mes, ano = achado.groups()
+                    mes_referencia = f"{mes}/{ano}"
+                elif identificar:
+                    uc, mes_referencia = identificar(origem)
+                else:
+                    continue
+
+                if not uc or not mes_referencia:
+                    print(f"⚠️ Sem UC/mês identificável, ficou na raiz: {os.path.basename(origem)}")
+                    continue
+
+                destino = self.caminho_fatura(uc, mes_referencia)
+                if os.path.exists(destino) and hash_arquivo(destino) != hash_arquivo(origem):
+                    print(f"⚠️ {os.path.basename(origem)} difere de {os.path.relpath(destino, self.raiz)}; "
+                          "ficou na raiz para conferência")
+                    continue
+
+                if os.path.exists(destino):
+                    deduplicador.registrar(destino)
+                    deduplicador.registrar(origem, remover_copias)  # Idêntica: vira apelido da guardada
+                    self.indexar(destino, uc, mes_referencia)
+                    if not remover_copias:
+                        continue  # Cópia fica na raiz; a listagem usa só a guardada
+                else:
+                    deduplicador.registrar(self.guardar(origem, uc, mes_referencia))
+                movidos += 1
+        finally:
+            deduplicador.fechar()
+
+        print(f"🗄️  {movidos} fatura(s) solta(s) arrumada(s) nas partições de {self.raiz}")
+        return movidos
+
+    def reindexar(self):
+        """Refaz o inventário percorrendo as partições (após cópias ou exclusões manuais)"""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM inventario_faturas WHERE raiz = ?", (self.raiz,))
+
+        total = 0
+        for pasta, _, arquivos in os.walk(self.raiz):
+            if pasta == self.raiz:
+                continue
+            for nome in arquivos:
+                achado = PADRAO_ARQUIVO_FATURA.match(nome)
+                if achado:
+                    uc, mes, ano = achado.groups()
+                    self.indexar(os.path.join(pasta, nome), uc, f"{mes}/{ano}")
+                    total += 1
+        print(f"🗂️  Inventário refeito: {total} fatura(s)")
+        return total
+
+    def fechar(self):
+        with self.lock:
+            self.conn.close()
+
+
+def identificar_pelo_conteudo(caminho):
+    """(uc, 'MM/AAAA') extraídos do próprio PDF, para arquivos fora do padrão de nome"""
+    from main import extrair_dados_fatura
+    dados = extrair_dados_fatura(caminho)
+    return dados.get('uc'), dados.get('ref_month')
+
+
+def listar_pasta(pasta, mes_referencia=None):
+    """PDFs de uma pasta qualquer (raiz e subpastas), só leitura: nada é movido nem indexado.
+    Com mês (um ou uma lista), filtra pelo nome Fatura_<UC>_<MM-AAAA>.pdf; fora do padrão entra sempre."""
+    meses = None
+    if mes_referencia:
+        meses = {mes_referencia} if isinstance(mes_referencia, str) else set(mes_referencia)
+
+    caminhos = []
+    for diretorio, _, arquivos in os.walk(pasta):
+        for nome in arquivos:
+            if not nome.lower().endswith(".pdf"):
+                continue
+            achado = PADRAO_ARQUIVO_FATURA.match(nome)
+            if meses and achado and f"{achado.group(2)}/{achado.group(3)}" not in meses:
+                continue
+            caminhos.append(os.path.join(diretorio, nome))
+    return sorted(caminhos)
+
+
+def listar_faturas(raiz=PASTA_FATURAS, mes_referencia=None):
+    """Faturas da pasta, filtrando por mês (um ou uma lista).
+    Só a pasta do robô (output/faturas) tem os soltos arrumados e usa o inventário;
+    qualquer outra pasta é listada sem ser alterada."""
+    if os.path.abspath(raiz) != os.path.abspath(PASTA_FATURAS):
+        return listar_pasta(raiz, mes_referencia)
+
+    armazem = ArmazemFaturas(raiz)
+    try:
+        armazem.arrumar_soltos(identificar_pelo_conteudo)
+        return armazem.listar(mes_referencia)
+    finally:
+        armazem.fechar()
+
+
+if __name__ == "__main__":
+    armazem = ArmazemFaturas()
+    if "reindexar" in sys.argv:
+        armazem.reindexar()
+    else:
+        armazem.arrumar_soltos(identificar_pelo_conteudo, remover_copias=True)
+
+    for mes, (quantidade, tamanho) in sorted(armazem.estatisticas().items(),
+                                             key=lambda item: item[0][3:] + item[0][:2]):
+        print(f"   {mes}: {quantidade} fatura(s), {tamanho / 1024 / 1024:.1f} MB")
+    armazem.fechar()
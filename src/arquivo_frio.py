@@ -0,0 +1,250 @@
+import os
+import sys
+import json
+import hashlib
+import zipfile
+from datetime import datetime
+
+from armazem_faturas import ArmazemFaturas
+from diario_downloads import PASTA_FATURAS, ciclo_padrao, nome_arquivo_fatura, normalizar_uc
+from fonte_pdf import FontePDF, fechar_mapa, mapear_arquivo
+
+# =============================================================================
+# ARQUIVO FRIO: MESES FECHADOS COMPACTADOS EM PACOTES INDEXADOS
+# =============================================================================
+# Mês fechado quase não é mais lido, mas seus PDFs e textos de debug continuam
+# pesando em toda varredura e backup. O arquivamento junta as faturas do mês
+# (e os debug_*.txt delas) em output/arquivo/faturas_<AAAA-MM>.zip, com um
+# indice.json embutido (UC -> membro, tamanho, hash), confere o pacote
+# membro a membro e só então apaga os arquivos soltos.
+#
+# A leitura continua possível sem descompactar nada: o zip tem diretório
+# central, então abrir o pacote e ler um membro é acesso direto ao trecho dele.
+#
+#   python src/arquivo_frio.py arquivar 01/2026
+#   python src/arquivo_frio.py listar 01/2026
+#   python src/arquivo_frio.py extrair 01/2026 3001234567
+
+PASTA_ARQUIVO = os.path.join("output", "arquivo")
+PASTA_DEBUG = os.path.join("output", "debug")
+NOME_INDICE = "indice.json"
+
+
+def chave_mes(mes_referencia):
+    """'MM/AAAA' -> 'AAAA-MM' (ordena cronologicamente)"""
+    mes, _, ano = mes_referencia.partition("/")
+    return f"{ano}-{mes}"
+
+
+def caminho_pacote(mes_referencia, pasta=PASTA_ARQUIVO):
+    return os.path.join(pasta, f"faturas_{chave_mes(mes_referencia)}.zip")
+
+
+def meses_vizinhos(mes_referencia, raio=1):
+    """Meses de referência que podem cair na competência pedida (regra do dia 12 desloca 1 mês)"""
+    mes, _, ano = mes_referencia.partition("/")
+    indice = int(ano) * 12 + int(mes) - 1
+    return [f"{(i % 12) + 1:02d}/{i // 12}" for i in range(indice - raio, indice + raio + 1)]
+
+
+class PacoteFaturas:
+    """Leitura de um pacote arquivado: índice embutido + leitura direta de membros"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.zip = zipfile.ZipFile(caminho)
+        self.mapa = mapear_arquivo(caminho)  # Um mapa por pacote: os membros são fatias dele
+        self.indice = json.loads(self.zip.read(NOME_INDICE))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+    def ucs(self):
+        return sorted(self.indice["faturas"])
+
+    def ler(self, uc):
+        """Bytes da fatura da UC (None se a UC não está no pacote)"""
+        item = self.indice["faturas"].get(normalizar_uc(uc))
+        return self.zip.read(item["membro"]) if item else None
+
+    def fonte(self, uc):
+        """FontePDF da fatura da UC (lida direto do zip, sem extrair)"""
+        item = self.indice["faturas"].get(normalizar_uc(uc))
+        return FontePDF.de_membro(self.zip, item["membro"], self.mapa) if item else None
+
+    def faturas(self):
+        """FontePDF de cada fatura, um membro por vez"""
+        for uc in self.ucs():
+            yield FontePDF.de_membro(self.zip, self.indice["faturas"][uc]["membro"], self.mapa)
+
+    def fechar(self):
+        fechar_mapa(self.mapa)
+        self.zip.close()
+
+
+_indices = {}  # caminho absoluto do pacote -> (mtime, UCs do índice)
+
+
+def ucs_arquivadas(mes_referencia, pasta=PASTA_ARQUIVO):
+    """UCs guardadas no pacote do mês (o índice é relido só quando o pacote muda)"""
+    caminho = os.path.abspath(caminho_pacote(mes_referencia, pasta))
+    try:
+        mtime = os.stat(caminho).st_mtime_ns
+    except OSError:
+        return frozenset()
+
+    em_memoria = _indices.get(caminho)
+    if em_memoria and em_memoria[0] == mtime:
+        return em_memoria[1]
+    with PacoteFaturas(caminho) as pacote:
+        ucs = frozenset(pacote.indice["faturas"])
+    _indices[caminho] = (mtime, ucs)
+    return ucs
+
+
+def localizar_arquivada(uc, mes_referencia, pasta=PASTA_ARQUIVO):
+    """Caminho do pacote que guarda a fatura da UC/mês (None se ela não foi arquivada)"""
+    if normalizar_uc(uc) in ucs_arquivadas(mes_referencia, pasta):
+        return caminho_pacote(mes_referencia, pasta)
+    return None
+
+
+def abrir_pacotes(meses, pasta=PASTA_ARQUIVO):
+    """Pacotes existentes para os meses informados"""
+    return [PacoteFaturas(caminho_pacote(mes, pasta)) for mes in meses
+            if os.path.exists(caminho_pacote(mes, pasta))]
+
+
+def ler_fatura(uc, mes_referencia, raiz=PASTA_FATURAS, pasta=PASTA_ARQUIVO):
+    """Bytes da fatura da UC/mês, venha do armazém (mês aberto) ou do pacote (mês arquivado)"""
+    armazem = ArmazemFaturas(raiz)
+    try:
+        caminho = armazem.localizar(uc, mes_referencia, arquivadas=False)
+    finally:
+        armazem.fechar()
+
+    if caminho:
+        with open(caminho, "rb") as arquivo:
+            return arquivo.read()
+
+    if os.path.exists(caminho_pacote(mes_referencia, pasta)):
+        with PacoteFaturas(caminho_pacote(mes_referencia, pasta)) as pacote:
+            return pacote.ler(uc)
+    return None
+
+
+def verificar_pacote(caminho, esperados):
+    """Confere CRC de todos os membros e o SHA-256 de cada fatura contra {membro: hash}"""
+    with zipfile.ZipFile(caminho) as pacote:
+        if pacote.testzip() is not None:
+            return False
+        for membro, digest in esperados.items():
+            if hashlib.sha256(pacote.read(membro)).hexdigest() != digest:
+                return False
+    return True
+
+
+def arquivar_mes(mes_referencia, raiz=PASTA_FATURAS, pasta=PASTA_ARQUIVO, pasta_debug=PASTA_DEBUG):
+    """Compacta as faturas do mês (e seus textos de debug) num pacote e apaga os soltos.
+    Retorna o caminho do pacote (ou None se não havia nada a arquivar)."""
+    if chave_mes(mes_referencia) >= chave_mes(ciclo_padrao()):
+        print(f"❌ {mes_referencia} ainda não está fechado (ciclo atual: {ciclo_padrao()})")
+        return None
+
+    armazem = ArmazemFaturas(raiz)
+    try:
+        itens = armazem.inventario(mes_referencia)
+        if not itens:
+            print(f"📭 Nenhuma fatura solta de {mes_referencia} para arquivar")
+            return None
+
+        destino = caminho_pacote(mes_referencia, pasta)
+        os.makedirs(pasta, exist_ok=True)
+        temporario = destino + ".part"
+
+        faturas, esperados, debug = {}, {}, []
+        anterior = PacoteFaturas(destino) if os.path.exists(destino) else None
+        try:
+            with zipfile.ZipFile(temporario, "w") as pacote:
+                # PDF já é comprimido: guardado sem compressão; textos e índice comprimidos
+                for uc, caminho, tamanho, digest in itens:
+                    membro = f"{uc}/{os.path.basename(caminho)}"
+                    pacote.write(caminho, membro, compress_type=zipfile.ZIP_STORED)
+                    faturas[uc] = {"membro": membro, "tamanho": tamanho, "hash": digest}
+                    esperados[membro] = digest
+
+                    texto = os.path.join(pasta_debug, f"debug_{os.path.basename(caminho)}.txt")
+                    if os.path.exists(texto):
+                        pacote.write(texto, f"debug/{os.path.basename(texto)}", compress_type=zipfile.ZIP_DEFLATED)
+                        debug.append(texto)
+
+                # Arquivamento repetido (faturas que chegaram atrasadas): mantém o que já estava no pacote
+                if anterior:
+                    for uc, item in anterior.indice["faturas"].items():
+                        if uc not in faturas:
+                            pacote.writestr(anterior.zip.getinfo(item["membro"]), anterior.zip.read(item["membro"]))
+                            faturas[uc] = item
+                            esperados[item["membro"]] = item["hash"]
+                    nomes = set(pacote.namelist())
+                    for info in anterior.zip.infolist():
+                        if info.filename.startswith("debug/") and info.filename not in nomes:
+                            pacote.writestr(info, anterior.zip.read(info))
+
+                pacote.writestr(NOME_INDICE, json.dumps({
+                    "mes_referencia": mes_referencia,
+                    "arquivado_em": datetime.now().isoformat(timespec="seconds"),
+                    "faturas": faturas,
+                }, indent=1), compress_type=zipfile.ZIP_DEFLATED)
+        finally:
+            if anterior:
+                anterior.fechar()
+
+        if not verificar_pacote(temporario, esperados):
+            os.remove(temporario)
+            print(f"❌ Pacote de {mes_referencia} não conferiu; nada foi apagado")
+            return None
+        os.replace(temporario, destino)
+
+        # Pacote conferido: agora sim remove os soltos e tira do inventário
+        for uc, caminho, _, _ in itens:
+            os.remove(caminho)
+            armazem.remover(uc, mes_referencia)
+            # Pastas <UC>/ e <AAAA-MM>/ que ficaram vazias
+            for pasta_vazia in (os.path.dirname(caminho), os.path.dirname(os.path.dirname(caminho))):
+                if os.path.isdir(pasta_vazia) and not os.listdir(pasta_vazia):
+                    os.rmdir(pasta_vazia)
+        for texto in debug:
+            os.remove(texto)
+    finally:
+        armazem.fechar()
+
+    print(f"🧊 {mes_referencia}: {len(itens)} fatura(s) e {len(debug)} texto(s) de debug em {destino}")
+    return destino
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("arquivar", "listar", "extrair"):
+        print("Uso: python src/arquivo_frio.py arquivar|listar MM/AAAA")
+        print("     python src/arquivo_frio.py extrair MM/AAAA <UC>")
+        sys.exit(1)
+
+    comando, mes = sys.argv[1], sys.argv[2]
+    if comando == "arquivar":
+        arquivar_mes(mes)
+    elif comando == "listar":
+        with PacoteFaturas(caminho_pacote(mes)) as pacote:
+            for uc in pacote.ucs():
+                item = pacote.indice["faturas"][uc]
+                print(f"   UC {uc}: {item['membro']} ({item['tamanho'] / 1024:.0f} KB)")
+    else:
+        from main import extrair_dados_fatura
+        conteudo = ler_fatura(sys.argv[3], mes)
+        if conteudo is None:
+            print(f"❌ UC {sys.argv[3]} sem fatura de {mes}")
+        else:
+            nome = nome_arquivo_fatura(normalizar_uc(sys.argv[3]), mes)
+            for campo, valor in extrair_dados_fatura(FontePDF.de_bytes(conteudo, nome)).items():
+                print(f"   {campo}: {valor}")
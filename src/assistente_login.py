@@ -1,8 +1,8 @@
-import pandas as pd
 import tkinter as tk
 from tkinter import messagebox
 import pyperclip # Biblioteca mágica do Ctrl+C
 import os
+from base_clientes import carregar_base
 
 class LoginHelperApp:
     def __init__(self, root, excel_path):
@@ -27,9 +27,8 @@ class LoginHelperApp:
             return
         
         try:
-            df = pd.read_excel(path)
-            # Converte para lista de dicionários para facilitar
-            self.dados = df.to_dict('records')
+            # Lista de dicionários vinda do cache da base (CPF/CNPJ como texto, sem perder zeros)
+            self.dados = carregar_base(path).registros()
             print(f"Carregados {len(self.dados)} usuários.")
         except Exception as e:
             messagebox.showerror("Erro", f"Falha ao ler Excel: {e}")
@@ -0,0 +1,154 @@
+import os
+import sys
+import pickle
+import threading
+
+import pandas as pd
+
+from diario_downloads import PASTA_CONTROLE
+from deduplicacao import hash_arquivo
+
+# =============================================================================
+# BASE DE CLIENTES COM CACHE BINÁRIO E ÍNDICE POR UC
+# =============================================================================
+# Cad_RateioConsumo_Final.xlsx era lida com pd.read_excel pelo painel, pelo
+# relatório, pelo gerador e pelo coordenador, cada um por conta própria, e
+# depois percorrida com iterrows para montar o dicionário UC -> cliente. Ler o
+# xlsx leva segundos numa base grande.
+#
+# Aqui a planilha é lida uma vez e guardada num instantâneo binário (pickle do
+# DataFrame) em output/controle. O instantâneo vale enquanto a planilha tiver
+# o mesmo mtime/tamanho; se só o mtime mudou (cópia, "salvar" sem alteração),
+# o SHA-256 confirma que o conteúdo é o mesmo e a leitura do xlsx é evitada.
+# A normalização da Conta Contrato e o índice UC -> (nome, id, cnpj, usina,
+# rateio) são feitos em colunas, sem laço por linha.
+#
+#   python src/base_clientes.py            -> carrega (refaz o cache se preciso) e mostra o resumo
+#   python src/base_clientes.py refazer    -> força nova leitura do xlsx
+
+ARQUIVO_BASE = os.path.join("output", "Cad_RateioConsumo_Final.xlsx")
+ARQUIVO_CACHE = os.path.join(PASTA_CONTROLE, "base_clientes.pkl")
+
+# Campo do índice -> coluna da planilha
+CAMPOS_INDICE = {
+    "nome": "Nome",
+    "id": "ID",
+    "cnpj": "CNPJ/CPF",
+    "usina": "Usina Associada",
+    "rateio": "Percentual Rateio (%)",
+}
+
+_memoria = {}
+_lock = threading.Lock()
+
+
+def normalizar_ucs(coluna):
+    """Versão em colunas de diario_downloads.normalizar_uc: tira '.0' do Excel e tudo que não é dígito"""
+    return (coluna.fillna("").astype(str).str.strip()
+            .str.replace(r"\.0$", "", regex=True)
+            .str.replace(r"\D", "", regex=True))
+
+
+def assinatura(caminho):
+    estado = os.stat(caminho)
+    return estado.st_mtime_ns, estado.st_size
+
+
+class BaseClientes:
+    def __init__(self, df, caminho=ARQUIVO_BASE):
+        self.caminho = caminho
+        self.df = df  # Planilha como lida com dtype=str (vazios continuam NaN)
+        self.ucs = normalizar_ucs(df["Conta Contrato"]) if "Conta Contrato" in df.columns \
+            else pd.Series("", index=df.index)
+
+        # Índice UC -> cliente; UC repetida fica com a primeira linha da planilha
+        colunas = {campo: (df[coluna] if coluna in df.columns else pd.Series("", index=df.index))
+                   for campo, coluna in CAMPOS_INDICE.items()}
+        tabela = pd.DataFrame(colunas).fillna("")
+        tabela.index = self.ucs.values
+        self.por_uc = tabela[(tabela.index != "") & ~tabela.index.duplicated()]
+        self.indice = self.por_uc.to_dict("index")
+
+    def __len__(self):
+        return len(self.df)
+
+    def __contains__(self, uc):
+        return uc in self.indice
+
+    def cliente(self, uc):
+        """{'nome', 'id', 'cnpj', 'usina', 'rateio'} da UC (None se fora da base)"""
+        return self.indice.get(uc)
+
+    def registros(self):
+        """Linhas da planilha como lista de dicionários (mesmo formato do read_excel(dtype=str))"""
+        return self.df.to_dict("records")
+
+    def tabela(self):
+        """Cópia da planilha com a coluna UC já normalizada (para joins)"""
+        df = self.df.copy()
+        df["UC"] = self.ucs
+        return df
+
+
+def ler_cache(caminho_cache):
+    try:
+        with open(caminho_cache, "rb") as arquivo:
+            return pickle.load(arquivo)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+
+def gravar_cache(df, caminho, caminho_cache=ARQUIVO_CACHE, digest=None):
+    """Grava o instantâneo binário da planilha (também usado por quem gera a planilha)"""
+    os.makedirs(os.path.dirname(os.path.abspath(caminho_cache)), exist_ok=True)
+    mtime, tamanho = assinatura(caminho)
+    temporario = caminho_cache + ".tmp"
+    with open(temporario, "wb") as arquivo:
+        pickle.dump({
+            "caminho": os.path.abspath(caminho),
+            "mtime": mtime,
+            "tamanho": tamanho,
+            "hash": digest or hash_arquivo(caminho),
+            "df": df,
+        }, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporario, caminho_cache)
+
+
+def carregar_base(caminho=ARQUIVO_BASE, caminho_cache=ARQUIVO_CACHE, refazer=False):
+    """BaseClientes da planilha, vinda da memória, do instantâneo binário ou (último caso) do xlsx"""
+    mtime, tamanho = assinatura(caminho)
+    chave = os.path.abspath(caminho)
+
+    with _lock:
+        em_memoria = _memoria.get(chave)
+        if em_memoria and not refazer and em_memoria[0] == (mtime, tamanho):
+            return em_memoria[1]
+
+        cache = None if refazer else ler_cache(caminho_cache)
+        if cache and cache.get("caminho") != chave:
+            cache = None
+
+        df = None
+        if cache and (cache["mtime"], cache["tamanho"]) == (mtime, tamanho):
+            df = cache["df"]
+        elif cache and cache["tamanho"] == tamanho:
+            # mtime mudou: só relê o xlsx se o conteúdo mudou de fato
+            digest = hash_arquivo(caminho)
+            if digest == cache["hash"]:
+                df = cache["df"]
+                gravar_cache(df, caminho, caminho_cache, digest)
+
+        if df is None:
+            print("📂 Lendo base de clientes do Excel (cache desatualizado)...")
+            df = pd.read_excel(caminho, dtype=str)
+            gravar_cache(df, caminho, caminho_cache)
+
+        base = BaseClientes(df, caminho)
+        _memoria[chave] = ((mtime, tamanho), base)
+        return base
+
+
+if __name__ == "__main__":
+    base = carregar_base(refazer="refazer" in sys.argv)
+    print(f"✅ Base de clientes: {len(base)} linhas, {len(base.indice)} UCs indexadas")
+    print(f"   Cache: {ARQUIVO_CACHE}")
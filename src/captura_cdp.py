@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import base64
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+# =============================================================================
+# CAPTURA DO PDF PELA REDE (CHROME DEVTOOLS PROTOCOL)
+# =============================================================================
+# Em vez de vigiar a pasta de downloads, lê a resposta 'application/pdf' direto
+# do tráfego do navegador (Network.getResponseBody) e grava os bytes de forma
+# atômica. Sem varredura de pasta, sem .crdownload e sem "arquivo incompleto".
+#
+# Requisito: o driver precisa ter sido aberto com o log de performance ligado
+# (ver CAPABILITY_LOG) e com o visualizador de PDF interno ativo, para que o
+# PDF seja carregado como resposta de rede e não só salvo em disco. Com o
+# visualizador ativo o Chrome NÃO grava o PDF na pasta de downloads: se a
+# captura falhar, o plano B é buscar de novo a URL vista (urls_pdf) com os
+# cookies da sessão, e não vigiar a pasta.
+
+# Capability que liga os eventos de rede no log 'performance' do chromedriver
+CAPABILITY_LOG = ("goog:loggingPrefs", {"performance": "ALL"})
+
+
+def executar_cdp(driver, comando, parametros=None):
+    """Executa um comando CDP no Chrome local ou em um webdriver.Remote"""
+    parametros = parametros or {}
+
+    if hasattr(driver, "execute_cdp_cmd"):
+        return driver.execute_cdp_cmd(comando, parametros)
+
+    # webdriver.Remote não expõe o endpoint do chromedriver: registra na mão
+    executor = driver.command_executor
+    if hasattr(executor, "add_command"):
+        executor.add_command("executeCdpCommand", "POST", "/session/$sessionId/goog/cdp/execute")
+    else:
+        executor._commands["executeCdpCommand"] = ("POST", "/session/$sessionId/goog/cdp/execute")
+    return driver.execute("executeCdpCommand", {"cmd": comando, "params": parametros})["value"]
+
+
+def gravar_atomico(conteudo, destino):
+    """Grava os bytes em um .part e renomeia: o destino nunca fica pela metade"""
+    temporario = destino + ".part"
+    with open(temporario, "wb") as f:
+        f.write(conteudo)
+    os.replace(temporario, destino)
+    return destino
+
+
+class CapturaPDF:
+    def __init__(self, driver):
+        self.driver = driver
+        self.urls_pdf = []  # URLs das respostas PDF vistas (plano B: nova busca por HTTP)
+
+    def ler_eventos(self):
+        """Eventos CDP acumulados no log 'performance' desde a última leitura"""
+        eventos = []
+        for entrada in self.driver.get_log("performance"):
+            try:
+                eventos.append(json.loads(entrada["message"])["message"])
+            except (KeyError, ValueError):
+                continue
+        return eventos
+
+    def iniciar(self):
+        """Liga o domínio Network e descarta eventos antigos (chamar ANTES do clique)"""
+        executar_cdp(self.driver, "Network.enable", {
+            "maxResourceBufferSize": 50 * 1024 * 1024,
+            "maxTotalBufferSize": 100 * 1024 * 1024,
+        })
+        self.ler_eventos()
+        self.urls_pdf = []
+
+    def aguardar_pdf(self, timeout=60):
+        """Aguarda a resposta PDF terminar de carregar e devolve os bytes (ou None)"""
+        inicio = time.time()
+        pendentes = {}  # requestId -> url das respostas PDF ainda carregando
+
+        while time.time() - inicio < timeout:
+            for evento in self.ler_eventos():
+                metodo = evento.get("method")
+                params = evento.get("params", {})
+
+                if metodo == "Network.responseReceived":
+                    resposta = params.get("response", {})
+                    tipo = resposta.get("mimeType", "").lower()
+                    url = resposta.get("url", "")
+                    if tipo == "application/pdf" or url.lower().split("?")[0].endswith(".pdf"):
+                        pendentes[params["requestId"]] = url
+                        self.urls_pdf.append(url)
+                        print(f"  📡 Resposta PDF detectada: {url[:80]}")
+
+                elif metodo == "Network.loadingFinished" and params.get("requestId") in pendentes:
+                    conteudo = self.ler_corpo(params["requestId"])
+                    if conteudo:
+                        print(f"  ✅ PDF capturado da rede ({len(conteudo)} bytes)")
+                        return conteudo
+
+                elif metodo == "Network.loadingFailed" and params.get("requestId") in pendentes:
+                    print(f"  ⚠️ Carregamento do PDF falhou: {params.get('errorText')}")
+                    pendentes.pop(params["requestId"], None)
+
+            time.sleep(0.3)
+
+        # loadingFinished pode ter passado sem ser visto: tenta o corpo das respostas pendentes
+        for request_id in pendentes:
+            conteudo = self.ler_corpo(request_id)
+            if conteudo:
+                print(f"  ✅ PDF capturado da rede após o timeout ({len(conteudo)} bytes)")
+                return conteudo
+
+        print(f"⏰ Timeout ({timeout}s): nenhuma resposta PDF capturada")
+        return None
+
+    def ler_corpo(self, request_id):
+        try:
+            corpo = executar_cdp(self.driver, "Network.getResponseBody", {"requestId": request_id})
+        except Exception as e:
+            print(f"  ⚠️ Corpo da resposta indisponível: {e}")
+            return None
+
+        conteudo = corpo.get("body", "")
+        conteudo = base64.b64decode(conteudo) if corpo.get("base64Encoded") else conteudo.encode("latin-1")
+        return conteudo if conteudo.startswith(b"%PDF") else None
+
+
+# ==========================================
+# TESTE LOCAL (HEADLESS + SERVIDOR DUBLÊ)
+# ==========================================
+PDF_MINIMO = (
+    b"%PDF-1.4\n"
+    b"1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 200 200]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+PAGINA_TESTE = b"""<html><body>
+<div class="lista-debitos-modal"><a class="download-pdf" href="/fatura.pdf">Ver Fatura</a></div>
+</body></html>"""
+
+
+class ServidorDuble(BaseHTTPRequestHandler):
+    """Imita o portal: uma página com 'Ver Fatura' e um PDF"""
+
+    def do_GET(self):
+        if self.path.startswith("/fatura.pdf"):
+            corpo, tipo = PDF_MINIMO, "application/pdf"
+        else:
+            corpo, tipo = PAGINA_TESTE, "text/html; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def testar_captura_local(destino=os.path.join("output", "debug", "teste_captura_cdp.pdf")):
+    """Sobe um servidor local, abre o Chrome headless, clica em 'Ver Fatura' e captura o PDF"""
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.chrome.service import Service
+    from inicio_rapido import obter_chromedriver
+
+    servidor = HTTPServer(("127.0.0.1", 0), ServidorDuble)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_address[1]}/"
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_experimental_option("prefs", {"plugins.always_open_pdf_externally": False})
+    options.set_capability(*CAPABILITY_LOG)
+    driver = webdriver.Chrome(service=Service(obter_chromedriver()), options=options)
+
+    try:
+        driver.get(url)
+        captura = CapturaPDF(driver)
+        captura.iniciar()
+        driver.find_element(By.CSS_SELECTOR, "a.download-pdf").click()
+        conteudo = captura.aguardar_pdf(timeout=20)
+
+        if conteudo != PDF_MINIMO:
+            print("❌ Captura CDP falhou: bytes diferentes do PDF servido")
+            return False
+
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        gravar_atomico(conteudo, destino)
+        print(f"✅ Captura CDP OK: {destino}")
+        return True
+    finally:
+        driver.quit()
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    testar_captura_local()
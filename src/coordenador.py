@@ -0,0 +1,315 @@
+import os
+import time
+import queue
+import socket
+import argparse
+import threading
+import subprocess
+
+from app_hibrido import EquatorialBot
+from base_clientes import carregar_base, ARQUIVO_BASE
+from captura_cdp import CapturaPDF, CAPABILITY_LOG, PDF_MINIMO, ServidorDuble, gravar_atomico
+from diario_downloads import DiarioDownloads, PASTA_FATURAS, ciclo_padrao, normalizar_uc
+from fila_retentativas import FilaRetentativas, registrar_resultado
+from inicio_rapido import obter_chromedriver, PERFIL_EXECUCAO
+from limitador import Governador, ControleConcorrencia
+from telemetria import Telemetria
+
+# =============================================================================
+# COORDENADOR DE ROBÔS DISTRIBUÍDOS (SELENIUM GRID / CHROMEDRIVER REMOTO)
+# =============================================================================
+# Um PC com Windows aguenta poucos Chrome ao mesmo tempo. O coordenador abre um
+# EquatorialBot por nó remoto (Selenium Grid, selenium/standalone-chrome ou um
+# "chromedriver --port=XXXX" em outra máquina) e distribui os clientes
+# pendentes do ciclo entre eles. O PDF volta do nó como bytes (captura CDP) e é
+# gravado na pasta central output/faturas; diário e fila de retentativas são
+# os mesmos do painel.
+#
+# Exemplos:
+#   python src/coordenador.py --nos http://grid:4444 http://pc2:9515
+#   python src/coordenador.py --nos-locais 2        (2 chromedriver nesta máquina)
+#   python src/coordenador.py --teste-local 2       (autoteste com servidor dublê)
+#
+# Todos os nós dividem um limitador.Governador: ritmo de navegações/downloads
+# somado e número de robôs ativos ajustado pelo comportamento do portal.
+
+MAX_RODADAS_RETENTATIVA = 10  # Rodadas da fila de retentativas por execução
+
+
+def carregar_clientes(caminho=ARQUIVO_BASE):
+    return carregar_base(caminho).registros()
+
+
+# ==========================================
+# NÓS LOCAIS (CHROMEDRIVER EM PROCESSOS SEPARADOS)
+# ==========================================
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def iniciar_nos_locais(quantidade):
+    """Sobe N chromedriver nesta máquina, cada um fazendo papel de nó remoto"""
+    caminho = obter_chromedriver()
+    urls, processos = [], []
+    for _ in range(quantidade):
+        porta = porta_livre()
+        processos.append(subprocess.Popen([caminho, f"--port={porta}"],
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        urls.append(f"http://127.0.0.1:{porta}")
+
+    # Espera as portas abrirem
+    limite = time.time() + 15
+    for url in urls:
+        porta = int(url.rsplit(":", 1)[1])
+        while time.time() < limite:
+            try:
+                socket.create_connection(("127.0.0.1", porta), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.2)
+
+    print(f"🖧 {quantidade} nó(s) local(is): {', '.join(urls)}")
+    return urls, processos
+
+
+def encerrar_nos_locais(processos):
+    for processo in processos:
+        processo.terminate()
+
+
+# ==========================================
+# COORDENADOR
+# ==========================================
+class Coordenador:
+    def __init__(self, nos, ciclo=None, pasta_faturas=PASTA_FATURAS, navegacao_leve=True, suprimir_clara=True,
+                 governador=None):
+        self.nos = nos
+        self.ciclo = ciclo or ciclo_padrao()
+        self.pasta_faturas = os.path.abspath(pasta_faturas)
+        self.diario = DiarioDownloads(self.ciclo, self.pasta_faturas)
+        self.fila = FilaRetentativas(self.ciclo, self.diario.caminho)
+        self.clientes = queue.Queue()
+        self.bots = []
+        self.processados = {url: 0 for url in nos}
+        self.governador = governador or Governador(
+            concorrencia=ControleConcorrencia(inicial=min(2, len(nos)), maximo=len(nos)))
+        self.telemetria = Telemetria()
+        self.opcoes = {"navegacao_leve": navegacao_leve, "suprimir_clara": suprimir_clara,
+                       "governador": self.governador, "telemetria": self.telemetria}
+
+    def abrir_nos(self):
+        """Abre um navegador por nó, em paralelo; nós fora do ar ficam de fora"""
+        def abrir(indice, url):
+            bot = EquatorialBot(self.pasta_faturas, url_remota=url,
+                                pasta_perfil=f"{PERFIL_EXECUCAO}_no{indice}", **self.opcoes)
+            try:
+                bot.abrir_navegador()
+                self.bots.append((url, bot))
+            except Exception as e:
+                print(f"❌ Nó {url} indisponível: {e}")
+
+        threads = [threading.Thread(target=abrir, args=(i, url)) for i, url in enumerate(self.nos)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(self.bots)
+
+    def fechar_nos(self):
+        for _, bot in self.bots:
+            try:
+                bot.driver.quit()
+            except Exception:
+                pass
+
+    def processar(self, url, bot, item):
+        """Um cliente do começo ao fim em um nó: login, download, registro e logout"""
+        uc = normalizar_uc(item.get('Conta Contrato'))
+        inicio = time.time()
+
+        try:
+            resultado = bot.fazer_login(normalizar_uc(item.get('CNPJ/CPF')),
+                                        str(item.get('Acesso equatorial', '')).strip())
+            resultado = bot.baixar_ultima_fatura(uc) if resultado is True else f"Erro: {resultado}"
+        except Exception as e:
+            resultado = f"Erro: {str(e)}"
+
+        # Nó caiu no meio do cliente: reabre e registra a queda
+        if not bot.sessao_viva():
+            try:
+                bot.reiniciar_navegador()
+                recuperado = True
+            except Exception as e:
+                print(f"❌ Nó {url} não voltou: {e}")
+                recuperado = False
+            self.diario.registrar_recuperacao(uc, resultado, time.time() - inicio, recuperado)
+
+        registrar_resultado(self.diario, self.fila, uc, resultado,
+                            bot.ultimo_arquivo if "Sucesso" in resultado else None)
+        self.governador.registrar(resultado, time.time() - inicio)
+        self.processados[url] += 1
+        print(f"[{url}] UC {uc}: {resultado} ({time.time() - inicio:.0f}s)")
+
+        if bot.sessao_viva():
+            bot.fazer_logout()
+
+    def trabalhar(self, url, bot):
+        while bot.driver is not None:
+            try:
+                item = self.clientes.get_nowait()
+            except queue.Empty:
+                return
+            with self.governador.vaga():
+                self.processar(url, bot, item)
+
+    def nos_vivos(self):
+        """Nós com navegador ativo (reiniciar_navegador que falha deixa driver = None)"""
+        return [(url, bot) for url, bot in self.bots if bot.driver is not None]
+
+    def rodar_rodada(self, itens):
+        """Distribui os itens entre os nós (cada nó puxa o próximo da fila ao terminar).
+        Retorna quantos clientes foram processados na rodada."""
+        # Sobra da rodada anterior (nós caíram antes de esvaziar a fila) não se acumula
+        while True:
+            try:
+                self.clientes.get_nowait()
+            except queue.Empty:
+                break
+        for item in itens:
+            self.clientes.put(item)
+
+        antes = sum(self.processados.values())
+        threads = [threading.Thread(target=self.trabalhar, args=(url, bot), daemon=True)
+                   for url, bot in self.nos_vivos()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sum(self.processados.values()) - antes
+
+    def executar(self, dados):
+        pendentes = [item for item in dados
+                     if normalizar_uc(item.get('Conta Contrato'))
+                     and not self.diario.concluido(item.get('Conta Contrato'))]
+        print(f"📋 Ciclo {self.ciclo}: {len(pendentes)} de {len(dados)} cliente(s) pendente(s)")
+
+        if not pendentes or not self.abrir_nos():
+            return
+
+        inicio = time.time()
+        try:
+            self.rodar_rodada(pendentes)
+
+            # Fila de retentativas, agora distribuída entre os nós
+            por_uc = {normalizar_uc(item.get('Conta Contrato')): item for item in dados}
+            for _ in range(MAX_RODADAS_RETENTATIVA):
+                espera = self.fila.tempo_ate_proxima()
+                if espera is None:
+                    break
+                if not self.nos_vivos():
+                    print("❌ Nenhum nó com navegador ativo; a fila de retentativas fica para a próxima execução")
+                    break
+                if espera > 0:
+                    print(f"⏳ Fila de retentativas: próxima rodada em {espera:.0f}s")
+                    time.sleep(espera)
+
+                prontas = self.fila.prontas()
+                for uc in prontas:
+                    if uc not in por_uc:
+                        self.fila.remover(uc)
+                if not self.rodar_rodada([por_uc[uc] for uc in prontas if uc in por_uc]):
+                    print("⚠️ Rodada de retentativas sem nenhum cliente processado; encerrando")
+                    break
+            else:
+                if self.fila.tempo_ate_proxima() is not None:
+                    print(f"⚠️ Limite de {MAX_RODADAS_RETENTATIVA} rodadas de retentativa atingido; "
+                          "o restante fica para a próxima execução")
+        finally:
+            self.fechar_nos()
+
+        print(f"\n✅ Lote distribuído concluído em {(time.time() - inicio) / 60:.1f} min")
+        for url, total in self.processados.items():
+            print(f"   {url}: {total} cliente(s)")
+        for uc, categoria, mensagem, tentativas in self.fila.precisam_de_humano():
+            print(f"   🙋 UC {uc} ({categoria}, {tentativas}x): {mensagem}")
+        self.telemetria.imprimir_relatorio()
+
+
+# ==========================================
+# TESTE LOCAL (NÓS LOCAIS + SERVIDOR DUBLÊ)
+# ==========================================
+def testar_nos_locais(quantidade=2, pasta=os.path.join("output", "debug")):
+    """Cada nó local abre o servidor dublê, captura o PDF pela rede e grava na pasta central"""
+    from http.server import HTTPServer
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+
+    servidor = HTTPServer(("127.0.0.1", 0), ServidorDuble)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    pagina = f"http://127.0.0.1:{servidor.server_address[1]}/"
+    urls, processos = iniciar_nos_locais(quantidade)
+    os.makedirs(pasta, exist_ok=True)
+    resultados = {}
+
+    def testar(indice, url):
+        options = webdriver.ChromeOptions()
+        options.add_argument("--headless=new")
+        options.add_experimental_option("prefs", {"plugins.always_open_pdf_externally": False})
+        options.set_capability(*CAPABILITY_LOG)
+        driver = webdriver.Remote(command_executor=url, options=options)
+        try:
+            driver.get(pagina)
+            captura = CapturaPDF(driver)
+            captura.iniciar()
+            driver.find_element(By.CSS_SELECTOR, "a.download-pdf").click()
+            conteudo = captura.aguardar_pdf(timeout=20)
+            resultados[url] = conteudo == PDF_MINIMO
+            if resultados[url]:
+                gravar_atomico(conteudo, os.path.join(pasta, f"teste_no_{indice}.pdf"))
+        finally:
+            driver.quit()
+
+    try:
+        threads = [threading.Thread(target=testar, args=(i, url)) for i, url in enumerate(urls)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        encerrar_nos_locais(processos)
+        servidor.shutdown()
+
+    for url in urls:
+        print(f"{'✅' if resultados.get(url) else '❌'} Nó {url}")
+    return all(resultados.get(url) for url in urls)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distribui os clientes do ciclo entre nós remotos")
+    parser.add_argument("--nos", nargs="+", default=[], help="URLs dos nós (Grid ou chromedriver remoto)")
+    parser.add_argument("--nos-locais", type=int, default=0, help="Sobe N chromedriver nesta máquina")
+    parser.add_argument("--teste-local", type=int, default=0, help="Autoteste com N nós locais")
+    parser.add_argument("--ciclo", default=None, help="Ciclo MM/AAAA (padrão: mês anterior)")
+    parser.add_argument("--navegacoes-por-minuto", type=int, default=30, help="Teto somado de todos os nós")
+    parser.add_argument("--downloads-por-minuto", type=int, default=20, help="Teto somado de todos os nós")
+    argumentos = parser.parse_args()
+
+    if argumentos.teste_local:
+        testar_nos_locais(argumentos.teste_local)
+    else:
+        nos, processos = list(argumentos.nos), []
+        if argumentos.nos_locais:
+            urls, processos = iniciar_nos_locais(argumentos.nos_locais)
+            nos.extend(urls)
+
+        if not nos:
+            parser.error("informe --nos e/ou --nos-locais")
+
+        try:
+            governador = Governador(argumentos.navegacoes_por_minuto, argumentos.downloads_por_minuto,
+                                    concorrencia=ControleConcorrencia(inicial=min(2, len(nos)), maximo=len(nos)))
+            Coordenador(nos, argumentos.ciclo, governador=governador).executar(carregar_clientes())
+        finally:
+            encerrar_nos_locais(processos)
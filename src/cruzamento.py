@@ -0,0 +1,214 @@
+import numpy as np
+import pandas as pd
+
+from base_clientes import CAMPOS_INDICE
+
+# =============================================================================
+# CRUZAMENTO FATURAS x BASE DE CLIENTES (EM COLUNAS)
+# =============================================================================
+# O gerador percorria a base com iterrows e copiava à mão ~25 campos da fatura
+# para cada cliente; o relatório principal consultava um dicionário por
+# fatura. Aqui as faturas extraídas viram um DataFrame e o cruzamento é um
+# merge pela UC normalizada. Os dois lados sem par são tratados explicitamente:
+#
+#   - cliente da base sem fatura  -> PENDENTE
+#   - fatura sem cliente na base  -> SEM BASE
+#
+# Status e colunas de verificação saem de operações em colunas (np.where /
+# np.select), sem laço por linha.
+
+STATUS_OK = "✅ OK"
+STATUS_PENDENTE = "⚠️ PENDENTE"
+STATUS_SEM_BASE = "⚠️ SEM BASE"
+NOME_SEM_BASE = "NÃO ENCONTRADO"
+
+# Relatório estilo boleto (gerador_faturas)
+STATUS_DISPONIVEL = "DISPONÍVEL"
+STATUS_BOLETO_PENDENTE = "PENDENTE"
+STATUS_BOLETO_SEM_BASE = "SEM BASE"
+LIMITE_DIFERENCA = 1.0  # R$: diferença abaixo disso confere com o total da fatura
+
+# Coluna do relatório principal -> (campo extraído, valor quando o campo não veio)
+COLUNAS_RELATORIO = {
+    # GRUPO 1: IDENTIFICAÇÃO
+    'UC': ('uc', ''),
+    'INSTALAÇÃO': ('instalacao', ''),
+    'NOME CLIENTE': ('nome_cliente', ''),
+    'ID CLIENTE': ('id_cliente', ''),
+    'STATUS': ('status', ''),  # Coluna E é STATUS, não DATA LEITURA
+
+    # GRUPO 2: DATAS
+    'MÊS REF': ('ref_month', ''),
+    'MÊS COMPETÊNCIA (CALC)': ('mes_competencia_calc', ''),
+    'VENCIMENTO': ('vencimento', ''),
+    'DATA EMISSÃO': ('data_emissao', ''),
+    'LEITURA ANTERIOR': ('dt_anterior', ''),
+    'DATA LEITURA': ('dt_atual', ''),  # Data da leitura atual
+    'PRÓXIMA LEITURA': ('dt_proxima', ''),
+
+    # GRUPO 3: MEDIÇÃO
+    'MEDIDOR ANTERIOR (kWh)': ('leitura_ant', 0),
+    'MEDIDOR ATUAL (kWh)': ('leitura_atl', 0),
+    'CONSUMO MEDIDO (kWh)': ('consumo_medido', 0),
+    'ENERGIA COMP. (kWh)': ('energia_compensada', 0),
+    'SALDO ACUMULADO (kWh)': ('saldo_acumulado', 0),
+
+    # GRUPO 4: VALORES (R$)
+    'VALOR TOTAL (R$)': ('total_value', 0),
+    'VALOR CONSUMO (R$)': ('valor_consumo', 0),
+    'VALOR COMPENSADO (R$)': ('valor_consumo_compensado', 0),
+    'VALOR ENERGIA INJ. (R$)': ('valor_energia_injetada', 0),
+    'CIP (R$)': ('valor_cip', 0),
+    'ADIC. BANDEIRA (R$)': ('valor_adicional_bandeira', 0),
+
+    # GRUPOS 5-9
+    'PREÇO UNIT. CONSUMO (R$/kWh)': ('preco_unit_consumo', 0),
+    'PREÇO UNIT. COMPENSADO (R$/kWh)': ('preco_unit_compensado', 0),
+
+    'ICMS (R$)': ('icms', 0),
+    'PIS (R$)': ('pis', 0),
+    'COFINS (R$)': ('cofins', 0),
+
+    'ICMS (%)': ('icms_aliquota', 0),
+    'PIS (%)': ('pis_aliquota', 0),
+    'COFINS (%)': ('cofins_aliquota', 0),
+
+    'TIPO FORNECIMENTO': ('tipo_fornecimento', ''),
+    'CLASSIFICAÇÃO': ('classificacao', ''),
+    'COR DA BANDEIRA': ('cor_bandeira', ''),
+    'BANDEIRA TARIF. (INFO)': ('bandeira_tarifaria', ''),
+
+    'ARQUIVO': ('arquivo', ''),
+    'ERRO EXTRAÇÃO': ('erro_extracao', ''),
+}
+
+# Colunas de valores do relatório boleto -> (campo extraído, valor do cliente PENDENTE)
+COLUNAS_BOLETO = {
+    # BLOCO 1: CABEÇALHO
+    "VALOR TOTAL (R$)": ('total_value', 0.0),
+
+    # BLOCO 2: DATAS
+    "LEITURA ANTERIOR": ('dt_anterior', "-"),
+    "LEITURA ATUAL": ('dt_atual', "-"),
+    "PRÓXIMA LEITURA": ('dt_proxima', "-"),
+
+    # BLOCO 3: MEDIDOR
+    "MEDIDOR ANT.": ('leitura_ant', 0),
+    "MEDIDOR ATUAL": ('leitura_atl', 0),
+    "CONSUMO kWh": ('consumo_medido', 0),
+    "ENERGIA COMP. kWh": ('energia_compensada', 0),
+
+    # BLOCO 4: TRIBUTOS
+    "ICMS (R$)": ('icms', 0.0),
+    "PIS (R$)": ('pis', 0.0),
+    "COFINS (R$)": ('cofins', 0.0),
+
+    # BLOCO 5: VALORES DETALHADOS
+    "VALOR CONSUMO (R$)": ('valor_consumo', 0.0),
+    "VALOR COMPENSADO (R$)": ('valor_consumo_compensado', 0.0),
+    "VALOR ENERGIA INJ. (R$)": ('valor_energia_injetada', 0.0),
+    "CIP (R$)": ('valor_cip', 0.0),
+
+    # BLOCO 6: CÁLCULOS
+    "VALOR CALCULADO (R$)": ('valor_calculado', 0.0),
+    "DIFERENÇA (R$)": ('diferenca', 0.0),
+}
+
+
+def coluna_ou_padrao(df, campo, padrao):
+    """Coluna com vazios preenchidos pelo padrão (ou só o padrão, se o campo nem existe)"""
+    if campo in df.columns:
+        return df[campo].fillna(padrao)
+    return pd.Series(padrao, index=df.index)
+
+
+def clientes_vazios():
+    return pd.DataFrame(columns=list(CAMPOS_INDICE))
+
+
+def chave_mes(mes_referencia):
+    """'MM/AAAA' -> índice de meses para ordenar/comparar (None se não é um mês válido)"""
+    mes, _, ano = str(mes_referencia or "").partition("/")
+    return int(ano) * 12 + int(mes) - 1 if mes.isdigit() and ano.isdigit() else None
+
+
+def prioridade_fatura(dados, mes_referencia):
+    """Ordem de escolha quando a UC tem mais de uma fatura entre os meses lidos:
+    competência calculada igual à pedida, depois mês de referência igual, depois o mês vizinho mais próximo"""
+    if dados.get('mes_competencia_calc') == mes_referencia:
+        return (0, 0)
+    if dados.get('ref_month') == mes_referencia:
+        return (1, 0)
+    alvo, ref = chave_mes(mes_referencia), chave_mes(dados.get('ref_month'))
+    return (2, abs(ref - alvo) if alvo is not None and ref is not None else 99)
+
+
+def escolher_por_competencia(faturas, mes_referencia):
+    """Uma fatura por UC: a da competência pedida; meses vizinhos só na falta dela.
+    Mantém a ordem de chegada; faturas sem UC passam todas."""
+    escolhidas, sem_uc = {}, []
+    for dados in faturas:
+        uc = dados.get('uc')
+        if not uc:
+            sem_uc.append(dados)
+        elif uc not in escolhidas or \
+                prioridade_fatura(dados, mes_referencia) < prioridade_fatura(escolhidas[uc], mes_referencia):
+            escolhidas[uc] = dados
+    return list(escolhidas.values()) + sem_uc
+
+
+def cruzar_relatorio(resultados, clientes=None):
+    """Relatório principal: uma linha por fatura com nome/ID da base e STATUS.
+    'clientes' é BaseClientes.por_uc (índice = UC). Retorna (DataFrame, UCs da base sem fatura)."""
+    clientes = clientes_vazios() if clientes is None else clientes
+    faturas = pd.DataFrame(list(resultados))
+
+    pares = clientes[['nome', 'id']].rename(columns={'nome': 'nome_base', 'id': 'id_base'})
+    juntas = faturas.merge(pares, left_on='uc', right_index=True, how='left', indicator='_base')
+
+    na_base = juntas['_base'].eq('both').to_numpy()
+    ok = juntas['status'].eq(STATUS_OK).to_numpy()
+    juntas['nome_cliente'] = np.where(na_base, juntas['nome_base'], np.where(ok, NOME_SEM_BASE, ''))
+    juntas['id_cliente'] = np.where(na_base, juntas['id_base'], '')
+    juntas['status'] = np.where(~na_base & ok, STATUS_SEM_BASE, juntas['status'])
+
+    relatorio = pd.DataFrame({coluna: coluna_ou_padrao(juntas, campo, padrao)
+                              for coluna, (campo, padrao) in COLUNAS_RELATORIO.items()})
+    sem_fatura = clientes.index.difference(faturas['uc'])
+    return relatorio, sem_fatura
+
+
+def cruzar_boleto(base, extraidas, mes_referencia):
+    """Relatório estilo boleto: uma linha por cliente da base (PENDENTE se não há fatura),
+    na ordem da base, seguida das faturas cuja UC não está na base (SEM BASE).
+    'base' é BaseClientes.tabela() (coluna UC normalizada); 'extraidas' são os dicts do extrator."""
+    campos = ['uc', 'ref_month'] + [campo for campo, _ in COLUNAS_BOLETO.values()]
+    faturas = pd.DataFrame(list(extraidas), columns=campos).drop_duplicates('uc', keep='last')
+    clientes = base.reindex(columns=['ID', 'Nome', 'UC'])
+
+    com_base = clientes.merge(faturas, left_on='UC', right_on='uc', how='left', indicator='_par')
+    sem_base = faturas[~faturas['uc'].isin(clientes['UC'])]
+    sem_base = sem_base.assign(ID='', Nome=NOME_SEM_BASE, UC=sem_base['uc'], _par='right_only')
+    juntas = pd.concat([com_base, sem_base], ignore_index=True)
+
+    par = juntas['_par'].astype(str)
+    tem_fatura = par.ne('left_only').to_numpy()
+    na_base = par.ne('right_only').to_numpy()
+
+    relatorio = {
+        "ID": juntas['ID'],
+        "NOME CLIENTE": juntas['Nome'],
+        "UC": juntas['UC'],
+        "STATUS": np.select([~na_base, tem_fatura],
+                            [STATUS_BOLETO_SEM_BASE, STATUS_DISPONIVEL], STATUS_BOLETO_PENDENTE),
+        "MÊS REF": juntas['ref_month'].replace('', np.nan).fillna(mes_referencia),
+    }
+    for coluna, (campo, padrao) in COLUNAS_BOLETO.items():
+        relatorio[coluna] = coluna_ou_padrao(juntas, campo, padrao)
+
+    # Verifica se os valores batem (diferença menor que R$ 1,00)
+    diferenca = pd.to_numeric(relatorio["DIFERENÇA (R$)"], errors='coerce').fillna(0.0)
+    relatorio["VERIFICAÇÃO"] = np.where(
+        ~tem_fatura, "OK",
+        np.where(diferenca.abs() < LIMITE_DIFERENCA, "✅ OK", "⚠️ Dif: R$ " + diferenca.map("{:.2f}".format)))
+    return pd.DataFrame(relatorio)
@@ -0,0 +1,206 @@
+import os
+import re
+import sys
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+
+from diario_downloads import ARQUIVO_DIARIO, PADRAO_ARQUIVO_FATURA, PASTA_FATURAS
+
+# =============================================================================
+# DEDUPLICAÇÃO DE FATURAS POR CONTEÚDO (SHA-256)
+# =============================================================================
+# O modo antigo salvava Fatura_X_MM-AAAA_1.pdf, _2.pdf... a cada novo download
+# da mesma fatura, e o relatório lia (e duplicava) cada cópia. Aqui cada PDF é
+# identificado pelo hash do conteúdo: o primeiro vira a cópia canônica, os
+# idênticos que chegarem depois ficam na tabela de apelidos (nome antigo ->
+# hash), para que caminhos gravados no diário continuem resolvendo.
+#
+# O registro é por raiz (pasta de faturas): um PDF de outra pasta nunca é
+# comparado com os de output/faturas. Só o robô, ao baixar na própria pasta,
+# apaga a cópia idêntica; leituras e relatórios apenas ignoram as cópias.
+# Conteúdo igual em outra UC ou outro mês (PDF reemitido, fatura genérica,
+# portal entregando a fatura errada) nunca é apagado: só fica o aviso.
+#
+#   python src/deduplicacao.py                       -> lista as cópias em output/faturas
+#   python src/deduplicacao.py <pasta> ...           -> lista as cópias em outras pastas
+#   python src/deduplicacao.py --remover [<pasta>]   -> apaga as cópias idênticas da pasta
+
+TAMANHO_BLOCO = 1024 * 1024
+
+# Cópias do modo antigo (_1, _2...) perdem para o nome original na escolha da canônica
+PADRAO_COPIA = re.compile(r"_\d+\.pdf$", re.IGNORECASE)
+
+
+def hash_arquivo(caminho):
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def ordem_canonica(caminho):
+    """Nome original antes das cópias _1, _2; depois ordem alfabética"""
+    return (bool(PADRAO_COPIA.search(caminho)), caminho)
+
+
+def fatura_do_arquivo(caminho):
+    """(UC, mês, ano) pelo nome Fatura_<UC>_<MM-AAAA>.pdf (None se o nome não segue o padrão)"""
+    achado = PADRAO_ARQUIVO_FATURA.match(os.path.basename(caminho))
+    return achado.groups() if achado else None
+
+
+def dentro_da_pasta(caminho, pasta):
+    return os.path.commonpath([os.path.abspath(caminho), pasta]) == pasta
+
+
+class DeduplicadorFaturas:
+    def __init__(self, raiz=PASTA_FATURAS, caminho=ARQUIVO_DIARIO):
+        self.raiz = os.path.abspath(raiz)
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        with self.lock, self.conn:
+            # Versão anterior sem a coluna raiz (hash global entre pastas): as tabelas são só
+            # um índice do que está no disco e são refeitas no próximo registro
+            colunas = [linha[1] for linha in self.conn.execute("PRAGMA table_info(faturas_unicas)")]
+            if colunas and "raiz" not in colunas:
+                self.conn.execute("DROP TABLE faturas_unicas")
+                self.conn.execute("DROP TABLE IF EXISTS apelidos_faturas")
+
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS faturas_unicas (
+                    raiz TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    arquivo TEXT NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    registrado_em TEXT NOT NULL,
+                    PRIMARY KEY (raiz, hash)
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS apelidos_faturas (
+                    raiz TEXT NOT NULL,
+                    arquivo TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    modificado REAL NOT NULL,
+                    registrado_em TEXT NOT NULL,
+                    PRIMARY KEY (raiz, arquivo)
+                )
+            """)
+
+    def hash_em_cache(self, caminho, tamanho, modificado):
+        """Hash já calculado para o arquivo se ele não mudou desde então (evita reler o PDF)"""
+        with self.lock:
+            linha = self.conn.execute(
+                "SELECT hash FROM apelidos_faturas "
+                "WHERE raiz = ? AND arquivo = ? AND tamanho = ? AND modificado = ?",
+                (self.raiz, caminho, tamanho, modificado),
+            ).fetchone()
+        return linha[0] if linha else None
+
+    def registrar(self, caminho, remover=False):
+        """Registra um PDF da raiz e devolve o caminho canônico do conteúdo.
+        Se já existe cópia idêntica da mesma UC/mês, este arquivo vira apelido; com 'remover'
+        (robô, no download) ele também é apagado. Arquivo fora da raiz nunca é apagado, e
+        conteúdo igual ao de outra UC/mês é mantido (devolve o próprio caminho)."""
+        caminho = os.path.abspath(caminho)
+        info = os.stat(caminho)
+        digest = self.hash_em_cache(caminho, info.st_size, info.st_mtime) or hash_arquivo(caminho)
+        agora = datetime.now().isoformat(timespec="seconds")
+
+        with self.lock, self.conn:
+            linha = self.conn.execute(
+                "SELECT arquivo FROM faturas_unicas WHERE raiz = ? AND hash = ?", (self.raiz, digest)
+            ).fetchone()
+            canonico = linha[0] if linha else None
+
+            # Primeira vez que o conteúdo aparece (ou a canônica sumiu do disco): este vira a canônica
+            if canonico is None or not os.path.exists(canonico):
+                canonico = caminho
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO faturas_unicas (raiz, hash, arquivo, tamanho, registrado_em) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (self.raiz, digest, canonico, info.st_size, agora),
+                )
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO apelidos_faturas "
+                "(raiz, arquivo, hash, tamanho, modificado, registrado_em) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.raiz, caminho, digest, info.st_size, info.st_mtime, agora),
+            )
+
+        if canonico == caminho:
+            return canonico
+
+        fatura = fatura_do_arquivo(caminho)
+        if fatura is not None and fatura != fatura_do_arquivo(canonico):
+            print(f"⚠️ {os.path.basename(caminho)} tem o mesmo conteúdo de {os.path.basename(canonico)} "
+                  "(outra UC/mês); mantido para conferência")
+            return caminho
+
+        if remover and dentro_da_pasta(caminho, self.raiz):
+            os.remove(caminho)
+            print(f"♻️  {os.path.basename(caminho)} é cópia idêntica de {os.path.basename(canonico)} (removida)")
+        return canonico
+
+    def canonico(self, caminho):
+        """Caminho canônico de um arquivo registrado, inclusive de cópias já removidas"""
+        with self.lock:
+            linha = self.conn.execute(
+                """
+                SELECT u.arquivo FROM apelidos_faturas a
+                JOIN faturas_unicas u ON u.raiz = a.raiz AND u.hash = a.hash
+                WHERE a.raiz = ? AND a.arquivo = ?
+                """,
+                (self.raiz, os.path.abspath(caminho)),
+            ).fetchone()
+        return linha[0] if linha else None
+
+    def varrer(self, remover=False):
+        """Varredura da raiz: registra cada PDF e retorna a lista de PDFs únicos (canônicos).
+        As cópias idênticas só são apagadas com 'remover'."""
+        if not os.path.isdir(self.raiz):
+            return []
+
+        arquivos = sorted((entrada.path for entrada in os.scandir(self.raiz)
+                           if entrada.is_file() and entrada.name.lower().endswith(".pdf")),
+                          key=ordem_canonica)
+        unicos = []
+        for caminho in arquivos:
+            try:
+                canonico = self.registrar(caminho, remover)
+            except OSError as e:
+                print(f"⚠️ Não foi possível ler {os.path.basename(caminho)}: {e}")
+                continue
+            if canonico == os.path.abspath(caminho):
+                unicos.append(canonico)
+
+        copias = len(arquivos) - len(unicos)
+        if copias:
+            print(f"♻️  {copias} cópia(s) idêntica(s) {'removida(s)' if remover else 'ignorada(s)'} em {self.raiz}")
+        return unicos
+
+    def fechar(self):
+        with self.lock:
+            self.conn.close()
+
+
+def faturas_unicas(pasta=PASTA_FATURAS, remover=False):
+    """PDFs da pasta sem cópias de mesmo conteúdo (cada fatura é processada uma vez só).
+    Só leitura, a menos que 'remover' seja pedido explicitamente."""
+    deduplicador = DeduplicadorFaturas(pasta)
+    try:
+        return deduplicador.varrer(remover)
+    finally:
+        deduplicador.fechar()
+
+
+if __name__ == "__main__":
+    remover = "--remover" in sys.argv
+    for pasta in [a for a in sys.argv[1:] if not a.startswith("--")] or [PASTA_FATURAS]:
+        print(f"📂 {pasta}: {len(faturas_unicas(pasta, remover))} fatura(s) única(s)")
@@ -0,0 +1,194 @@
+import os
+import re
+import glob
+import sqlite3
+import threading
+from datetime import datetime
+
+# =============================================================================
+# DIÁRIO DE DOWNLOADS POR CICLO (RETOMADA APÓS QUEDA)
+# =============================================================================
+# Guarda, para cada ciclo (MM/AAAA), o resultado de cada UC. Se o robô ou a
+# máquina caírem no meio da lista, o painel volta no primeiro cliente pendente
+# e pula quem já tem a fatura do ciclo, sem abrir o portal para ele.
+
+# Pastas de saída compartilhadas por todos os módulos (definidas só aqui)
+PASTA_FATURAS = os.path.join("output", "faturas")
+PASTA_CONTROLE = os.path.join("output", "controle")
+ARQUIVO_DIARIO = os.path.join(PASTA_CONTROLE, "diario_downloads.db")
+
+STATUS_SUCESSO = "sucesso"
+STATUS_ERRO = "erro"
+STATUS_PULADO = "pulado"
+
+# Fatura_<UC>_<MM-AAAA>.pdf, inclusive as cópias _1, _2 do modo antigo
+PADRAO_ARQUIVO_FATURA = re.compile(r"^Fatura_(\d+)_(\d{2})-(\d{4})(?:_\d+)?\.pdf$", re.IGNORECASE)
+
+
+def ciclo_padrao(hoje=None):
+    """Ciclo padrão: mês anterior ao atual (a fatura de MM sai em MM+1)"""
+    hoje = hoje or datetime.now()
+    mes, ano = hoje.month - 1, hoje.year
+    if mes == 0:
+        mes, ano = 12, ano - 1
+    return f"{mes:02d}/{ano}"
+
+
+def normalizar_uc(uc):
+    """Deixa a UC só com dígitos (remove '.0' do Excel, pontos e espaços)"""
+    texto = str(uc or "").strip()
+    if texto.endswith(".0"):
+        texto = texto[:-2]
+    return re.sub(r"\D", "", texto)
+
+
+def nome_arquivo_fatura(uc, mes_referencia):
+    """Nome padrão do PDF salvo pelo robô: Fatura_<UC>_<MM-AAAA>.pdf"""
+    return f"Fatura_{uc}_{str(mes_referencia).replace('/', '-')}.pdf"
+
+
+def caminho_particao(raiz, uc, mes_referencia):
+    """Caminho do PDF no armazém particionado: <raiz>/<AAAA-MM>/<UC>/Fatura_<UC>_<MM-AAAA>.pdf"""
+    mes, _, ano = str(mes_referencia).partition("/")
+    return os.path.join(raiz, f"{ano}-{mes}", str(uc), nome_arquivo_fatura(uc, mes_referencia))
+
+
+class DiarioDownloads:
+    def __init__(self, ciclo, pasta_faturas, caminho=ARQUIVO_DIARIO):
+        self.ciclo = ciclo
+        self.pasta_faturas = os.path.abspath(pasta_faturas)
+        self.caminho = caminho
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+
+        # O robô grava a partir de threads, por isso a conexão é compartilhada com lock
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS downloads (
+                    ciclo TEXT NOT NULL,
+                    uc TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    mes_referencia TEXT,
+                    arquivo TEXT,
+                    mensagem TEXT,
+                    atualizado_em TEXT NOT NULL,
+                    PRIMARY KEY (ciclo, uc)
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS recuperacoes (
+                    ciclo TEXT NOT NULL,
+                    uc TEXT,
+                    erro TEXT,
+                    segundos_perdidos REAL NOT NULL,
+                    recuperado INTEGER NOT NULL,
+                    momento TEXT NOT NULL
+                )
+            """)
+
+    def registrar(self, uc, status, mes_referencia=None, arquivo=None, mensagem=None):
+        """Grava (ou sobrescreve) o resultado da UC no ciclo atual"""
+        uc = normalizar_uc(uc)
+        if not uc:
+            return
+
+        with self.lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO downloads (ciclo, uc, status, mes_referencia, arquivo, mensagem, atualizado_em)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (ciclo, uc) DO UPDATE SET
+                    status = excluded.status,
+                    mes_referencia = COALESCE(excluded.mes_referencia, downloads.mes_referencia),
+                    arquivo = COALESCE(excluded.arquivo, downloads.arquivo),
+                    mensagem = excluded.mensagem,
+                    atualizado_em = excluded.atualizado_em
+                """,
+                (self.ciclo, uc, status, mes_referencia, arquivo, mensagem,
+                 datetime.now().isoformat(timespec="seconds")),
+            )
+
+    def registrar_recuperacao(self, uc, erro, segundos_perdidos, recuperado):
+        """Guarda uma queda do navegador e o tempo perdido até ele voltar"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO recuperacoes (ciclo, uc, erro, segundos_perdidos, recuperado, momento) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.ciclo, normalizar_uc(uc), erro, segundos_perdidos, int(recuperado),
+                 datetime.now().isoformat(timespec="seconds")),
+            )
+
+    def resumo_recuperacoes(self):
+        """(quedas, segundos perdidos) do navegador no ciclo"""
+        with self.lock:
+            quedas, perdidos = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(segundos_perdidos), 0) FROM recuperacoes WHERE ciclo = ?",
+                (self.ciclo,),
+            ).fetchone()
+        return quedas, perdidos
+
+    def status(self, uc):
+        """Retorna o status gravado da UC no ciclo (ou None)"""
+        with self.lock:
+            linha = self.conn.execute(
+                "SELECT status FROM downloads WHERE ciclo = ? AND uc = ?",
+                (self.ciclo, normalizar_uc(uc)),
+            ).fetchone()
+        return linha[0] if linha else None
+
+    def fatura_no_disco(self, uc):
+        """Procura o PDF do ciclo na partição do armazém, ainda solto na raiz (inclusive _1, _2...)
+        ou no pacote do arquivo frio"""
+        uc = normalizar_uc(uc)
+        if not uc:
+            return None
+
+        particao = caminho_particao(self.pasta_faturas, uc, self.ciclo)
+        if os.path.exists(particao):
+            return particao
+
+        nome_base, extensao = os.path.splitext(nome_arquivo_fatura(uc, self.ciclo))
+        padrao = os.path.join(self.pasta_faturas, f"{glob.escape(nome_base)}*{extensao}")
+        encontrados = sorted(glob.glob(padrao))
+        if encontrados:
+            return encontrados[0]
+
+        # Ciclo já arquivado: a fatura está no pacote zip do mês
+        from arquivo_frio import localizar_arquivada
+        if self.pasta_faturas == os.path.abspath(PASTA_FATURAS):
+            return localizar_arquivada(uc, self.ciclo)
+        return None
+
+    def concluido(self, uc):
+        """UC está resolvida no ciclo: sucesso com a fatura do próprio ciclo ou PDF do ciclo no disco.
+        Sucesso com fatura de mês anterior (portal ainda sem a do ciclo) não conta."""
+        with self.lock:
+            linha = self.conn.execute(
+                "SELECT status, mes_referencia FROM downloads WHERE ciclo = ? AND uc = ?",
+                (self.ciclo, normalizar_uc(uc)),
+            ).fetchone()
+        if linha and linha[0] == STATUS_SUCESSO and (linha[1] or "").strip() == self.ciclo:
+            return True
+        return self.fatura_no_disco(uc) is not None
+
+    def primeiro_pendente(self, ucs, inicio=0):
+        """Índice do primeiro cliente não concluído a partir de 'inicio' (ou None)"""
+        for indice in range(inicio, len(ucs)):
+            if not self.concluido(ucs[indice]):
+                return indice
+        return None
+
+    def resumo(self):
+        """Contagem de UCs por status no ciclo"""
+        with self.lock:
+            linhas = self.conn.execute(
+                "SELECT status, COUNT(*) FROM downloads WHERE ciclo = ? GROUP BY status",
+                (self.ciclo,),
+            ).fetchall()
+        return dict(linhas)
+
+    def fechar(self):
+        with self.lock:
+            self.conn.close()
@@ -1,12 +1,12 @@
 import pandas as pd
-import fitz  # PyMuPDF
 import os
 import re
-import glob
 from openpyxl import load_workbook
 from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
 from datetime import datetime
 import json
+from armazem_faturas import listar_faturas
+from fonte_pdf import ZipMapeado, como_fonte
 
 # ==========================================
 # 1. FUNÇÕES AUXILIARES
@@ -51,7 +51,9 @@ def format_date(date_str):
 def extract_invoice_data(pdf_path):
     """
     Extrai TODOS os dados possíveis da fatura PDF da Equatorial
+    (pdf_path: caminho ou FontePDF - bytes ou membro de zip)
     """
+    fonte = como_fonte(pdf_path)
     data = {
         # DADOS BÁSICOS
         "uc": None,
@@ -113,7 +115,7 @@ def extract_invoice_data(pdf_path):
     }
 
     try:
-        doc = fitz.open(pdf_path)
+        doc = fonte.abrir()
         page = doc[0]
         text_full = page.get_text("text") 
         
@@ -320,7 +322,7 @@ def extract_invoice_data(pdf_path):
         
     except Exception as e:
         data['erro'] = str(e)
-        print(f"❌ Erro PDF {os.path.basename(pdf_path)}: {e}")
+        print(f"❌ Erro PDF {fonte.nome}: {e}")
     
     finally:
         if 'doc' in locals():
@@ -334,22 +336,31 @@ def extract_invoice_data(pdf_path):
 def processar_faturas(pdf_folder, uc_filtro=None):
     """
     Processa todas as faturas em um diretório
+    (ou num .zip de lote de parceiro, lido direto do zip sem extrair)
     """
-    pdf_files = glob.glob(os.path.join(pdf_folder, "*.pdf"))
+    pacote = None
+    if pdf_folder.lower().endswith(".zip"):
+        pacote = ZipMapeado(pdf_folder)
+        pdf_files = pacote.fontes()
+    else:
+        pdf_files = listar_faturas(pdf_folder)
     
     if not pdf_files:
         print(f"❌ Nenhum PDF encontrado em {pdf_folder}")
+        if pacote:
+            pacote.fechar()
         return []
     
     print(f"📡 Processando {len(pdf_files)} faturas...")
     
     resultados = []
     for i, pdf_path in enumerate(pdf_files, 1):
-        print(f"  [{i}/{len(pdf_files)}] Processando: {os.path.basename(pdf_path)}")
-        dados = extract_invoice_data(pdf_path)
+        fonte = como_fonte(pdf_path)
+        print(f"  [{i}/{len(pdf_files)}] Processando: {fonte.nome}")
+        dados = extract_invoice_data(fonte)
         
         # Adiciona nome do arquivo aos dados
-        dados['arquivo'] = os.path.basename(pdf_path)
+        dados['arquivo'] = fonte.nome
         
         # Filtra por UC se especificado
         if uc_filtro and dados['uc'] != uc_filtro:
@@ -357,6 +368,8 @@ def processar_faturas(pdf_folder, uc_filtro=None):
             
         resultados.append(dados)
     
+    if pacote:
+        pacote.fechar()
     print(f"✅ {len(resultados)} faturas processadas com sucesso")
     return resultados
 
@@ -0,0 +1,203 @@
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from diario_downloads import ARQUIVO_DIARIO, STATUS_SUCESSO, STATUS_ERRO, normalizar_uc
+
+# =============================================================================
+# FILA DE RETENTATIVAS COM BACKOFF
+# =============================================================================
+# Quando o download de um cliente falha, o lote não para: o erro é classificado,
+# a UC entra nesta fila (gravada no mesmo banco do diário) e é tentada de novo
+# no fim da passada principal, com espera exponencial entre as tentativas.
+# Só o que esgota as tentativas vai para o resumo final "precisa de humano".
+
+CATEGORIA_TIMEOUT = "timeout"
+CATEGORIA_UC = "uc_nao_encontrada"
+CATEGORIA_TABELA = "sem_tabela"
+CATEGORIA_DOWNLOAD = "download_incompleto"
+CATEGORIA_SEM_FATURAS = "sem_faturas"
+CATEGORIA_SESSAO = "sessao_expirada"
+CATEGORIA_OUTRO = "outro"
+
+# Códigos "Erro [CODIGO]: ..." da detecção rápida de estados terminais do portal
+CATEGORIA_POR_CODIGO = {
+    "TIMEOUT": CATEGORIA_TIMEOUT,
+    "SEM_FATURAS": CATEGORIA_SEM_FATURAS,
+    "SESSAO_EXPIRADA": CATEGORIA_SESSAO,
+    "BANNER_ERRO": CATEGORIA_OUTRO,
+    "CLARA": CATEGORIA_OUTRO,
+    "NAVEGADOR_CAIU": CATEGORIA_OUTRO,
+}
+
+# Trechos das mensagens "Erro: ..." do robô que identificam cada categoria
+PADROES_CATEGORIA = [
+    (CATEGORIA_TIMEOUT, ("timeout", "tempo esgotado")),
+    (CATEGORIA_UC, ("não encontrada nas opções", "seletor de uc")),
+    (CATEGORIA_TABELA, ("tabela de faturas", "nenhuma fatura")),
+    (CATEGORIA_DOWNLOAD, ("download não finalizado", "acionar o download", "não renomeado")),
+]
+
+# Tentativas extras por categoria (UC fora da lista raramente se resolve sozinha)
+MAX_TENTATIVAS = {
+    CATEGORIA_TIMEOUT: 3,
+    CATEGORIA_UC: 1,
+    CATEGORIA_TABELA: 2,
+    CATEGORIA_DOWNLOAD: 3,
+    CATEGORIA_SEM_FATURAS: 0,
+    CATEGORIA_SESSAO: 2,
+    CATEGORIA_OUTRO: 2,
+}
+
+ESPERA_BASE = 30      # segundos antes da 1ª retentativa
+ESPERA_MAXIMA = 900   # teto do backoff (15 min)
+
+
+def classificar_erro(resultado):
+    """Categoria do erro a partir da mensagem devolvida pelo robô"""
+    codigo = re.search(r"\[([A-Z_]+)\]", str(resultado))
+    if codigo and codigo.group(1) in CATEGORIA_POR_CODIGO:
+        return CATEGORIA_POR_CODIGO[codigo.group(1)]
+    
+    texto = str(resultado).lower()
+    for categoria, trechos in PADROES_CATEGORIA:
+        if any(trecho in texto for trecho in trechos):
+            return categoria
+    return CATEGORIA_OUTRO
+
+
+def calcular_espera(tentativas):
+    """Backoff exponencial: 30s, 60s, 120s... limitado a ESPERA_MAXIMA"""
+    return min(ESPERA_BASE * 2 ** max(tentativas - 1, 0), ESPERA_MAXIMA)
+
+
+def registrar_resultado(diario, fila, uc, resultado, arquivo=None):
+    """Grava o resultado do robô no diário; falhas entram na fila, sucessos saem dela"""
+    if "Sucesso" in resultado:
+        mes_referencia = resultado.split(":", 1)[1].replace("(já existia)", "").strip()
+        diario.registrar(uc, STATUS_SUCESSO, mes_referencia=mes_referencia,
+                         arquivo=arquivo, mensagem=resultado)
+        fila.remover(uc)
+    else:
+        diario.registrar(uc, STATUS_ERRO, mensagem=resultado)
+        categoria = fila.enfileirar(uc, resultado)
+        print(f"🔁 UC {uc} na fila de retentativas ({categoria})")
+
+
+class FilaRetentativas:
+    def __init__(self, ciclo, caminho=ARQUIVO_DIARIO):
+        self.ciclo = ciclo
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS fila_retentativas (
+                    ciclo TEXT NOT NULL,
+                    uc TEXT NOT NULL,
+                    categoria TEXT NOT NULL,
+                    mensagem TEXT,
+                    tentativas INTEGER NOT NULL,
+                    proxima_em REAL NOT NULL,
+                    esgotada INTEGER NOT NULL DEFAULT 0,
+                    atualizado_em TEXT NOT NULL,
+                    PRIMARY KEY (ciclo, uc)
+                )
+            """)
+
+    def enfileirar(self, uc, resultado):
+        """Registra mais uma falha da UC e agenda a próxima tentativa (retorna a categoria)"""
+        uc = normalizar_uc(uc)
+        if not uc:
+            return None
+
+        categoria = classificar_erro(resultado)
+        with self.lock, self.conn:
+            linha = self.conn.execute(
+                "SELECT tentativas FROM fila_retentativas WHERE ciclo = ? AND uc = ?",
+                (self.ciclo, uc),
+            ).fetchone()
+            tentativas = (linha[0] if linha else 0) + 1
+            esgotada = int(tentativas > MAX_TENTATIVAS[categoria])
+
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO fila_retentativas
+                    (ciclo, uc, categoria, mensagem, tentativas, proxima_em, esgotada, atualizado_em)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (self.ciclo, uc, categoria, str(resultado), tentativas,
+                 time.time() + calcular_espera(tentativas), esgotada,
+                 datetime.now().isoformat(timespec="seconds")),
+            )
+        return categoria
+
+    def remover(self, uc):
+        """Tira a UC da fila (baixou com sucesso ou foi pulada pelo operador)"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM fila_retentativas WHERE ciclo = ? AND uc = ?",
+                (self.ciclo, normalizar_uc(uc)),
+            )
+
+    def proxima(self):
+        """UC cuja espera já venceu (ou None)"""
+        with self.lock:
+            linha = self.conn.execute(
+                """
+                SELECT uc FROM fila_retentativas
+                WHERE ciclo = ? AND esgotada = 0 AND proxima_em <= ?
+                ORDER BY proxima_em LIMIT 1
+                """,
+                (self.ciclo, time.time()),
+            ).fetchone()
+        return linha[0] if linha else None
+
+    def prontas(self):
+        """Todas as UCs cuja espera já venceu (para distribuir entre vários robôs)"""
+        with self.lock:
+            linhas = self.conn.execute(
+                """
+                SELECT uc FROM fila_retentativas
+                WHERE ciclo = ? AND esgotada = 0 AND proxima_em <= ?
+                ORDER BY proxima_em
+                """,
+                (self.ciclo, time.time()),
+            ).fetchall()
+        return [linha[0] for linha in linhas]
+
+    def tempo_ate_proxima(self):
+        """Segundos até a próxima retentativa (None se a fila não tem mais nada a tentar)"""
+        with self.lock:
+            linha = self.conn.execute(
+                "SELECT MIN(proxima_em) FROM fila_retentativas WHERE ciclo = ? AND esgotada = 0",
+                (self.ciclo,),
+            ).fetchone()
+        if not linha or linha[0] is None:
+            return None
+        return max(linha[0] - time.time(), 0)
+
+    def tentativas(self, uc):
+        with self.lock:
+            linha = self.conn.execute(
+                "SELECT tentativas FROM fila_retentativas WHERE ciclo = ? AND uc = ?",
+                (self.ciclo, normalizar_uc(uc)),
+            ).fetchone()
+        return linha[0] if linha else 0
+
+    def precisam_de_humano(self):
+        """UCs que esgotaram as tentativas: (uc, categoria, mensagem, tentativas)"""
+        with self.lock:
+            return self.conn.execute(
+                """
+                SELECT uc, categoria, mensagem, tentativas FROM fila_retentativas
+                WHERE ciclo = ? AND esgotada = 1 ORDER BY categoria, uc
+                """,
+                (self.ciclo,),
+            ).fetchall()
+
+    def fechar(self):
+        with self.lock:
+            self.conn.close()
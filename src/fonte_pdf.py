@@ -0,0 +1,116 @@
+import os
+import mmap
+import struct
+import zipfile
+
+# =============================================================================
+# FONTES DE PDF (CAMINHO, BYTES OU MEMBRO DE ZIP)
+# =============================================================================
+# Os extratores abriam sempre fitz.open(caminho). Lotes de parceiros chegam em
+# zip, o arquivo frio guarda meses em zip e a captura pela rede já tem os bytes
+# na mão: extrair para o disco só para abrir de novo é cópia à toa. Uma
+# FontePDF sabe abrir o documento de onde ele estiver, com
+# fitz.open(stream=...) quando não há caminho.
+#
+# Membro de zip guardado sem compressão (ZIP_STORED, caso dos pacotes do
+# arquivo frio) é lido como uma fatia do zip mapeado em memória: o PDF não é
+# copiado nem para o disco nem para um bytes novo. O zip é mapeado uma vez só
+# por quem o abriu (ZipMapeado, PacoteFaturas), que fecha o mapa junto com o
+# zip; sem mapa, o membro é lido com ZipFile.read.
+
+TAMANHO_CABECALHO_LOCAL = 30  # Cabeçalho local de cada membro no formato zip
+
+
+def mapear_arquivo(caminho):
+    """Arquivo inteiro mapeado em memória (somente leitura)"""
+    with open(caminho, "rb") as arquivo:
+        return mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class FontePDF:
+    def __init__(self, nome, caminho=None, conteudo=None, pacote=None, membro=None, mapa=None):
+        self.nome = nome          # Nome do arquivo (coluna ARQUIVO, textos de debug)
+        self.caminho = caminho    # PDF no disco
+        self.conteudo = conteudo  # bytes / memoryview já em memória
+        self.pacote = pacote      # zipfile.ZipFile aberto
+        self.membro = membro      # nome do membro dentro do zip
+        self.mapa = mapa          # mmap do zip inteiro, de quem abriu o pacote
+
+    @classmethod
+    def de_caminho(cls, caminho):
+        """PDF no disco (o MuPDF abre o próprio arquivo)"""
+        return cls(os.path.basename(caminho), caminho=caminho)
+
+    @classmethod
+    def de_bytes(cls, conteudo, nome="fatura.pdf"):
+        return cls(nome, conteudo=conteudo)
+
+    @classmethod
+    def de_membro(cls, pacote, membro, mapa=None):
+        return cls(os.path.basename(membro), pacote=pacote, membro=membro, mapa=mapa)
+
+    def dados(self):
+        """Conteúdo do PDF em memória (sem cópia quando a origem permite)"""
+        if self.conteudo is not None:
+            return self.conteudo
+        if self.pacote is not None:
+            info = self.pacote.getinfo(self.membro)
+            if self.mapa is not None and info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+                cabecalho = self.mapa[info.header_offset:info.header_offset + TAMANHO_CABECALHO_LOCAL]
+                tamanho_nome, tamanho_extra = struct.unpack("<HH", cabecalho[26:30])
+                inicio = info.header_offset + TAMANHO_CABECALHO_LOCAL + tamanho_nome + tamanho_extra
+                return memoryview(self.mapa)[inicio:inicio + info.file_size]
+            return self.pacote.read(self.membro)
+        with open(self.caminho, "rb") as arquivo:
+            return arquivo.read()
+
+    def abrir(self):
+        """Documento PyMuPDF aberto a partir da fonte"""
+        import fitz
+        if self.caminho is not None:
+            return fitz.open(self.caminho)
+        return fitz.open(stream=self.dados(), filetype="pdf")
+
+    def __str__(self):
+        return self.nome
+
+
+def como_fonte(pdf):
+    """Aceita caminho (str) ou FontePDF: mantém compatível quem ainda passa só o caminho"""
+    return pdf if isinstance(pdf, FontePDF) else FontePDF.de_caminho(pdf)
+
+
+def fontes_do_zip(pacote, mapa=None):
+    """FontePDF de cada PDF dentro de um zip aberto (lote de parceiro, pacote arquivado...)"""
+    return [FontePDF.de_membro(pacote, info.filename, mapa) for info in pacote.infolist()
+            if info.filename.lower().endswith(".pdf") and not info.is_dir()]
+
+
+def fechar_mapa(mapa):
+    """Fecha o mmap do zip (no Windows, mapa aberto impede substituir ou apagar o arquivo)"""
+    try:
+        mapa.close()
+    except BufferError:
+        # Algum documento ainda usa uma fatia do mapa: ele é liberado quando a fatia sair de uso
+        pass
+
+
+class ZipMapeado:
+    """Zip de PDFs aberto com um único mapeamento em memória, compartilhado por todos os membros"""
+
+    def __init__(self, caminho):
+        self.zip = zipfile.ZipFile(caminho)
+        self.mapa = mapear_arquivo(caminho)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+    def fontes(self):
+        return fontes_do_zip(self.zip, self.mapa)
+
+    def fechar(self):
+        fechar_mapa(self.mapa)
+        self.zip.close()
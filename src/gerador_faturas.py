@@ -1,11 +1,16 @@
 import pandas as pd
-import fitz  # PyMuPDF
 import os
 import re
-import glob
+import itertools
 from openpyxl import load_workbook
 from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
 from datetime import datetime
+from armazem_faturas import listar_faturas
+from arquivo_frio import abrir_pacotes, meses_vizinhos
+from fonte_pdf import como_fonte
+from base_clientes import carregar_base
+from cruzamento import cruzar_boleto, escolher_por_competencia, STATUS_DISPONIVEL, STATUS_BOLETO_SEM_BASE
+from main import calcular_mes_competencia
 
 # ==========================================
 # 1. FUNÇÕES AUXILIARES
@@ -19,20 +24,13 @@ def text_to_float(texto):
     except:
         return 0.0
 
-def limpar_id(val):
-    try:
-        if pd.isna(val): return 9999.0
-        return float(re.sub(r'[^\d\.]', '', str(val)))
-    except:
-        return 9999.0
-
 # ==========================================
 # 2. MOTOR DE EXTRAÇÃO COMPLETA
 # ==========================================
 def extract_invoice_data(pdf_path):
-    import fitz
     import re
     import os
+    fonte = como_fonte(pdf_path)  # caminho ou FontePDF (bytes ou membro de zip)
 
     def text_to_float(txt):
         try:
@@ -65,7 +63,7 @@ def extract_invoice_data(pdf_path):
     }
 
     try:
-        doc = fitz.open(pdf_path)
+        doc = fonte.abrir()
         page = doc[0]
         text_full = page.get_text("text")
 
@@ -187,7 +185,7 @@ def extract_invoice_data(pdf_path):
         # 7. VALIDAÇÃO FINAL (NUNCA DESCARTA PDF)
         # ==================================================
         if not data["uc"]:
-            data["uc"] = f"PENDENTE_{os.path.basename(pdf_path)}"
+            data["uc"] = f"PENDENTE_{fonte.nome}"
             data["erro_extracao"] = "UC não localizada automaticamente"
 
         doc.close()
@@ -195,7 +193,7 @@ def extract_invoice_data(pdf_path):
     except Exception as e:
         data["erro_extracao"] = f"Erro crítico: {str(e)}"
         if not data["uc"]:
-            data["uc"] = f"ERRO_{os.path.basename(pdf_path)}"
+            data["uc"] = f"ERRO_{fonte.nome}"
 
     return data
 
@@ -222,112 +220,46 @@ def gerar_relatorio_final():
 
     # 1. Carrega Dados
     print("📂 Carregando base...")
-    df_base = pd.read_excel(base_excel, dtype={'Conta Contrato': str})
-    pdf_files = glob.glob(os.path.join(pdf_folder, "*.pdf"))
+    df_base = carregar_base(base_excel).tabela()
+    pdf_files = listar_faturas(pdf_folder, meses_vizinhos(mes_input))
     
-    extracted = {}
-    print(f"📡 Processando {len(pdf_files)} faturas...")
-    for pdf in pdf_files:
+    # Meses arquivados: faturas lidas direto do pacote zip, uma por vez
+    pacotes = abrir_pacotes(meses_vizinhos(mes_input))
+    total = len(pdf_files) + sum(len(pacote.ucs()) for pacote in pacotes)
+    fontes = itertools.chain(pdf_files, *(pacote.faturas() for pacote in pacotes))
+    
+    extracted = []
+    print(f"📡 Processando {total} faturas...")
+    for pdf in fontes:
         d = extract_invoice_data(pdf)
         if d['uc']:
-            extracted[d['uc']] = d
+            d['mes_competencia_calc'] = calcular_mes_competencia(d['dt_atual'])
+            extracted.append(d)
             # Debug: mostrar extração
             print(f"  UC: {d['uc']} | Total: R$ {d['total_value']:.2f} | ICMS: R$ {d['icms']:.2f}")
+    for pacote in pacotes:
+        pacote.fechar()
+
+    # Mais de uma fatura da UC entre os meses vizinhos: fica a da competência pedida
+    extracted = escolher_por_competencia(extracted, mes_input)
 
-    # 2. Monta Lista
+    # 2. Cruza com a base (merge pela UC: PENDENTE sem fatura, SEM BASE sem cliente)
     print("✍️  Escrevendo Excel...")
-    lista_final = []
-    
     if 'ID' in df_base.columns:
-        df_base['ID_Sort'] = df_base['ID'].apply(limpar_id)
+        df_base['ID_Sort'] = pd.to_numeric(
+            df_base['ID'].astype(str).str.replace(r'[^\d\.]', '', regex=True), errors='coerce'
+        ).fillna(9999.0)
         df_base = df_base.sort_values(by='ID_Sort')
-    
-    for _, row in df_base.iterrows():
-        uc_excel = str(row['Conta Contrato']).replace('.0', '').strip()
-        nome = row['Nome'] if 'Nome' in row else ''
-        id_cliente = row['ID'] if 'ID' in row else ''
-        
-        # ESTRUTURA COMPLETA
-        item = {
-            "ID": id_cliente,
-            "NOME CLIENTE": nome,
-            "UC": uc_excel,
-            "STATUS": "PENDENTE",
-            
-            # BLOCO 1: CABEÇALHO
-            "MÊS REF": mes_input,
-            "VALOR TOTAL (R$)": 0.0,
-            
-            # BLOCO 2: DATAS
-            "LEITURA ANTERIOR": "-",
-            "LEITURA ATUAL": "-",
-            "PRÓXIMA LEITURA": "-",
-            
-            # BLOCO 3: MEDIDOR
-            "MEDIDOR ANT.": 0,
-            "MEDIDOR ATUAL": 0,
-            "CONSUMO kWh": 0,
-            "ENERGIA COMP. kWh": 0,
-            
-            # BLOCO 4: TRIBUTOS
-            "ICMS (R$)": 0.0,
-            "PIS (R$)": 0.0,
-            "COFINS (R$)": 0.0,
-            
-            # BLOCO 5: VALORES DETALHADOS
-            "VALOR CONSUMO (R$)": 0.0,
-            "VALOR COMPENSADO (R$)": 0.0,
-            "VALOR ENERGIA INJ. (R$)": 0.0,
-            "CIP (R$)": 0.0,
-            
-            # BLOCO 6: CÁLCULOS
-            "VALOR CALCULADO (R$)": 0.0,
-            "DIFERENÇA (R$)": 0.0,
-            "VERIFICAÇÃO": "OK"
-        }
-        
-        if uc_excel in extracted:
-            d = extracted[uc_excel]
-            item["STATUS"] = "DISPONÍVEL"
-            item["MÊS REF"] = d['ref_month'] or mes_input
-            item["VALOR TOTAL (R$)"] = d['total_value']
-            
-            item["LEITURA ANTERIOR"] = d['dt_anterior']
-            item["LEITURA ATUAL"] = d['dt_atual']
-            item["PRÓXIMA LEITURA"] = d['dt_proxima']
-            
-            item["MEDIDOR ANT."] = d['leitura_ant']
-            item["MEDIDOR ATUAL"] = d['leitura_atl']
-            item["CONSUMO kWh"] = d['consumo_medido']
-            item["ENERGIA COMP. kWh"] = d['energia_compensada']
-            
-            item["ICMS (R$)"] = d['icms']
-            item["PIS (R$)"] = d['pis']
-            item["COFINS (R$)"] = d['cofins']
-            
-            item["VALOR CONSUMO (R$)"] = d['valor_consumo']
-            item["VALOR COMPENSADO (R$)"] = d['valor_consumo_compensado']
-            item["VALOR ENERGIA INJ. (R$)"] = d['valor_energia_injetada']
-            item["CIP (R$)"] = d['valor_cip']
-            
-            item["VALOR CALCULADO (R$)"] = d['valor_calculado']
-            item["DIFERENÇA (R$)"] = d['diferenca']
-            
-            # Verifica se os valores batem
-            if abs(d['diferenca']) < 1.0:  # Diferença menor que R$ 1,00
-                item["VERIFICAÇÃO"] = "✅ OK"
-            else:
-                item["VERIFICAÇÃO"] = f"⚠️ Dif: R$ {d['diferenca']:.2f}"
-            
-        lista_final.append(item)
 
-    df_resumo = pd.DataFrame(lista_final)
+    df_resumo = cruzar_boleto(df_base, extracted, mes_input)
+    sem_base = (df_resumo["STATUS"] == STATUS_BOLETO_SEM_BASE).sum()
+    if sem_base:
+        print(f"⚠️ {sem_base} fatura(s) com UC fora da base (linhas SEM BASE no fim do relatório)")
 
     # 3. Salva Excel
     with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
         df_resumo.to_excel(writer, sheet_name=f"Relatorio {clean_month}", index=False)
-        if 'ID_Sort' in df_base.columns: 
-            df_base = df_base.drop(columns=['ID_Sort'])
+        df_base = df_base.drop(columns=['ID_Sort', 'UC'], errors='ignore')
         df_base.to_excel(writer, sheet_name="Cad.RateioConsumo", index=False)
 
     # 4. Formatação Visual "BOLETO"
@@ -413,9 +345,10 @@ def gerar_relatorio_final():
     ws_summary.append(["RESUMO DO RELATÓRIO"])
     ws_summary.append([""])
     
-    total_faturas = len([x for x in lista_final if x["STATUS"] == "DISPONÍVEL"])
-    total_valor = sum([x["VALOR TOTAL (R$)"] for x in lista_final])
-    total_icms = sum([x["ICMS (R$)"] for x in lista_final])
+    disponiveis = df_resumo[df_resumo["STATUS"] == STATUS_DISPONIVEL]
+    total_faturas = len(disponiveis)
+    total_valor = disponiveis["VALOR TOTAL (R$)"].sum()
+    total_icms = disponiveis["ICMS (R$)"].sum()
     
     ws_summary.append([f"Total de Faturas Processadas: {total_faturas}"])
     ws_summary.append([f"Valor Total das Faturas: R$ {total_valor:,.2f}"])
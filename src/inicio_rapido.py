@@ -0,0 +1,122 @@
+import os
+import sys
+import json
+import shutil
+import time
+
+from diario_downloads import PASTA_CONTROLE
+
+# =============================================================================
+# INICIALIZAÇÃO RÁPIDA DO ROBÔ
+# =============================================================================
+# 1. Caminho do chromedriver em cache local (evita a consulta de versão do
+#    ChromeDriverManager a cada abertura e funciona offline).
+# 2. Perfil "modelo" (perfil_bot) copiado a cada início para uma pasta de
+#    execução, sem caches de shader/GPU/código, Crashpad e afins.
+
+CACHE_DRIVER = os.path.join(PASTA_CONTROLE, "chromedriver.json")
+PERFIL_MODELO = "perfil_bot"
+PERFIL_EXECUCAO = os.path.join(PASTA_CONTROLE, "perfil_execucao")
+
+# Itens do perfil que o Chrome recria sozinho e só deixam a cópia lenta
+ITENS_DESCARTAVEIS = {
+    "ShaderCache", "GrShaderCache", "GraphiteDawnCache",
+    "Crashpad", "CrashpadMetrics-active.pma", "BrowserMetrics",
+    "optimization_guide_model_store", "segmentation_platform",
+    "component_crx_cache", "extensions_crx_cache",
+    "Cache", "Code Cache", "GPUCache", "DawnWebGPUCache", "DawnGraphiteCache",
+    "Service Worker", "Sessions",
+    "SingletonLock", "SingletonCookie", "SingletonSocket", "lockfile",
+}
+
+
+# ==========================================
+# CHROMEDRIVER EM CACHE
+# ==========================================
+def obter_chromedriver(forcar=False):
+    """Retorna o caminho do chromedriver, consultando o ChromeDriverManager só quando necessário"""
+    if not forcar and os.path.exists(CACHE_DRIVER):
+        try:
+            with open(CACHE_DRIVER, encoding="utf-8") as f:
+                caminho = json.load(f).get("caminho")
+            if caminho and os.path.exists(caminho):
+                return caminho
+        except (OSError, ValueError):
+            pass
+
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    caminho = ChromeDriverManager().install()
+
+    os.makedirs(PASTA_CONTROLE, exist_ok=True)
+    with open(CACHE_DRIVER, "w", encoding="utf-8") as f:
+        json.dump({"caminho": caminho, "atualizado_em": time.strftime("%Y-%m-%d %H:%M:%S")}, f, indent=2)
+
+    print(f"🔧 Chromedriver fixado em cache: {caminho}")
+    return caminho
+
+
+# ==========================================
+# PERFIL MODELO (COPY-ON-START)
+# ==========================================
+def ignorar_descartaveis(pasta, nomes):
+    return [nome for nome in nomes if nome in ITENS_DESCARTAVEIS]
+
+
+def preparar_perfil(modelo=PERFIL_MODELO, destino=PERFIL_EXECUCAO):
+    """Copia o perfil modelo para a pasta de execução, sem caches (retorna o caminho absoluto)"""
+    inicio = time.time()
+    destino = os.path.abspath(destino)
+
+    if os.path.exists(destino):
+        shutil.rmtree(destino, ignore_errors=True)
+
+    if os.path.isdir(modelo):
+        shutil.copytree(modelo, destino, ignore=ignorar_descartaveis)
+    else:
+        os.makedirs(destino, exist_ok=True)
+
+    print(f"🗂️  Perfil de execução pronto em {time.time() - inicio:.1f}s: {destino}")
+    return destino
+
+
+def liberar_perfil(destino=PERFIL_EXECUCAO):
+    """Reaproveita o perfil de execução após uma queda: só remove as travas do Chrome morto"""
+    destino = os.path.abspath(destino)
+    for trava in ("SingletonLock", "SingletonCookie", "SingletonSocket", "lockfile"):
+        caminho = os.path.join(destino, trava)
+        if os.path.lexists(caminho):
+            try:
+                os.remove(caminho)
+            except OSError:
+                continue
+    return destino
+
+
+def podar_modelo_perfil(modelo=PERFIL_MODELO):
+    """Remove do perfil modelo os caches que o Chrome acumula com o uso"""
+    removidos = 0
+    for raiz, pastas, arquivos in os.walk(modelo):
+        for nome in list(pastas) + arquivos:
+            if nome in ITENS_DESCARTAVEIS:
+                caminho = os.path.join(raiz, nome)
+                if os.path.isdir(caminho):
+                    shutil.rmtree(caminho, ignore_errors=True)
+                    pastas.remove(nome)
+                else:
+                    try:
+                        os.remove(caminho)
+                    except OSError:
+                        continue
+                removidos += 1
+    print(f"🧹 {removidos} item(ns) de cache removido(s) de {modelo}")
+    return removidos
+
+
+if __name__ == "__main__":
+    # python src/inicio_rapido.py --podar   -> limpa o perfil modelo
+    # python src/inicio_rapido.py --driver  -> renova o chromedriver em cache
+    if "--podar" in sys.argv:
+        podar_modelo_perfil()
+    if "--driver" in sys.argv:
+        obter_chromedriver(forcar=True)
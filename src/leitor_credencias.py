@@ -1,58 +1,52 @@
 import pandas as pd
+import numpy as np
 import os
-import re
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Font, Border, Side, Alignment
+import xlsxwriter
+from base_clientes import gravar_cache
 
 
 # ==========================
 # Utils
 # ==========================
-def normalizar_acesso_equatorial(valor):
+def converter_datas(serie):
+    """pd.to_datetime tolerante: cada valor no seu formato (data do Excel, DD/MM/AAAA, AAAA-MM-DD...)"""
+    try:
+        return pd.to_datetime(serie, errors="coerce", dayfirst=True, format="mixed")
+    except (TypeError, ValueError):  # pandas < 2.0 não tem format="mixed" (e já converte valor a valor)
+        return pd.to_datetime(serie, errors="coerce", dayfirst=True)
+
+
+def normalizar_acesso_equatorial(coluna):
     """
-    Se for email -> mantém
+    Se for email -> mantém (minúsculo)
     Se for data -> converte para DD/MM/AAAA
-    Tudo retorna STRING
+    Tudo retorna STRING (vazio vira "")
     """
-    if pd.isna(valor):
-        return ""
-
-    valor_str = str(valor).strip()
+    texto = coluna.astype(object).where(coluna.notna(), "").astype(str).str.strip()
 
     # Email
-    if "@" in valor_str:
-        return valor_str.lower()
+    email = texto.str.contains("@", regex=False)
 
-    # Tentar interpretar como data
-    try:
-        data = pd.to_datetime(valor, errors="coerce", dayfirst=True)
-        if pd.notna(data):
-            return data.strftime("%d/%m/%Y")
-    except Exception:
-        pass
+    # Tentar interpretar como data (só o que não é email nem vazio)
+    datas = converter_datas(coluna.where(~email & texto.ne("")))
+    resultado = texto.where(datas.isna(), datas.dt.strftime("%d/%m/%Y"))
 
-    return valor_str
+    return resultado.where(~email, texto.str.lower())
 
-def corrigir_cpf_cnpj(valor):
+def corrigir_cpf_cnpj(coluna):
     """
     Remove não numéricos e adiciona zeros à esquerda.
     - Se len <= 11: Padroniza para 11 (CPF)
     - Se len > 11: Padroniza para 14 (CNPJ)
     """
-    if pd.isna(valor):
-        return ""
-    
-    # Deixa apenas números
-    limpo = re.sub(r"\D", "", str(valor))
-    
-    if not limpo:
-        return ""
-
-    # Lógica do Zero à Esquerda
-    if len(limpo) <= 11:
-        return limpo.zfill(11) # Ex: 6483747349 -> 06483747349
-    else:
-        return limpo.zfill(14) # Garante CNPJ correto também
+    # Deixa apenas números (o '.0' de célula numérica do Excel não é dígito do documento)
+    limpo = (coluna.astype(object).where(coluna.notna(), "").astype(str).str.strip()
+             .str.replace(r"\.0$", "", regex=True)
+             .str.replace(r"\D", "", regex=True))
+
+    # Lógica do Zero à Esquerda: Ex: 6483747349 -> 06483747349; CNPJ sempre com 14
+    cpf = limpo.str.len() <= 11
+    return limpo.str.zfill(11).where(cpf, limpo.str.zfill(14)).where(limpo.ne(""), "")
 
 # ==========================
 # Main
@@ -90,33 +84,19 @@ def gerar_planilha_rateio():
 
     # --- CORREÇÃO APLICADA AQUI ---
     # Aplica a função que coloca o zero à esquerda
-    df["CNPJ/CPF"] = df["CNPJ/CPF"].apply(corrigir_cpf_cnpj)
+    df["CNPJ/CPF"] = corrigir_cpf_cnpj(df["CNPJ/CPF"])
 
     # Corrigir coluna M (email OU data nascimento)
     if "Acesso equatorial" in df.columns:
-        df["Acesso equatorial"] = df["Acesso equatorial"].apply(
-            normalizar_acesso_equatorial
-        )
+        df["Acesso equatorial"] = normalizar_acesso_equatorial(df["Acesso equatorial"])
 
     # Data de Inicio (se existir)
     if "Data de Inicio" in df.columns:
-        df["Data de Inicio"] = (
-            pd.to_datetime(
-                df["Data de Inicio"],
-                errors="coerce",
-                dayfirst=True
-            )
-            .dt.strftime("%d/%m/%Y")
-            .astype(str)
-        )
+        df["Data de Inicio"] = converter_datas(df["Data de Inicio"]).dt.strftime("%d/%m/%Y")
 
     # --------------------------
     # Criação do Excel FINAL
     # --------------------------
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Cad.RateioConsumo"
-
     COLUNAS_MODELO = [
         "Nome",
         "ID",
@@ -135,47 +115,47 @@ def gerar_planilha_rateio():
         "Vigente"
     ]
 
-    # Estilos
-    header_fill = PatternFill("solid", fgColor="9BBB59")
-    header_font = Font(bold=True)
-    border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin")
-    )
-    align = Alignment(
-        horizontal="center",
-        vertical="center",
-        wrap_text=True
-    )
-
-    # Header
-    for col, nome in enumerate(COLUNAS_MODELO, start=1):
-        cell = ws.cell(row=1, column=col, value=nome)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.border = border
-        cell.alignment = align
-        ws.column_dimensions[chr(64 + col)].width = 22
-
-    # Dados (FORÇANDO TEXTO PARA NÃO PERDER O ZERO NO EXCEL FINAL)
-    for i, (_, row) in enumerate(df.iterrows(), start=2):
-        for col, nome in enumerate(COLUNAS_MODELO, start=1):
-            valor = str(row[nome]) if nome in df.columns else ""
-            cell = ws.cell(row=i, column=col, value=valor)
-            cell.number_format = "@" # Formato Texto
-
-    ws.freeze_panes = "A2"
+    # Dados já como texto, na ordem do modelo (coluna ausente ou célula vazia vira "")
+    saida = df.reindex(columns=COLUNAS_MODELO).astype(object)
+    saida = saida.where(saida.notna(), "").astype(str)
 
     caminho_saida = os.path.join(
         pasta_output,
         "Cad_RateioConsumo_Final.xlsx"
     )
 
-    wb.save(caminho_saida)
+    # Gravação em uma passada (linha a linha, sem manter as células em memória)
+    wb = xlsxwriter.Workbook(caminho_saida, {"constant_memory": True})
+    ws = wb.add_worksheet("Cad.RateioConsumo")
+
+    # Estilos
+    header_format = wb.add_format({
+        "bold": True,
+        "bg_color": "#9BBB59",
+        "border": 1,
+        "align": "center",
+        "valign": "vcenter",
+        "text_wrap": True
+    })
+    # FORÇANDO TEXTO PARA NÃO PERDER O ZERO NO EXCEL FINAL: formato "@" na coluna inteira
+    texto_format = wb.add_format({"num_format": "@"})
+    ws.set_column(0, len(COLUNAS_MODELO) - 1, 22, texto_format)
+
+    # Header
+    ws.write_row(0, 0, COLUNAS_MODELO, header_format)
+
+    # Dados
+    for i, valores in enumerate(saida.itertuples(index=False, name=None), start=1):
+        ws.write_row(i, 0, valores)
+
+    ws.freeze_panes(1, 0)
+    wb.close()
+
+    # Instantâneo binário para painel/relatórios não relerem o xlsx recém-gerado
+    gravar_cache(saida.replace("", np.nan).reset_index(drop=True), caminho_saida)
+
     print("✅ Planilha gerada corretamente (CPFs corrigidos com zero à esquerda)")
 
 
 if __name__ == "__main__":
-    gerar_planilha_rateio()
\ No newline at end of file
+    gerar_planilha_rateio()
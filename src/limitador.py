@@ -0,0 +1,135 @@
+import re
+import time
+import threading
+from contextlib import contextmanager
+
+# =============================================================================
+# LIMITADOR DE RITMO E GOVERNADOR DE CONCORRÊNCIA
+# =============================================================================
+# Com vários robôs em paralelo o portal pode entender o volume como ataque e
+# passar a exigir captcha (ou bloquear), o que para a operação inteira.
+#
+# 1. Balde de tokens compartilhado: limita navegações e downloads por minuto
+#    somando TODOS os robôs, com pequena rajada permitida.
+# 2. Controle de concorrência AIMD: sobe 1 robô ativo depois de N clientes
+#    saudáveis; em lentidão corta 25%, em 429/5xx/captcha corta pela metade
+#    (e as taxas do balde caem junto, voltando aos poucos).
+
+SINAL_OK = "ok"
+SINAL_LENTO = "lento"
+SINAL_BLOQUEIO = "bloqueio"
+
+TRECHOS_BLOQUEIO = ("captcha", "desafio", "too many requests", "http error 429")
+PADRAO_ERRO_SERVIDOR = re.compile(r"http error 5\d\d")
+
+
+def classificar_sinal(resultado, latencia, latencia_alvo):
+    """Traduz o resultado de um cliente em sinal para o governador"""
+    texto = str(resultado).lower()
+    if any(trecho in texto for trecho in TRECHOS_BLOQUEIO) or PADRAO_ERRO_SERVIDOR.search(texto):
+        return SINAL_BLOQUEIO
+    if "[timeout]" in texto or latencia > latencia_alvo:
+        return SINAL_LENTO
+    return SINAL_OK
+
+
+class BaldeTokens:
+    def __init__(self, taxa, capacidade=1):
+        self.taxa = taxa  # tokens por segundo
+        self.capacidade = capacidade
+        self.tokens = capacidade
+        self.ultimo = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consumir(self, quantidade=1):
+        """Bloqueia até haver token disponível; retorna os segundos esperados"""
+        esperado = 0.0
+        while True:
+            with self.lock:
+                agora = time.monotonic()
+                self.tokens = min(self.capacidade, self.tokens + (agora - self.ultimo) * self.taxa)
+                self.ultimo = agora
+                if self.tokens >= quantidade:
+                    self.tokens -= quantidade
+                    return esperado
+                falta = (quantidade - self.tokens) / self.taxa
+            time.sleep(falta)
+            esperado += falta
+
+
+class ControleConcorrencia:
+    def __init__(self, inicial=2, minimo=1, maximo=8, saudaveis_para_subir=5):
+        self.limite = float(inicial)
+        self.minimo = minimo
+        self.maximo = maximo
+        self.saudaveis_para_subir = saudaveis_para_subir
+        self.saudaveis = 0
+        self.em_uso = 0
+        self.condicao = threading.Condition()
+
+    @contextmanager
+    def vaga(self):
+        """Segura uma vaga de robô ativo enquanto o cliente é processado"""
+        with self.condicao:
+            while self.em_uso >= int(self.limite):
+                self.condicao.wait()
+            self.em_uso += 1
+        try:
+            yield
+        finally:
+            with self.condicao:
+                self.em_uso -= 1
+                self.condicao.notify_all()
+
+    def registrar(self, sinal):
+        """Aumento aditivo com clientes saudáveis, redução multiplicativa nos problemas"""
+        with self.condicao:
+            anterior = int(self.limite)
+            if sinal == SINAL_OK:
+                self.saudaveis += 1
+                if self.saudaveis >= self.saudaveis_para_subir and self.limite < self.maximo:
+                    self.limite = min(self.maximo, int(self.limite) + 1)
+                    self.saudaveis = 0
+            else:
+                fator = 0.5 if sinal == SINAL_BLOQUEIO else 0.75
+                self.limite = max(self.minimo, self.limite * fator)
+                self.saudaveis = 0
+
+            if int(self.limite) != anterior:
+                print(f"🎚️  Robôs ativos: {anterior} -> {int(self.limite)} ({sinal})")
+            self.condicao.notify_all()
+
+
+class Governador:
+    def __init__(self, navegacoes_por_minuto=30, downloads_por_minuto=20, latencia_alvo=90,
+                 concorrencia=None):
+        self.taxas_base = {
+            "navegacao": navegacoes_por_minuto / 60,
+            "download": downloads_por_minuto / 60,
+        }
+        self.baldes = {tipo: BaldeTokens(taxa, capacidade=3) for tipo, taxa in self.taxas_base.items()}
+        self.latencia_alvo = latencia_alvo
+        self.concorrencia = concorrencia or ControleConcorrencia()
+
+    def aguardar(self, tipo):
+        """Espera a vez de navegar/baixar respeitando o ritmo somado de todos os robôs"""
+        esperado = self.baldes[tipo].consumir()
+        if esperado >= 1:
+            print(f"  🚦 Aguardou {esperado:.1f}s pelo limite de {tipo}")
+
+    def vaga(self):
+        return self.concorrencia.vaga()
+
+    def registrar(self, resultado, latencia):
+        """Realimenta o governador com o resultado de um cliente (ou de um download)"""
+        sinal = classificar_sinal(resultado, latencia, self.latencia_alvo)
+        self.concorrencia.registrar(sinal)
+
+        for tipo, balde in self.baldes.items():
+            base = self.taxas_base[tipo]
+            with balde.lock:
+                if sinal == SINAL_BLOQUEIO:
+                    balde.taxa = max(base * 0.25, balde.taxa * 0.5)
+                elif sinal == SINAL_OK:
+                    balde.taxa = min(base, balde.taxa * 1.1)
+        return sinal
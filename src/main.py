@@ -13,6 +13,12 @@ from openpyxl import load_workbook
 from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 import re
+import itertools
+from armazem_faturas import ArmazemFaturas, listar_faturas
+from arquivo_frio import abrir_pacotes, meses_vizinhos
+from fonte_pdf import como_fonte
+from base_clientes import carregar_base
+from cruzamento import cruzar_relatorio, escolher_por_competencia, STATUS_OK, STATUS_PENDENTE
 
 # ==========================================
 # CONFIGURAÇÕES DO SISTEMA
@@ -123,7 +129,8 @@ def format_date(date_str):
 # EXTRAÇÃO DE DADOS COMPLETA
 # ==========================================
 def extrair_dados_fatura(pdf_path):
-    """Extrai todos os dados de uma fatura PDF"""
+    """Extrai todos os dados de uma fatura PDF (caminho ou FontePDF: bytes ou membro de zip)"""
+    fonte = como_fonte(pdf_path)
     dados = {
         # Inicializa todas as chaves
         'uc': None, 'instalacao': None, 'ref_month': None,
@@ -139,20 +146,18 @@ def extrair_dados_fatura(pdf_path):
         'preco_unit_consumo': 0.0, 'preco_unit_compensado': 0.0,
         'tipo_fornecimento': '', 'classificacao': '',
         'bandeira_tarifaria': '', 'cor_bandeira': '',
-        'arquivo': os.path.basename(pdf_path),
+        'arquivo': fonte.nome,
         'erro_extracao': None
     }
     
     try:
-        import fitz
-        
-        doc = fitz.open(pdf_path)
+        doc = fonte.abrir()
         pagina = doc[0]
         texto = pagina.get_text("text")
         
         # DEBUG: Salvar texto extraído
         os.makedirs(Config.PASTA_DEBUG, exist_ok=True)
-        debug_file = os.path.join(Config.PASTA_DEBUG, f"debug_{os.path.basename(pdf_path)}.txt")
+        debug_file = os.path.join(Config.PASTA_DEBUG, f"debug_{fonte.nome}.txt")
         with open(debug_file, 'w', encoding='utf-8') as f:
             f.write(texto)
         
@@ -358,7 +363,7 @@ def extrair_dados_fatura(pdf_path):
         return dados
     
     except Exception as e:
-        print(f"❌ Erro no PDF {os.path.basename(pdf_path)}: {e}")
+        print(f"❌ Erro no PDF {fonte.nome}: {e}")
         dados['erro_extracao'] = str(e)
         return dados
 
@@ -412,26 +417,28 @@ def processar_todas_faturas(mes_referencia):
         print(f"❌ Pasta não encontrada: {Config.PASTA_FATURAS}")
         return None
     
-    arquivos_pdf = glob.glob(os.path.join(Config.PASTA_FATURAS, "*.pdf"))
-    if not arquivos_pdf:
+    # Lista pelo inventário do armazém (soltos são arrumados antes), só meses que caem na competência
+    arquivos_pdf = listar_faturas(Config.PASTA_FATURAS, meses_vizinhos(mes_referencia))
+    
+    # Meses já arquivados: faturas lidas direto do pacote, sem descompactar
+    pacotes = abrir_pacotes(meses_vizinhos(mes_referencia))
+    total_pdfs = len(arquivos_pdf) + sum(len(pacote.ucs()) for pacote in pacotes)
+    if not total_pdfs:
         print(f"❌ Nenhum PDF encontrado em: {Config.PASTA_FATURAS}")
         return None
     
     print(f"📁 Pasta: {Config.PASTA_FATURAS}")
     print(f"📅 Mês de Referência: {mes_referencia}")
-    print(f"📄 Total de PDFs encontrados: {len(arquivos_pdf)}")
+    print(f"📄 Total de PDFs encontrados: {total_pdfs}")
+    for pacote in pacotes:
+        print(f"🧊 Pacote arquivado: {os.path.basename(pacote.caminho)} ({len(pacote.ucs())} faturas)")
     print("-"*70)
     
-    # Carrega base de clientes
-    clientes_base = {}
+    # Carrega base de clientes (cache binário + índice UC -> cliente)
+    clientes_base = None
     if os.path.exists(Config.BASE_CLIENTES):
         try:
-            df_base = pd.read_excel(Config.BASE_CLIENTES, dtype={'Conta Contrato': str})
-            for _, linha in df_base.iterrows():
-                uc = str(linha['Conta Contrato']).replace('.0', '').strip()
-                nome = linha['Nome'] if 'Nome' in linha else ''
-                id_cliente = linha['ID'] if 'ID' in linha else ''
-                clientes_base[uc] = {'nome': nome, 'id': id_cliente}
+            clientes_base = carregar_base(Config.BASE_CLIENTES).por_uc
             print(f"✅ Base de clientes carregada: {len(clientes_base)} registros")
         except Exception as e:
             print(f"⚠️ Erro na base: {e}")
@@ -443,18 +450,19 @@ def processar_todas_faturas(mes_referencia):
     print("\n🔍 EXTRAINDO DADOS:")
     print("-"*50)
     
-    for i, pdf_path in enumerate(arquivos_pdf, 1):
-        nome_arquivo = os.path.basename(pdf_path)
-        print(f"  [{i:3d}/{len(arquivos_pdf):3d}] {nome_arquivo}")
+    fontes = itertools.chain(arquivos_pdf, *(pacote.faturas() for pacote in pacotes))
+    for i, pdf_path in enumerate(fontes, 1):
+        nome_arquivo = como_fonte(pdf_path).nome
+        print(f"  [{i:3d}/{total_pdfs:3d}] {nome_arquivo}")
         
         dados = extrair_dados_fatura(pdf_path)
         
         # Define status baseado no erro
         if dados['erro_extracao']:
-            dados['status'] = "⚠️ PENDENTE"
+            dados['status'] = STATUS_PENDENTE
             print(f"    ⚠️ Pendência: {dados['erro_extracao']}")
         else:
-            dados['status'] = "✅ OK"
+            dados['status'] = STATUS_OK
 
         # Garante UC sempre
         if not dados.get('uc'):
@@ -466,23 +474,12 @@ def processar_todas_faturas(mes_referencia):
         else:
             dados['mes_competencia_calc'] = "-"
 
-        # Dados do cliente
-        uc = dados['uc']
-        if uc in clientes_base:
-            dados['nome_cliente'] = clientes_base[uc]['nome']
-            dados['id_cliente'] = clientes_base[uc]['id']
-        elif dados['status'] == "✅ OK":
-            dados['status'] = "⚠️ SEM BASE"
-            dados['nome_cliente'] = "NÃO ENCONTRADO"
-            dados['id_cliente'] = ""
-        else:
-            dados['nome_cliente'] = ""
-            dados['id_cliente'] = ""
-
         resultados.append(dados)
 
         print(f"    📄 UC: {dados['uc']} | Status: {dados['status']} | Valor: R$ {dados.get('total_value', 0):.2f}")
 
+    for pacote in pacotes:
+        pacote.fechar()
     
     if not resultados:
         print("\n❌ Nenhuma fatura processada com sucesso")
@@ -490,69 +487,14 @@ def processar_todas_faturas(mes_referencia):
     
     print(f"\n{'='*50}")
     print(f"✅ Faturas processadas: {len(resultados)}")
-    
-    # Organiza dados em DataFrame
-    # Na função processar_todas_faturas, substitua a criação do DataFrame por:
 
-    # Organiza dados em DataFrame - VERSÃO CORRIGIDA
-    dados_organizados = []
-    
-    for r in resultados:
-        linha = {
-            # GRUPO 1: IDENTIFICAÇÃO
-            'UC': r.get('uc', ''),
-            'INSTALAÇÃO': r.get('instalacao', ''),
-            'NOME CLIENTE': r.get('nome_cliente', ''),
-            'ID CLIENTE': r.get('id_cliente', ''),
-            'STATUS': r.get('status', ''),  # Coluna E é STATUS, não DATA LEITURA
-            
-            # GRUPO 2: DATAS
-            'MÊS REF': r.get('ref_month', ''),
-            'MÊS COMPETÊNCIA (CALC)': r.get('mes_competencia_calc', ''),
-            'VENCIMENTO': r.get('vencimento', ''),
-            'DATA EMISSÃO': r.get('data_emissao', ''),  # Vai pegar a data_emissao se extraída
-            'LEITURA ANTERIOR': r.get('dt_anterior', ''),
-            'DATA LEITURA': r.get('dt_atual', ''),  # Esta é a data da leitura atual
-            'PRÓXIMA LEITURA': r.get('dt_proxima', ''),
-            
-            # GRUPO 3: MEDIÇÃO (mantém igual)
-            'MEDIDOR ANTERIOR (kWh)': r.get('leitura_ant', 0),
-            'MEDIDOR ATUAL (kWh)': r.get('leitura_atl', 0),
-            'CONSUMO MEDIDO (kWh)': r.get('consumo_medido', 0),
-            'ENERGIA COMP. (kWh)': r.get('energia_compensada', 0),
-            'SALDO ACUMULADO (kWh)': r.get('saldo_acumulado', 0),
-            
-            # GRUPO 4: VALORES (R$) (mantém igual)
-            'VALOR TOTAL (R$)': r.get('total_value', 0),
-            'VALOR CONSUMO (R$)': r.get('valor_consumo', 0),
-            'VALOR COMPENSADO (R$)': r.get('valor_consumo_compensado', 0),
-            'VALOR ENERGIA INJ. (R$)': r.get('valor_energia_injetada', 0),
-            'CIP (R$)': r.get('valor_cip', 0),
-            'ADIC. BANDEIRA (R$)': r.get('valor_adicional_bandeira', 0),
-            
-            # GRUPOS 5-9: (mantém igual)
-            'PREÇO UNIT. CONSUMO (R$/kWh)': r.get('preco_unit_consumo', 0),
-            'PREÇO UNIT. COMPENSADO (R$/kWh)': r.get('preco_unit_compensado', 0),
-            
-            'ICMS (R$)': r.get('icms', 0),
-            'PIS (R$)': r.get('pis', 0),
-            'COFINS (R$)': r.get('cofins', 0),
-            
-            'ICMS (%)': r.get('icms_aliquota', 0),
-            'PIS (%)': r.get('pis_aliquota', 0),
-            'COFINS (%)': r.get('cofins_aliquota', 0),
-            
-            'TIPO FORNECIMENTO': r.get('tipo_fornecimento', ''),
-            'CLASSIFICAÇÃO': r.get('classificacao', ''),
-            'COR DA BANDEIRA': r.get('cor_bandeira', ''),
-            'BANDEIRA TARIF. (INFO)': r.get('bandeira_tarifaria', ''),
-            
-            'ARQUIVO': r.get('arquivo', ''),
-            'ERRO EXTRAÇÃO': r.get('erro_extracao', '')
-        }
-        dados_organizados.append(linha)
+    # Mais de uma fatura da UC entre os meses vizinhos: fica a da competência pedida
+    resultados = escolher_por_competencia(resultados, mes_referencia)
     
-    df = pd.DataFrame(dados_organizados)
+    # Cruza com a base de clientes (merge pela UC) e organiza as colunas do relatório
+    df, sem_fatura = cruzar_relatorio(resultados, clientes_base)
+    if len(sem_fatura):
+        print(f"📭 {len(sem_fatura)} cliente(s) da base sem fatura entre os PDFs lidos")
 
     # ==========================================================
     # NOVO: FILTRO DA PAULA (DIA 12)
@@ -1138,7 +1080,7 @@ def testar_extracao():
         print(f"❌ Pasta não encontrada: {Config.PASTA_FATURAS}")
         return
     
-    arquivos = glob.glob(os.path.join(Config.PASTA_FATURAS, "*.pdf"))
+    arquivos = listar_faturas(Config.PASTA_FATURAS)
     if not arquivos:
         print("❌ Nenhum PDF encontrado")
         return
@@ -1214,7 +1156,18 @@ def mostrar_estatisticas_pastas():
     ]
     
     for caminho, nome in pastas:
-        if os.path.exists(caminho):
+        if caminho == Config.PASTA_FATURAS and os.path.exists(caminho):
+            # Faturas: direto do inventário, sem percorrer as partições
+            armazem = ArmazemFaturas(caminho)
+            por_mes = armazem.estatisticas()
+            armazem.fechar()
+            
+            print(f"\n{nome}:")
+            print(f"  📍 {caminho}")
+            print(f"  📦 Itens: {sum(quantidade for quantidade, _ in por_mes.values())}")
+            print(f"  💾 Tamanho: {sum(tamanho for _, tamanho in por_mes.values())/1024/1024:.1f} MB")
+            print(f"  🗓️  Meses: {len(por_mes)}")
+        elif os.path.exists(caminho):
             itens = len(glob.glob(os.path.join(caminho, "*")))
             tamanho = 0
             for arq in glob.glob(os.path.join(caminho, "*")):
@@ -0,0 +1,71 @@
+import os
+import json
+
+from captura_cdp import executar_cdp
+
+# =============================================================================
+# NAVEGAÇÃO LEVE (BLOQUEIO DE RECURSOS VIA CDP)
+# =============================================================================
+# O robô só precisa do HTML/JS do portal para ler a tabela de faturas. Imagens,
+# fontes, mídia e rastreadores de terceiros são cortados com
+# Network.setBlockedURLs, o que reduz o tempo de carga e a memória de cada
+# navegador (importante quando vários rodam em paralelo na mesma máquina).
+#
+# O bloqueio é só por padrão de URL (extensão do arquivo e domínio), não por
+# tipo de recurso: imagem, fonte ou mídia servida sem extensão (endpoint de
+# dados, CDN sem sufixo) continua sendo baixada. Bloquear por tipo exigiria
+# interceptar cada requisição (Fetch.enable + Fetch.requestPaused) e responder
+# a ela na hora; os eventos CDP aqui chegam pelo log 'performance', lido por
+# amostragem, e a página ficaria travada esperando a resposta.
+#
+# As regras ficam só em config/navegacao_leve.json e podem ser ajustadas sem
+# mexer no código (ex: liberar imagens se o login passar a exigir captcha).
+# Sem o arquivo, nada é bloqueado.
+
+ARQUIVO_CONFIG = os.path.join("config", "navegacao_leve.json")
+
+# Padrão sem bloqueio: as listas vêm do arquivo de configuração
+CONFIG_PADRAO = {
+    "bloquear_tipos": [],
+    "extensoes": {},
+    "dominios_bloqueados": [],
+    "urls_bloqueadas": [],
+}
+
+
+def carregar_config(caminho=ARQUIVO_CONFIG):
+    """Lê as regras do arquivo de configuração (sem arquivo válido, nada é bloqueado)"""
+    config = dict(CONFIG_PADRAO)
+    if os.path.exists(caminho):
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                config.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Config de navegação leve inválida ({e}), nenhum recurso será bloqueado")
+    return config
+
+
+def padroes_bloqueio(config):
+    """Converte as regras em padrões de URL aceitos pelo Network.setBlockedURLs"""
+    padroes = []
+
+    for tipo in config.get("bloquear_tipos", []):
+        for extensao in config.get("extensoes", {}).get(tipo, []):
+            padroes.append(f"*.{extensao}")
+            padroes.append(f"*.{extensao}?*")
+
+    for dominio in config.get("dominios_bloqueados", []):
+        padroes.append(f"*://{dominio}/*")
+        padroes.append(f"*://*.{dominio}/*")
+
+    padroes.extend(config.get("urls_bloqueadas", []))
+    return padroes
+
+
+def ativar_navegacao_leve(driver, config=None):
+    """Liga o bloqueio de recursos não essenciais na aba atual do navegador"""
+    padroes = padroes_bloqueio(config or carregar_config())
+    executar_cdp(driver, "Network.enable", {})
+    executar_cdp(driver, "Network.setBlockedURLs", {"urls": padroes})
+    print(f"🪶 Navegação leve ativa: {len(padroes)} padrão(ões) de URL bloqueado(s)")
+    return padroes
@@ -1,18 +1,18 @@
-import fitz  # PyMuPDF
 import os
 import re
-import glob
 from openpyxl import load_workbook
 from openpyxl.styles import PatternFill, Font, Alignment
 from openpyxl.utils import get_column_letter # <--- A CORREÇÃO MÁGICA
+from armazem_faturas import ArmazemFaturas, identificar_pelo_conteudo
+from fonte_pdf import como_fonte
 
 # ==========================================
 # 1. MOTOR DE EXTRAÇÃO (PyMuPDF)
 # ==========================================
 def extract_uc_from_pdf(pdf_path):
-    """Extrai apenas a UC para conferência rápida"""
+    """Extrai apenas a UC para conferência rápida (caminho ou FontePDF)"""
     try:
-        doc = fitz.open(pdf_path)
+        doc = como_fonte(pdf_path).abrir()
         page = doc[0]
         blocks = page.get_text("blocks")
         blocks.sort(key=lambda b: (b[1], b[0])) 
@@ -49,15 +49,12 @@ def organizar_e_marcar():
     clean_month = mes_input.replace('/', '-')
     output_path = os.path.join(base_dir, "output", f"Demonstrativo_Visual_{clean_month}.xlsx")
 
-    # 1. Mapear PDFs baixados
-    print(f"📡 Escaneando PDFs...")
-    pdf_files = glob.glob(os.path.join(pdf_folder, "*.pdf"))
-    ucs_encontradas = set()
-    
-    for pdf in pdf_files:
-        uc = extract_uc_from_pdf(pdf)
-        if uc:
-            ucs_encontradas.add(uc)
+    # 1. Mapear PDFs baixados (UCs vêm do inventário do armazém, sem abrir PDF)
+    print(f"📡 Consultando inventário de faturas...")
+    armazem = ArmazemFaturas(pdf_folder)
+    armazem.arrumar_soltos(identificar_pelo_conteudo)
+    ucs_encontradas = armazem.ucs()
+    armazem.fechar()
     
     print(f"✅ Faturas identificadas: {len(ucs_encontradas)}")
 
@@ -0,0 +1,197 @@
+import os
+import sys
+import math
+import sqlite3
+import threading
+from datetime import datetime
+
+from diario_downloads import PASTA_CONTROLE
+
+# =============================================================================
+# TELEMETRIA DO ROBÔ (TEMPO POR ETAPA, POR CLIENTE E POR EXECUÇÃO)
+# =============================================================================
+# Cada etapa do EquatorialBot (login, Clara, troca de UC, tabela, "Ver Fatura",
+# download, renomear, logout e o total do cliente) grava sua duração aqui,
+# rotulada pela UC (o login, feito antes de saber a UC, pelo CNPJ/CPF).
+# O relatório mostra p50/p95/máximo por etapa, os clientes mais lentos e a
+# tendência entre execuções: é o que diz qual espera cortar e se uma mudança
+# no portal deixou tudo mais lento. O mesmo histórico define os timeouts das
+# esperas do robô (troca de UC, tabela e download).
+#
+#   python src/telemetria.py          -> relatório das últimas 10 execuções
+#   python src/telemetria.py 30       -> relatório das últimas 30 execuções
+
+ARQUIVO_TELEMETRIA = os.path.join(PASTA_CONTROLE, "telemetria.db")
+
+# Ordem de exibição no relatório
+ETAPAS = ["login", "clara", "troca_uc", "tabela", "ver_fatura", "download", "renomear", "logout", "total"]
+
+# Timeouts adaptativos: p99 das últimas observações BEM-SUCEDIDAS da etapa, com
+# folga e limitado a (piso, teto). Falhas ficam de fora porque a duração delas é
+# o próprio timeout antigo. Sem histórico suficiente vale o valor fixo do robô.
+LIMITES_TIMEOUT = {
+    "troca_uc": (15, 60),
+    "tabela": (10, 60),
+    "download": (20, 180),
+}
+JANELA_TIMEOUT = 200     # observações mais recentes consideradas por etapa
+AMOSTRAS_MINIMAS = 20    # abaixo disso o histórico ainda não é confiável
+FOLGA_TIMEOUT = 1.5      # multiplicador sobre o p99
+RECALCULAR_A_CADA = 25   # registros entre recálculos (acompanha lentidões no meio do lote)
+
+
+def percentil(valores, p):
+    """Percentil pelo método nearest-rank (valores não precisam estar ordenados)"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    posicao = max(0, min(len(ordenados), math.ceil(p / 100 * len(ordenados))) - 1)
+    return ordenados[posicao]
+
+
+class Telemetria:
+    def __init__(self, caminho=ARQUIVO_TELEMETRIA):
+        self.caminho = caminho
+        self.execucao = datetime.now().isoformat(timespec="seconds")  # Identifica esta rodada
+        self.lock = threading.Lock()
+        self.timeouts = {}  # {etapa: segundos} aprendidos do histórico
+        self.registros = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS etapas (
+                    execucao TEXT NOT NULL,
+                    cliente TEXT,
+                    etapa TEXT NOT NULL,
+                    duracao REAL NOT NULL,
+                    sucesso INTEGER NOT NULL,
+                    momento TEXT NOT NULL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_etapas_execucao ON etapas (execucao, etapa)")
+
+        self.recalcular_timeouts()
+        for etapa, segundos in sorted(self.timeouts.items()):
+            print(f"⏱️  Timeout adaptativo de {etapa}: {segundos:.0f}s")
+
+    def registrar(self, cliente, etapa, duracao, sucesso=True):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO etapas (execucao, cliente, etapa, duracao, sucesso, momento) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.execucao, cliente, etapa, duracao, int(bool(sucesso)),
+                 datetime.now().isoformat(timespec="seconds")),
+            )
+            self.registros += 1
+            recalcular = self.registros % RECALCULAR_A_CADA == 0
+
+        if recalcular:
+            self.recalcular_timeouts()
+
+    def recalcular_timeouts(self):
+        timeouts = {}
+        for etapa, (piso, teto) in LIMITES_TIMEOUT.items():
+            with self.lock:
+                linhas = self.conn.execute(
+                    "SELECT duracao FROM etapas WHERE etapa = ? AND sucesso = 1 ORDER BY rowid DESC LIMIT ?",
+                    (etapa, JANELA_TIMEOUT),
+                ).fetchall()
+            if len(linhas) >= AMOSTRAS_MINIMAS:
+                p99 = percentil([linha[0] for linha in linhas], 99)
+                timeouts[etapa] = min(teto, max(piso, p99 * FOLGA_TIMEOUT))
+        self.timeouts = timeouts
+
+    def timeout(self, etapa, padrao):
+        """Timeout aprendido para a etapa (ou o padrão fixo enquanto não há histórico)"""
+        return self.timeouts.get(etapa, padrao)
+
+    def execucoes(self, ultimas=10):
+        """Identificadores das últimas execuções, da mais antiga para a mais recente"""
+        with self.lock:
+            linhas = self.conn.execute(
+                "SELECT DISTINCT execucao FROM etapas ORDER BY execucao DESC LIMIT ?", (ultimas,)
+            ).fetchall()
+        return [linha[0] for linha in reversed(linhas)]
+
+    def duracoes(self, execucoes, etapa=None, so_sucesso=False):
+        """{etapa: [duracoes]} das execuções informadas"""
+        if not execucoes:
+            return {}
+        filtros = [f"execucao IN ({','.join('?' * len(execucoes))})"]
+        parametros = list(execucoes)
+        if etapa:
+            filtros.append("etapa = ?")
+            parametros.append(etapa)
+        if so_sucesso:
+            filtros.append("sucesso = 1")
+
+        with self.lock:
+            linhas = self.conn.execute(
+                f"SELECT etapa, duracao FROM etapas WHERE {' AND '.join(filtros)}", parametros
+            ).fetchall()
+
+        resultado = {}
+        for nome, duracao in linhas:
+            resultado.setdefault(nome, []).append(duracao)
+        return resultado
+
+    def clientes_mais_lentos(self, execucao, quantidade=10):
+        with self.lock:
+            return self.conn.execute(
+                """
+                SELECT cliente, duracao, sucesso FROM etapas
+                WHERE execucao = ? AND etapa = 'total'
+                ORDER BY duracao DESC LIMIT ?
+                """,
+                (execucao, quantidade),
+            ).fetchall()
+
+    def imprimir_relatorio(self, ultimas=10):
+        execucoes = self.execucoes(ultimas)
+        if not execucoes:
+            print("📭 Nenhuma telemetria registrada ainda")
+            return
+
+        atual = execucoes[-1]
+        print(f"\n{'='*72}")
+        print(f"⏱️  TELEMETRIA DO ROBÔ - execução {atual}")
+        print(f"{'='*72}")
+        print(f"{'Etapa':<12}{'n':>6}{'falhas':>8}{'p50':>10}{'p95':>10}{'máx':>10}")
+
+        duracoes = self.duracoes([atual])
+        with self.lock:
+            falhas = dict(self.conn.execute(
+                "SELECT etapa, COUNT(*) FROM etapas WHERE execucao = ? AND sucesso = 0 GROUP BY etapa",
+                (atual,),
+            ).fetchall())
+
+        for etapa in ETAPAS + sorted(set(duracoes) - set(ETAPAS)):
+            valores = duracoes.get(etapa)
+            if valores:
+                print(f"{etapa:<12}{len(valores):>6}{falhas.get(etapa, 0):>8}"
+                      f"{percentil(valores, 50):>9.1f}s{percentil(valores, 95):>9.1f}s{max(valores):>9.1f}s")
+
+        lentos = self.clientes_mais_lentos(atual)
+        if lentos:
+            print("\n🐢 Clientes mais lentos:")
+            for uc, duracao, sucesso in lentos:
+                print(f"   UC {uc}: {duracao:.1f}s{'' if sucesso else ' (falhou)'}")
+
+        if len(execucoes) > 1:
+            print(f"\n📈 Tendência (p50 por execução, últimas {len(execucoes)}):")
+            for etapa in ETAPAS:
+                serie = []
+                for execucao in execucoes:
+                    valores = self.duracoes([execucao], etapa=etapa).get(etapa)
+                    serie.append(f"{percentil(valores, 50):.1f}" if valores else "-")
+                if any(valor != "-" for valor in serie):
+                    print(f"   {etapa:<12}" + " → ".join(serie))
+
+    def fechar(self):
+        with self.lock:
+            self.conn.close()
+
+
+if __name__ == "__main__":
+    Telemetria().imprimir_relatorio(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# Os módulos do projeto ficam soltos em src/ (rodam como scripts, sem pacote)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+@pytest.fixture
+def pasta(tmp_path, monkeypatch):
+    """Diretório de trabalho temporário: output/faturas, output/controle etc. ficam isolados"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def gravar_pdf(caminho, conteudo=b"%PDF-1.4 fatura"):
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    with open(caminho, "wb") as arquivo:
+        arquivo.write(conteudo)
+    return caminho
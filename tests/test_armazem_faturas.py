@@ -0,0 +1,38 @@
+import os
+
+from conftest import gravar_pdf
+from armazem_faturas import ArmazemFaturas, listar_faturas
+from diario_downloads import PASTA_FATURAS, nome_arquivo_fatura
+
+
+def test_soltos_vao_para_as_particoes_em_ordem_cronologica(pasta):
+    for mes in ("02/2026", "12/2025", "01/2026"):
+        gravar_pdf(os.path.join(PASTA_FATURAS, nome_arquivo_fatura("111", mes)), mes.encode())
+
+    armazem = ArmazemFaturas()
+    assert armazem.arrumar_soltos() == 3
+    assert [os.path.basename(caminho) for caminho in armazem.listar()] == [
+        "Fatura_111_12-2025.pdf", "Fatura_111_01-2026.pdf", "Fatura_111_02-2026.pdf"]
+    assert len(armazem.listar(["12/2025", "01/2026"])) == 2
+    armazem.fechar()
+
+
+def test_inventario_se_corrige_quando_o_arquivo_some(pasta):
+    gravar_pdf(os.path.join(PASTA_FATURAS, nome_arquivo_fatura("111", "01/2026")))
+    armazem = ArmazemFaturas()
+    armazem.arrumar_soltos()
+    caminho = armazem.localizar("111", "01/2026")
+    os.remove(caminho)
+
+    assert armazem.localizar("111", "01/2026") is None
+    assert armazem.ucs("01/2026") == set()
+    armazem.fechar()
+
+
+def test_pasta_de_fora_e_listada_sem_alteracao(pasta):
+    solto = gravar_pdf(os.path.join("parceiro", nome_arquivo_fatura("111", "01/2026")))
+    gravar_pdf(os.path.join("parceiro", nome_arquivo_fatura("111", "05/2025")))
+
+    assert listar_faturas("parceiro", "01/2026") == [solto]
+    assert os.path.exists(solto)
+    assert not os.path.exists(os.path.join("parceiro", "2026-01"))
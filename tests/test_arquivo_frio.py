@@ -0,0 +1,64 @@
+import os
+
+from conftest import gravar_pdf
+from armazem_faturas import ArmazemFaturas
+from arquivo_frio import arquivar_mes, caminho_pacote, ler_fatura, PacoteFaturas
+from diario_downloads import DiarioDownloads, PASTA_FATURAS, nome_arquivo_fatura
+
+
+def preparar_mes(mes_referencia, conteudos):
+    """Grava os PDFs soltos na raiz e arruma nas partições (como o robô deixaria)"""
+    for uc, conteudo in conteudos.items():
+        gravar_pdf(os.path.join(PASTA_FATURAS, nome_arquivo_fatura(uc, mes_referencia)), conteudo)
+    armazem = ArmazemFaturas()
+    armazem.arrumar_soltos()
+    caminhos = {uc: armazem.localizar(uc, mes_referencia) for uc in conteudos}
+    armazem.fechar()
+    return caminhos
+
+
+def test_arquivar_e_ler_do_pacote(pasta):
+    caminhos = preparar_mes("01/2025", {"111": b"%PDF-1.4 a", "222": b"%PDF-1.4 b"})
+
+    destino = arquivar_mes("01/2025")
+    assert destino == caminho_pacote("01/2025")
+    assert not any(os.path.exists(caminho) for caminho in caminhos.values())
+
+    assert ler_fatura("111", "01/2025") == b"%PDF-1.4 a"
+    assert ler_fatura("222", "01/2025") == b"%PDF-1.4 b"
+    assert ler_fatura("333", "01/2025") is None
+
+    with PacoteFaturas(destino) as pacote:
+        assert pacote.ucs() == ["111", "222"]
+        assert bytes(pacote.fonte("222").dados()) == b"%PDF-1.4 b"
+
+
+def test_fatura_arquivada_conta_como_guardada(pasta):
+    """Depois de arquivar, o robô não pode ver o mês como faltando e baixar de novo"""
+    preparar_mes("01/2025", {"111": b"%PDF-1.4 a"})
+    arquivar_mes("01/2025")
+
+    armazem = ArmazemFaturas()
+    assert armazem.localizar("111", "01/2025") == caminho_pacote("01/2025")
+    assert armazem.localizar("111", "01/2025", arquivadas=False) is None
+    assert armazem.localizar("999", "01/2025") is None
+    armazem.fechar()
+
+    diario = DiarioDownloads("01/2025", PASTA_FATURAS)
+    assert diario.concluido("111")
+    assert not diario.concluido("999")
+    diario.fechar()
+
+
+def test_arquivar_de_novo_mantem_o_que_ja_estava(pasta):
+    preparar_mes("01/2025", {"111": b"%PDF-1.4 a"})
+    arquivar_mes("01/2025")
+    preparar_mes("01/2025", {"222": b"%PDF-1.4 atrasada"})
+    arquivar_mes("01/2025")
+
+    assert ler_fatura("111", "01/2025") == b"%PDF-1.4 a"
+    assert ler_fatura("222", "01/2025") == b"%PDF-1.4 atrasada"
+
+
+def test_mes_aberto_nao_e_arquivado(pasta):
+    assert arquivar_mes("12/2999") is None
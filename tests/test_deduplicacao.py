@@ -0,0 +1,52 @@
+import os
+
+from conftest import gravar_pdf
+from deduplicacao import DeduplicadorFaturas
+from diario_downloads import PASTA_FATURAS, caminho_particao
+
+
+def test_copia_da_mesma_fatura_e_removida(pasta):
+    original = gravar_pdf(caminho_particao(PASTA_FATURAS, "111", "01/2026"))
+    copia = gravar_pdf(os.path.join(PASTA_FATURAS, "Fatura_111_01-2026_1.pdf"))
+
+    deduplicador = DeduplicadorFaturas()
+    deduplicador.registrar(original, remover=True)
+    assert deduplicador.registrar(copia, remover=True) == os.path.abspath(original)
+    assert not os.path.exists(copia)
+    assert deduplicador.canonico(copia) == os.path.abspath(original)
+    deduplicador.fechar()
+
+
+def test_conteudo_igual_de_outra_uc_nao_e_removido(pasta):
+    """PDF reemitido/genérico ou fatura errada do portal: cada UC fica com o seu arquivo"""
+    primeira = gravar_pdf(caminho_particao(PASTA_FATURAS, "111", "01/2026"))
+    outra_uc = gravar_pdf(caminho_particao(PASTA_FATURAS, "222", "01/2026"))
+    outro_mes = gravar_pdf(caminho_particao(PASTA_FATURAS, "111", "02/2026"))
+
+    deduplicador = DeduplicadorFaturas()
+    deduplicador.registrar(primeira, remover=True)
+    assert deduplicador.registrar(outra_uc, remover=True) == os.path.abspath(outra_uc)
+    assert deduplicador.registrar(outro_mes, remover=True) == os.path.abspath(outro_mes)
+    assert all(os.path.exists(caminho) for caminho in (primeira, outra_uc, outro_mes))
+    deduplicador.fechar()
+
+
+def test_sem_remover_nada_e_apagado(pasta):
+    original = gravar_pdf(os.path.join(PASTA_FATURAS, "Fatura_111_01-2026.pdf"))
+    copia = gravar_pdf(os.path.join(PASTA_FATURAS, "Fatura_111_01-2026_1.pdf"))
+
+    deduplicador = DeduplicadorFaturas()
+    assert deduplicador.varrer() == [os.path.abspath(original)]
+    assert os.path.exists(copia)
+    deduplicador.fechar()
+
+
+def test_arquivo_fora_da_raiz_nunca_e_removido(pasta):
+    original = gravar_pdf(os.path.join(PASTA_FATURAS, "Fatura_111_01-2026.pdf"))
+    externo = gravar_pdf(os.path.join("parceiro", "Fatura_111_01-2026.pdf"))
+
+    deduplicador = DeduplicadorFaturas()
+    deduplicador.registrar(original, remover=True)
+    deduplicador.registrar(externo, remover=True)
+    assert os.path.exists(externo)
+    deduplicador.fechar()
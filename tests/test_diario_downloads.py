@@ -0,0 +1,47 @@
+import os
+
+from conftest import gravar_pdf
+from diario_downloads import (DiarioDownloads, PASTA_FATURAS, STATUS_ERRO, STATUS_SUCESSO,
+                              caminho_particao, nome_arquivo_fatura)
+
+
+def test_sucesso_do_ciclo_conclui(pasta):
+    diario = DiarioDownloads("02/2026", PASTA_FATURAS)
+    diario.registrar("300.123", STATUS_SUCESSO, mes_referencia="02/2026")
+    assert diario.concluido("300123")
+    diario.fechar()
+
+
+def test_sucesso_com_fatura_de_mes_anterior_nao_conclui(pasta):
+    """Portal ainda mostrava a fatura do mês passado: a UC continua pendente no ciclo"""
+    diario = DiarioDownloads("02/2026", PASTA_FATURAS)
+    diario.registrar("300123", STATUS_SUCESSO, mes_referencia="01/2026")
+    assert not diario.concluido("300123")
+    diario.fechar()
+
+
+def test_pdf_do_ciclo_no_disco_conclui(pasta):
+    diario = DiarioDownloads("02/2026", PASTA_FATURAS)
+    diario.registrar("300123", STATUS_ERRO, mensagem="Erro: timeout")
+    assert not diario.concluido("300123")
+
+    gravar_pdf(caminho_particao(PASTA_FATURAS, "300123", "02/2026"))
+    assert diario.concluido("300123")
+
+    # Solto na raiz (modo antigo, inclusive cópia _1) também vale
+    gravar_pdf(os.path.join(PASTA_FATURAS, "Fatura_400_02-2026_1.pdf"))
+    assert diario.concluido("400")
+    diario.fechar()
+
+
+def test_primeiro_pendente(pasta):
+    diario = DiarioDownloads("02/2026", PASTA_FATURAS)
+    diario.registrar("1", STATUS_SUCESSO, mes_referencia="02/2026")
+    diario.registrar("2", STATUS_SUCESSO, mes_referencia="01/2026")
+    gravar_pdf(os.path.join(PASTA_FATURAS, nome_arquivo_fatura("3", "02/2026")))
+
+    ucs = ["1", "2", "3", "4"]
+    assert diario.primeiro_pendente(ucs) == 1
+    assert diario.primeiro_pendente(ucs, 2) == 3
+    assert diario.primeiro_pendente(["1", "3"]) is None
+    diario.fechar()
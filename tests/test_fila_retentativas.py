@@ -0,0 +1,38 @@
+from diario_downloads import ARQUIVO_DIARIO, DiarioDownloads, PASTA_FATURAS, STATUS_SUCESSO
+from fila_retentativas import (CATEGORIA_SEM_FATURAS, CATEGORIA_TIMEOUT, ESPERA_MAXIMA, FilaRetentativas,
+                               calcular_espera, classificar_erro, registrar_resultado)
+
+
+def test_classificar_erro():
+    assert classificar_erro("Erro [SEM_FATURAS]: portal sem faturas") == CATEGORIA_SEM_FATURAS
+    assert classificar_erro("Erro: Timeout ao carregar a tabela") == CATEGORIA_TIMEOUT
+
+
+def test_backoff_limitado():
+    assert [calcular_espera(n) for n in (1, 2, 3)] == [30, 60, 120]
+    assert calcular_espera(50) == ESPERA_MAXIMA
+
+
+def test_sem_faturas_vai_direto_para_humano(pasta):
+    diario = DiarioDownloads("02/2026", PASTA_FATURAS)  # Cria o banco de controle
+    fila = FilaRetentativas("02/2026", ARQUIVO_DIARIO)
+    fila.enfileirar("111", "Erro [SEM_FATURAS]: portal sem faturas")
+    assert fila.prontas() == []
+    assert [linha[0] for linha in fila.precisam_de_humano()] == ["111"]
+    fila.fechar()
+    diario.fechar()
+
+
+def test_sucesso_tira_da_fila(pasta):
+    diario = DiarioDownloads("02/2026", PASTA_FATURAS)
+    fila = FilaRetentativas("02/2026", diario.caminho)
+
+    registrar_resultado(diario, fila, "111", "Erro: Timeout ao carregar a tabela")
+    assert fila.tentativas("111") == 1
+    assert diario.status("111") != STATUS_SUCESSO
+
+    registrar_resultado(diario, fila, "111", "Sucesso: 02/2026")
+    assert fila.tentativas("111") == 0
+    assert diario.concluido("111")
+    fila.fechar()
+    diario.fechar()
@@ -0,0 +1,37 @@
+import os
+import zipfile
+
+from fonte_pdf import FontePDF, ZipMapeado, como_fonte
+
+
+def criar_zip(caminho):
+    with zipfile.ZipFile(caminho, "w") as pacote:
+        pacote.writestr("lote/a.pdf", b"%PDF-1.4 guardada", compress_type=zipfile.ZIP_STORED)
+        pacote.writestr("lote/b.pdf", b"%PDF-1.4 comprimida" * 20, compress_type=zipfile.ZIP_DEFLATED)
+        pacote.writestr("leia-me.txt", b"nao e pdf")
+    return caminho
+
+
+def test_membros_do_zip_sem_extrair(pasta):
+    with ZipMapeado(criar_zip("lote.zip")) as pacote:
+        fontes = pacote.fontes()
+        assert [fonte.nome for fonte in fontes] == ["a.pdf", "b.pdf"]
+        assert bytes(fontes[0].dados()) == b"%PDF-1.4 guardada"
+        assert bytes(fontes[1].dados()) == b"%PDF-1.4 comprimida" * 20
+
+
+def test_mapa_fechado_libera_o_arquivo(pasta):
+    """Mapa aberto impede o os.replace do arquivamento no Windows"""
+    pacote = ZipMapeado(criar_zip("lote.zip"))
+    dados = pacote.fontes()[0].dados()
+    del dados
+    pacote.fechar()
+    assert pacote.mapa.closed
+    os.replace("lote.zip", "outro.zip")
+
+
+def test_como_fonte(pasta):
+    fonte = como_fonte(os.path.join("pasta", "Fatura_1_01-2026.pdf"))
+    assert fonte.nome == "Fatura_1_01-2026.pdf" and fonte.caminho is not None
+    memoria = FontePDF.de_bytes(b"%PDF-1.4")
+    assert como_fonte(memoria) is memoria and memoria.dados() == b"%PDF-1.4"